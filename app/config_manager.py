@@ -9,10 +9,30 @@ DEFAULTS = {
     "max_storage_mb": 500,
     "max_age_days": 90,
     "cleanup_interval_minutes": 30,
+    "image_gc_interval_seconds": 60,
+    "orphan_scan_interval_days": 7,
     "auto_start": False,
     "blacklisted_apps": ["KeePass.exe", "1Password.exe"],
     "deduplicate_consecutive": True,
-    "window": {"width": 840, "height": 1040, "opacity": 0.97},
+    "capture": {
+        "queue_size": 32,
+        "workers": 1,
+        "overflow": "drop_oldest",
+        "coalesce_ms": 50,
+        "coalesce_max_ms": 500,
+        "raw_formats": True,
+        "max_format_kb": 4096,
+    },
+    "images": {"codec": "png_fast", "effort": None, "encoder_workers": 1},
+    "ingest": {
+        "inline_max_kb": 1024,
+        "max_mb": 64,
+        "large_action": "external",
+        "head_chars": 65536,
+    },
+    "tracing": {"enabled": True, "capacity": 512},
+    "ipc": {"enabled": False, "name": "ClipboardAriGo", "workers": 2, "cache_size": 128},
+    "window": {"width": 840, "height": 1040, "opacity": 0.97, "prewarm": True, "fade": True},
     "ui_scale": 100,
     "ui": {"font_family": "Segoe UI", "font_size": 11, "theme": "dark"},
 }
@@ -13,6 +13,24 @@ class ContentType:
     FILE_PATH = "file_path"
     URL = "url"
 
+# Finer classification of textual entries (clipboard_entries.content_subtype)
+class ContentSubtype:
+    URL = "url"
+    EMAIL = "email"
+    FILE_PATH = "path"
+    COLOR = "color"
+    JSON = "json"
+    CODE = "code"
+    NUMBER = "number"
+    PHONE = "phone"
+
+# Image file state (clipboard_entries.image_state)
+class ImageState:
+    PENDING = "pending"          # row inserted, encoding still running
+    READY = "ready"
+    UNOPTIMIZED = "unoptimized"  # fast encode written, optimize pass pending
+    FAILED = "failed"
+
 ALL_CONTENT_TYPES = [
     ContentType.TEXT,
     ContentType.HTML,
@@ -34,6 +52,13 @@ STRINGS = {
     "filter_html": "טקסט עשיר",
     "filter_file": "קבצים",
     "filter_url": "קישורים",
+    "filter_email": "אימייל",
+    "filter_path": "נתיב",
+    "filter_color": "צבע",
+    "filter_json": "JSON",
+    "filter_code": "קוד",
+    "filter_number": "מספר",
+    "filter_phone": "טלפון",
 
     # Actions
     "pin": "הצמד",
@@ -73,6 +98,12 @@ STRINGS = {
     "tray_pause": "השהה ניטור",
     "tray_resume": "המשך ניטור",
     "tray_exit": "יציאה",
+    "tray_latency": "זמני תגובה",
+
+    # Latency debug view
+    "trace_title": "זמני תגובה (ms)",
+    "trace_dump": "ייצוא JSON",
+    "trace_clear": "איפוס",
 
     # Settings
     "settings": "הגדרות",
@@ -95,6 +126,10 @@ STRINGS = {
     "icon_image": "🖼️",
     "icon_file": "📁",
     "icon_url": "🔗",
+
+    # Image placeholders
+    "image_preview": "[תמונה]",
+    "image_pending": "[תמונה — בעיבוד...]",
 }
 
 # Map content type to filter label key
@@ -0,0 +1,263 @@
+"""
+צינור קליטה — שלב snapshot מהיר ב-thread של CaptureCoalescer (או של ה-message
+pump כשהקיבוץ כבוי), ושלב עיבוד (hash, פענוח, שמירה) ב-workers, מחוברים בתור חסום.
+עדכונים שמגיעים ברצף מקובצים ל-snapshot אחד של המצב הסופי.
+"""
+
+import queue
+import threading
+import time
+
+from app.core.clipboard_snapshot import (
+    ClipboardSnapshot, DEFAULT_INGEST_POLICY, entry_from_snapshot,
+)
+from app.core.tracing import PATH_CAPTURE
+
+# What to do when the processing queue is full
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # keep the newest clipboard state
+OVERFLOW_DROP_NEWEST = "drop_newest"  # keep what is already queued
+OVERFLOW_BLOCK = "block"              # wait up to block_timeout, then drop newest
+
+_STOP = object()
+
+
+class ClipboardBackend:
+    """ממשק גישה ללוח — מימוש Win32 ב-clipboard_handler, ומימוש בזיכרון לבדיקות."""
+
+    def snapshot(self):
+        """קריאת הנתונים הגולמיים. מחזיר ClipboardSnapshot או None."""
+        raise NotImplementedError
+
+    def foreground_app(self):
+        """החזרת (שם_תהליך, כותרת_חלון) של האפליקציה בחזית."""
+        raise NotImplementedError
+
+
+class FakeClipboardBackend(ClipboardBackend):
+    """לוח בזיכרון — מאפשר להריץ ולמדוד את הצינור גם ב-Linux."""
+
+    def __init__(self, source_app=None, source_window=None):
+        self._lock = threading.Lock()
+        self._formats = {}
+        self.source_app = source_app
+        self.source_window = source_window
+        self.snapshot_count = 0
+
+    def set_formats(self, formats):
+        with self._lock:
+            self._formats = dict(formats)
+
+    def snapshot(self):
+        with self._lock:
+            self.snapshot_count += 1
+            if not self._formats:
+                return None
+            return ClipboardSnapshot(formats=dict(self._formats))
+
+    def foreground_app(self):
+        return self.source_app, self.source_window
+
+
+class CapturePipeline:
+    """מחבר בין שלב ה-snapshot לשלב העיבוד דרך תור חסום."""
+
+    def __init__(self, backend, on_new_entry, blacklist=None, queue_size=32,
+                 workers=1, overflow=OVERFLOW_DROP_OLDEST, block_timeout=0.5,
+                 coalesce_ms=50, coalesce_max_ms=500, ingest_policy=DEFAULT_INGEST_POLICY,
+                 tracer=None):
+        self._backend = backend
+        self._on_new_entry = on_new_entry
+        self._ingest_policy = ingest_policy
+        # Capture-path traces start at WM_CLIPBOARDUPDATE and ride the snapshot/entry
+        self._tracer = tracer
+        self._blacklist = set(app.lower() for app in (blacklist or []))
+        # A single worker keeps history in capture order
+        self._worker_count = max(1, workers)
+        self._overflow = overflow
+        self._block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._workers = []
+
+        # Coalescing: updates within coalesce_ms of each other fold into one
+        # capture; coalesce_max_ms caps the delay under a continuous burst.
+        self._coalesce_window = max(0, coalesce_ms) / 1000.0
+        self._coalesce_max = max(coalesce_ms, coalesce_max_ms) / 1000.0
+        self._coalesce_cond = threading.Condition()
+        self._burst_started = None
+        self._last_update = None
+        self._last_update_at = None   # perf_counter() of the last update, for tracing
+        self._coalescer = None
+        self._running = False
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "updates": 0,
+            "captures": 0,
+            "snapshots": 0,
+            "blacklisted": 0,
+            "dropped": 0,
+            "processed": 0,
+            "failed": 0,
+        }
+
+    def start(self):
+        self._running = True
+        if self._coalesce_window:
+            self._coalescer = threading.Thread(
+                target=self._coalesce_loop, daemon=True, name="CaptureCoalescer"
+            )
+            self._coalescer.start()
+        for i in range(self._worker_count):
+            worker = threading.Thread(
+                target=self._worker_loop, daemon=True, name=f"CaptureWorker-{i}"
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self, timeout=2.0):
+        with self._coalesce_cond:
+            self._running = False
+            self._coalesce_cond.notify()
+        if self._coalescer:
+            self._coalescer.join(timeout)
+            self._coalescer = None
+        for _ in self._workers:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers.clear()
+
+    def update_blacklist(self, apps):
+        self._blacklist = set(app.lower() for app in apps)
+
+    def stats(self):
+        with self._stats_lock:
+            result = dict(self._stats)
+        result["queued"] = self._queue.qsize()
+        result["coalesced"] = result["updates"] - result["captures"]
+        return result
+
+    # --- Stage 1: coalescing + snapshot ---
+
+    def on_clipboard_update(self):
+        """נקרא על כל WM_CLIPBOARDUPDATE (thread של ה-message pump)."""
+        self._count("updates")
+        if not self._coalesce_window:
+            self._capture(time.perf_counter())
+            return
+        now = time.monotonic()
+        with self._coalesce_cond:
+            if self._burst_started is None:
+                self._burst_started = now
+            self._last_update = now
+            self._last_update_at = time.perf_counter()
+            self._coalesce_cond.notify()
+
+    def _coalesce_loop(self):
+        """ממתין לשקט של coalesce_ms אחרי העדכון האחרון, ואז קורא את המצב הסופי."""
+        with self._coalesce_cond:
+            while self._running:
+                if self._burst_started is None:
+                    self._coalesce_cond.wait()
+                    continue
+                deadline = min(
+                    self._last_update + self._coalesce_window,
+                    self._burst_started + self._coalesce_max,
+                )
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._coalesce_cond.wait(remaining)
+                    continue
+                self._burst_started = None
+                update_at = self._last_update_at
+                self._coalesce_cond.release()
+                try:
+                    self._capture(update_at)
+                finally:
+                    self._coalesce_cond.acquire()
+
+    def _capture(self, update_at=None):
+        """קריאת הנתונים הגולמיים מהלוח והכנסה לתור העיבוד."""
+        self._count("captures")
+        trace = self._tracer.begin(PATH_CAPTURE, update_at) if self._tracer else None
+        if trace:
+            trace.mark("coalesce")
+        source_app, source_window = self._backend.foreground_app()
+        if trace:
+            trace.mark("source")
+
+        # Blacklist check
+        if source_app and source_app.lower() in self._blacklist:
+            self._count("blacklisted")
+            return
+
+        snapshot = self._backend.snapshot()
+        if snapshot is None:
+            return
+        if trace:
+            trace.mark("snapshot")
+
+        snapshot.source_app = source_app
+        snapshot.source_window = source_window
+        snapshot.trace = trace
+        self._count("snapshots")
+        self._enqueue(snapshot)
+
+    def _enqueue(self, snapshot):
+        if self._overflow == OVERFLOW_BLOCK:
+            try:
+                self._queue.put(snapshot, timeout=self._block_timeout)
+            except queue.Full:
+                self._count("dropped")
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(snapshot)
+                return
+            except queue.Full:
+                if self._overflow == OVERFLOW_DROP_NEWEST:
+                    self._count("dropped")
+                    return
+            # Drop oldest: make room and retry
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+
+    # --- Stage 2: processing (worker threads) ---
+
+    def _worker_loop(self):
+        while True:
+            snapshot = self._queue.get()
+            try:
+                if snapshot is _STOP:
+                    return
+                self._process(snapshot)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, snapshot):
+        trace = snapshot.trace
+        if trace:
+            trace.mark("queue")
+        try:
+            entry = entry_from_snapshot(snapshot, self._ingest_policy)
+            if entry is None:
+                return
+            if trace:
+                trace.mark("classify")  # hash + preview + subtype
+                entry._trace = trace
+            self._on_new_entry(entry)
+            self._count("processed")
+        except Exception:
+            self._count("failed")
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
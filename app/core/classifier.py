@@ -0,0 +1,161 @@
+"""
+סיווג תוכן טקסטואלי לתת-סוג (URL, אימייל, צבע, JSON...) במעבר regex אחד.
+כל הכללים מאוחדים לביטוי אחד מעוגן לתחילת הטקסט, ורץ רק על תחילתו (head);
+טקסט ארוך מה-head לא יכול להתאים לכללי "כל הטקסט" (URL, JSON...).
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+
+from app.constants import ContentSubtype
+
+# Only the head of the text is classified
+HEAD_CHARS = 4096
+
+
+@dataclass
+class ClassifierRule:
+    """
+    subtype — הערך שנשמר ב-content_subtype.
+    pattern — ללא קבוצות עם שם (הן משמשות לזיהוי הכלל שהתאים).
+    whole=True — כל הטקסט (ללא רווחים בקצוות) חייב להתאים; אחרת — רק תחילתו.
+    """
+    subtype: str
+    pattern: str
+    whole: bool = True
+
+
+# In priority order — the first alternative that matches wins
+DEFAULT_RULES = [
+    ClassifierRule(ContentSubtype.URL, r"(?i:(?:https?|ftp)://\S+|www\.\S+)"),
+    ClassifierRule(
+        ContentSubtype.EMAIL,
+        r"(?i:(?:mailto:)?[\w.+-]{1,64}@[\w-]{1,63}(?:\.[\w-]{1,63}){1,8})",
+    ),
+    ClassifierRule(
+        ContentSubtype.COLOR,
+        r"#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})"
+        r"|(?i:(?:rgb|hsl)a?)\(\s*[\d.]{1,5}%?\s*(?:,\s*[\d.]{1,5}%?\s*){2,3}\)",
+    ),
+    # Before NUMBER, so 0541234567 is a phone; ISO dates and thousands
+    # groupings (100 200 300, 10.000.000) are not
+    ClassifierRule(
+        ContentSubtype.PHONE,
+        r"(?!\d{4}-\d{2}-\d{2}\b)"
+        r"(?!\d{1,3}(?:(?: \d{3})+|(?:\.\d{3})+|(?:,\d{3})+)\s*\Z)"
+        r"(?:\+\d[\d \t().-]{5,18}\d"                      # +972 3 555 1234
+        r"|0\d[\d \t().-]{5,16}\d"                         # 054-1234567
+        r"|\(?\d{2,4}\)?[ \t.-]\d{3,4}[ \t.-]?\d{3,4})",   # (03) 555-1234
+    ),
+    ClassifierRule(
+        ContentSubtype.NUMBER,
+        r"[-+]?(?:\d{1,3}(?:,\d{3}){1,10}|\d{1,64})(?:\.\d{1,64})?(?:[eE][-+]?\d{1,4})?",
+    ),
+    ClassifierRule(
+        ContentSubtype.FILE_PATH,
+        r"(?:[A-Za-z]:[\\/]|\\\\[^\\/\s]|~?/[^/\s])[^\r\n<>\"|?*]{0,1024}",
+    ),
+    # The whole text, bracket to bracket; an object needs a "key": and an array a
+    # JSON value as its first element — "[1] see note" is not JSON
+    ClassifierRule(
+        ContentSubtype.JSON,
+        r"\{\s*(?:\}|\"(?:[^\"\\\n]|\\.)*\"\s*:[\s\S]*\})"
+        r"|\[\s*(?:\]|(?=(?:\"(?:[^\"\\\n]|\\.)*\"|-?\d[\d.eE+-]*|true|false|null)\s*[,\]]"
+        r"|[\[{])[\s\S]*\])",
+    ),
+    # Code structure, not just a keyword — "Create a new branch" is prose
+    ClassifierRule(
+        ContentSubtype.CODE,
+        r"(?:def\s+\w+\s*\(|class\s+\w+\s*(?:[:({<]|extends\b|implements\b)"
+        r"|import\s+(?:[\w.]+(?:\s+as\s+\w+)?\s*(?:[;,]|$)|[{*]|\w+\s+from\s+[\"'])"
+        r"|from\s+[\w.]+\s+import\s"
+        r"|function\s*\w*\s*\(|(?:const|let|var)\s+\w+\s*="
+        r"|(?:public|private|protected)\s+(?:(?:static|final|abstract)\s+)*[\w<>\[\]]+\s+\w+\s*[({=;]"
+        r"|package\s+[\w.]+;|using\s+[\w.]+;|namespace\s+[\w.]+\s*\{"
+        r"|fn\s+\w+\s*[(<]|func\s+(?:\(\w+\s+\*?\w+\)\s*)?\w+\s*\(|(?:struct|interface)\s+\w+\s*\{"
+        r"|#include\s*[<\"]|#define\s+\w+|<\?php|#!/"
+        r"|@\w+(?:\.\w+)*(?:\(.*\))?\s*\n\s*(?:def|class|async|public|private|protected|@)"
+        # SQL only with statement structure — "Select all from the menu" is prose:
+        # a clause on its own line, or then a ";", a clause keyword opening the
+        # next line, or a line ending in "(" / ","
+        r"|(?i:select\s+(?:distinct\s+)?(?:\*|[\w.]+(?:\s*,\s*[\w.]+)*)[ \t]*\n\s*from\s+[\w.\"`\[]"
+        r"|update\s+[\w.\"`\[\]]+[ \t]*\n\s*set\s+\w"
+        r"|(?:select\s+(?:distinct\s+)?(?:\*|[\w.]+(?:\s*,\s*[\w.]+)*)\s+from\s+[\w.\"`\[]"
+        r"|insert\s+into\s+[\w.\"`\[]|update\s+[\w.\"`\[\]]+\s+set\s+\w"
+        r"|delete\s+from\s+[\w.\"`\[]"
+        r"|create\s+(?:temp(?:orary)?\s+|unique\s+|or\s+replace\s+)*"
+        r"(?:table|index|view|trigger|function|procedure|database|schema)\b)"
+        r"(?=[^\n;]*;|[^\n]*[(,][ \t]*$|[^\n]*\n\s*(?:(?:from|where|join|inner|left|right"
+        r"|cross|set|values|order|group|limit|having|union|returning|and|or|on)\b|[()]))))",
+        whole=False,
+    ),
+]
+
+
+class Classifier:
+    """
+    מנוע סיווג ניתן להרחבה: register() מוסיף כלל והביטוי המאוחד נבנה מחדש.
+    classify() מריץ match אחד של הביטוי המאוחד על תחילת הטקסט.
+    """
+
+    def __init__(self, rules=None, head_chars=HEAD_CHARS):
+        self._rules = list(DEFAULT_RULES if rules is None else rules)
+        self._head_chars = head_chars
+        self._lock = threading.Lock()
+        self._compile()
+
+    @property
+    def subtypes(self):
+        return [rule.subtype for rule in self._rules]
+
+    def register(self, rule, before=None):
+        """הוספת כלל — בסוף, או לפני תת-הסוג before (עדיפות גבוהה יותר)."""
+        with self._lock:
+            index = len(self._rules)
+            if before is not None:
+                index = next(
+                    (i for i, r in enumerate(self._rules) if r.subtype == before), index
+                )
+            self._rules.insert(index, rule)
+            self._compile()
+
+    def _compile(self):
+        alternatives = []
+        group_rules = {}
+        for i, rule in enumerate(self._rules):
+            group = f"r{i}"
+            group_rules[group] = rule
+            tail = r"\s*\Z" if rule.whole else ""
+            alternatives.append(f"(?P<{group}>{rule.pattern}){tail}")
+        pattern = re.compile(r"\s*(?:" + "|".join(alternatives) + ")", re.MULTILINE)
+        # For texts cut at the head: \Z would match at the cut, so whole-text
+        # rules are left out
+        prefix_pattern = re.compile(r"\s*(?:" + "|".join(
+            alternative for alternative, rule in zip(alternatives, self._rules)
+            if not rule.whole
+        ) + ")", re.MULTILINE)
+        # Swapped in one assignment — classify() may run on another thread
+        self._compiled = (pattern, prefix_pattern, group_rules)
+
+    def classify(self, text):
+        """תת-הסוג של הטקסט, או None אם אף כלל לא התאים."""
+        if not text:
+            return None
+        pattern, prefix_pattern, group_rules = self._compiled
+        if len(text) > self._head_chars:
+            # Only the head is looked at, whatever the payload size
+            pattern = prefix_pattern
+        match = pattern.match(text, 0, self._head_chars)
+        return group_rules[match.lastgroup].subtype if match else None
+
+
+_default_classifier = Classifier()
+
+
+def get_default_classifier():
+    return _default_classifier
+
+
+def classify(text):
+    return _default_classifier.classify(text)
@@ -1,21 +1,55 @@
 """קריאה וכתיבה מהלוח — תמיכה בטקסט, HTML, תמונות, וקבצים."""
 
-import io
-import struct
 import ctypes
-import ctypes.wintypes
+import io
+import time
 
 import win32clipboard
 import win32con
 
 from app.constants import ContentType
-from app.db.repository import ClipboardEntry
-from app.utils.text_utils import compute_hash, truncate, strip_html, is_url
+from app.core.capture_pipeline import ClipboardBackend
+from app.core.clipboard_snapshot import (
+    ClipboardSnapshot, entry_from_snapshot,
+    FORMAT_FILES, FORMAT_HTML, FORMAT_TEXT, FORMAT_DIB, FORMAT_RAW,
+)
+from app.core.source_detector import get_foreground_app
 
 
 # Register HTML clipboard format
 CF_HTML = None
 
+# Standard formats kept as raw blobs. CF_UNICODETEXT is stored as the entry's
+# text; CF_TEXT/CF_OEMTEXT/CF_DIBV5/CF_LOCALE are synthesized by Windows, and
+# GDI handle formats (CF_BITMAP, metafiles, palettes) are not memory blocks.
+STANDARD_RAW_FORMATS = {
+    "CF_HDROP": win32con.CF_HDROP,
+    "CF_DIB": win32con.CF_DIB,
+    "CF_TIFF": win32con.CF_TIFF,
+    "CF_RIFF": win32con.CF_RIFF,
+    "CF_WAVE": win32con.CF_WAVE,
+    "CF_SYLK": win32con.CF_SYLK,
+    "CF_DIF": win32con.CF_DIF,
+}
+_STANDARD_NAMES = {fmt: name for name, fmt in STANDARD_RAW_FORMATS.items()}
+
+# Registered OLE formats that only make sense while the source app holds them
+SKIPPED_REGISTERED_FORMATS = {
+    "DataObject", "Ole Private Data", "Object Descriptor", "Link Source Descriptor",
+    "Embed Source", "Link Source", "OwnerLink", "ObjectLink", "Native",
+}
+
+_kernel32 = None
+
+
+def _global_size(handle):
+    global _kernel32
+    if _kernel32 is None:
+        _kernel32 = ctypes.windll.kernel32
+        _kernel32.GlobalSize.argtypes = [ctypes.c_void_p]
+        _kernel32.GlobalSize.restype = ctypes.c_size_t
+    return _kernel32.GlobalSize(handle)
+
 
 def _ensure_cf_html():
     global CF_HTML
@@ -28,32 +62,64 @@ def read_clipboard():
     קריאת תוכן הלוח הנוכחי.
     מחזיר ClipboardEntry או None אם הלוח ריק/לא נתמך.
     """
-    _ensure_cf_html()
-    try:
-        win32clipboard.OpenClipboard()
-    except Exception:
+    snapshot = snapshot_clipboard()
+    if snapshot is None:
         return None
+    return entry_from_snapshot(snapshot)
+
+
+def snapshot_clipboard(open_attempts=5, retry_delay=0.01, raw_formats=True,
+                       max_format_bytes=4 * 1024 * 1024):
+    """
+    קריאת הנתונים הגולמיים מהלוח בלבד — ללא hash, פענוח או שמירה.
+    raw_formats — גם כל שאר הפורמטים כבתים (עד max_format_bytes לפורמט).
+    מחזיר ClipboardSnapshot או None אם הלוח ריק/תפוס.
+    """
+    _ensure_cf_html()
+    # The owner may still hold the clipboard open — retry briefly
+    # instead of a fixed sleep before every read.
+    for attempt in range(open_attempts):
+        try:
+            win32clipboard.OpenClipboard()
+            break
+        except Exception:
+            if attempt == open_attempts - 1:
+                return None
+            time.sleep(retry_delay)
 
     try:
-        entry = None
+        formats = {}
 
-        # Priority 1: File paths (CF_HDROP)
+        # Same priority as entry_from_snapshot — read only what will be used
         if win32clipboard.IsClipboardFormatAvailable(win32con.CF_HDROP):
-            entry = _read_file_drop()
+            files = win32clipboard.GetClipboardData(win32con.CF_HDROP)
+            if files:
+                formats[FORMAT_FILES] = tuple(files)
+
+        if not formats and CF_HTML and win32clipboard.IsClipboardFormatAvailable(CF_HTML):
+            formats[FORMAT_HTML] = win32clipboard.GetClipboardData(CF_HTML)
 
-        # Priority 2: HTML
-        if entry is None and CF_HTML and win32clipboard.IsClipboardFormatAvailable(CF_HTML):
-            entry = _read_html()
+        # Plain text — on its own, or as the text part of an HTML copy
+        if FORMAT_FILES not in formats and \
+                win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
+            try:
+                formats[FORMAT_TEXT] = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+            except Exception:
+                pass
 
-        # Priority 3: Unicode text
-        if entry is None and win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
-            entry = _read_text()
+        # Image only when there is nothing textual to capture
+        text = formats.get(FORMAT_TEXT)
+        textual = FORMAT_FILES in formats or FORMAT_HTML in formats or \
+            (text and not text.isspace())
+        if not textual and win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB):
+            formats[FORMAT_DIB] = win32clipboard.GetClipboardData(win32con.CF_DIB)
 
-        # Priority 4: Image (CF_DIB)
-        if entry is None and win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB):
-            entry = _read_image()
+        if formats and raw_formats:
+            raw = _read_raw_formats(max_format_bytes, formats)
+            if raw:
+                formats[FORMAT_RAW] = raw
 
-        return entry
+        return ClipboardSnapshot(formats=formats) if formats else None
 
     except Exception:
         return None
@@ -64,119 +130,67 @@ def read_clipboard():
             pass
 
 
-def _read_text():
-    """קריאת טקסט רגיל מהלוח."""
-    try:
-        text = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
-        if not text or not text.strip():
-            return None
-        content_type = ContentType.URL if is_url(text) else ContentType.TEXT
-        return ClipboardEntry(
-            content_type=content_type,
-            content_text=text,
-            content_preview=truncate(text),
-            content_hash=compute_hash(text),
-            content_size=len(text.encode("utf-8")),
-        )
-    except Exception:
-        return None
-
-
-def _read_html():
-    """קריאת HTML מהלוח (כולל חילוץ טקסט רגיל)."""
-    try:
-        raw = win32clipboard.GetClipboardData(CF_HTML)
-        if isinstance(raw, bytes):
-            html_text = raw.decode("utf-8", errors="replace")
-        else:
-            html_text = raw
-
-        if not html_text:
-            return None
-
-        # Extract the HTML fragment from the CF_HTML envelope
-        fragment = _extract_html_fragment(html_text)
-        plain_text = strip_html(fragment) if fragment else strip_html(html_text)
-
-        # Also grab plain text if available
-        if win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
+def _read_raw_formats(max_format_bytes, formats):
+    """כל הפורמטים הנתמכים שעל הלוח כ-[(שם, בתים)], בסדר שבו הבעלים הציב אותם."""
+    raw = []
+    fmt = win32clipboard.EnumClipboardFormats(0)
+    while fmt:
+        name = _raw_format_name(fmt)
+        if name:
             try:
-                plain_text = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+                if fmt == win32con.CF_DIB and FORMAT_DIB in formats:
+                    data = formats[FORMAT_DIB]  # already read for the image entry
+                else:
+                    handle = win32clipboard.GetClipboardDataHandle(fmt)
+                    data = None
+                    if handle and _global_size(handle) <= max_format_bytes:
+                        data = win32clipboard.GetGlobalMemory(handle)
+                if data and len(data) <= max_format_bytes:
+                    raw.append((name, data))
             except Exception:
-                pass
-
-        return ClipboardEntry(
-            content_type=ContentType.HTML,
-            content_text=plain_text,
-            content_html=fragment or html_text,
-            content_preview=truncate(plain_text),
-            content_hash=compute_hash(html_text),
-            content_size=len(html_text.encode("utf-8")),
-        )
-    except Exception:
-        return None
+                pass  # delayed rendering failed / not an HGLOBAL format
+        fmt = win32clipboard.EnumClipboardFormats(fmt)
+    return raw
 
 
-def _extract_html_fragment(cf_html_data):
-    """חילוץ הפרגמנט מפורמט CF_HTML."""
+def _raw_format_name(fmt):
+    if fmt in _STANDARD_NAMES:
+        return _STANDARD_NAMES[fmt]
+    if fmt < 0xC000:
+        return None  # other standard / private / GDI formats
     try:
-        start_idx = cf_html_data.find("StartFragment:")
-        end_idx = cf_html_data.find("EndFragment:")
-        if start_idx == -1 or end_idx == -1:
-            return None
-        start_pos = int(cf_html_data[start_idx + 14:cf_html_data.index("\r", start_idx)])
-        end_pos = int(cf_html_data[end_idx + 12:cf_html_data.index("\r", end_idx)])
-        # CF_HTML uses byte offsets on the raw bytes
-        raw_bytes = cf_html_data.encode("utf-8") if isinstance(cf_html_data, str) else cf_html_data
-        return raw_bytes[start_pos:end_pos].decode("utf-8", errors="replace")
+        name = win32clipboard.GetClipboardFormatName(fmt)
     except Exception:
         return None
+    return None if name in SKIPPED_REGISTERED_FORMATS else name
 
 
-def _read_file_drop():
-    """קריאת רשימת קבצים מהלוח (CF_HDROP)."""
-    try:
-        file_list = win32clipboard.GetClipboardData(win32con.CF_HDROP)
-        if not file_list:
-            return None
-        paths = "\n".join(file_list)
-        return ClipboardEntry(
-            content_type=ContentType.FILE_PATH,
-            content_text=paths,
-            content_preview=truncate(paths),
-            content_hash=compute_hash(paths),
-            content_size=len(paths.encode("utf-8")),
-        )
-    except Exception:
-        return None
+def _format_id(name):
+    if name in STANDARD_RAW_FORMATS:
+        return STANDARD_RAW_FORMATS[name]
+    return win32clipboard.RegisterClipboardFormat(name)
 
 
-def _read_image():
-    """קריאת תמונה מהלוח (CF_DIB) באמצעות Pillow."""
-    try:
-        from PIL import ImageGrab
-        image = ImageGrab.grabclipboard()
-        if image is None:
-            return None
-        # Compute hash from image bytes
-        img_bytes = image.tobytes()
-        entry = ClipboardEntry(
-            content_type=ContentType.IMAGE,
-            content_preview="[תמונה]",
-            image_width=image.width,
-            image_height=image.height,
-            content_hash=compute_hash(img_bytes),
-            content_size=len(img_bytes),
+class Win32ClipboardBackend(ClipboardBackend):
+    """גישה ללוח של Windows עבור CapturePipeline."""
+
+    def __init__(self, raw_formats=True, max_format_bytes=4 * 1024 * 1024):
+        self._raw_formats = raw_formats
+        self._max_format_bytes = max_format_bytes
+
+    def snapshot(self):
+        return snapshot_clipboard(
+            raw_formats=self._raw_formats, max_format_bytes=self._max_format_bytes
         )
-        entry._pil_image = image
-        return entry
-    except Exception:
-        return None
 
+    def foreground_app(self):
+        return get_foreground_app()
 
-def push_to_clipboard(entry):
+
+def push_to_clipboard(entry, formats=None):
     """
     דחיפת רשומה בחזרה ללוח המערכת.
+    formats — הפורמטים שנשמרו בקליטה [(שם, בתים)]; מוצבים כמו שהם, בלי קידוד מחדש.
     מחזיר True אם הצליח.
     """
     _ensure_cf_html()
@@ -184,13 +198,22 @@ def push_to_clipboard(entry):
         win32clipboard.OpenClipboard()
         win32clipboard.EmptyClipboard()
 
+        # Direct byte copy of every captured format, in the original order
+        placed = set()
+        for name, data in formats or ():
+            try:
+                win32clipboard.SetClipboardData(_format_id(name), data)
+                placed.add(name)
+            except Exception:
+                pass
+
         if entry.content_type in (ContentType.TEXT, ContentType.URL, ContentType.FILE_PATH):
             win32clipboard.SetClipboardData(
                 win32con.CF_UNICODETEXT, entry.content_text
             )
 
         elif entry.content_type == ContentType.HTML:
-            if entry.content_html:
+            if entry.content_html and "HTML Format" not in placed:
                 cf_html_data = _build_cf_html(entry.content_html)
                 win32clipboard.SetClipboardData(CF_HTML, cf_html_data.encode("utf-8"))
             if entry.content_text:
@@ -199,7 +222,7 @@ def push_to_clipboard(entry):
                 )
 
         elif entry.content_type == ContentType.IMAGE:
-            if entry.image_path:
+            if entry.image_path and "CF_DIB" not in placed:
                 _push_image_to_clipboard(entry.image_path)
 
         win32clipboard.CloseClipboard()
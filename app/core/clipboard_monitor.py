@@ -3,13 +3,10 @@
 import ctypes
 import ctypes.wintypes
 import threading
-import time
 
 import win32con
 import win32gui
 
-from app.core.clipboard_handler import read_clipboard
-from app.core.source_detector import get_foreground_app
 from app.constants import WINDOW_CLASS_NAME
 
 WM_CLIPBOARDUPDATE = 0x031D
@@ -18,11 +15,8 @@ HOTKEY_ID_SHOW = 1
 
 
 class ClipboardMonitor:
-    def __init__(self, on_new_entry, blacklist=None):
-        self._on_new_entry = on_new_entry
-        self._blacklist = set(
-            app.lower() for app in (blacklist or [])
-        )
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
         self._thread = None
         self._hwnd = None
         self._paused = False
@@ -34,6 +28,7 @@ class ClipboardMonitor:
         self._hwnd_ready = threading.Event()
 
     def start(self):
+        self._pipeline.start()
         self._thread = threading.Thread(target=self._run, daemon=True, name="ClipboardMonitor")
         self._thread.start()
         # Wait until HWND is created
@@ -50,6 +45,7 @@ class ClipboardMonitor:
                 win32gui.PostMessage(self._hwnd, win32con.WM_QUIT, 0, 0)
             except Exception:
                 pass
+        self._pipeline.stop()
 
     def pause(self):
         self._paused = True
@@ -65,7 +61,7 @@ class ClipboardMonitor:
         self._suppress_next = True
 
     def update_blacklist(self, apps):
-        self._blacklist = set(app.lower() for app in apps)
+        self._pipeline.update_blacklist(apps)
 
     def set_hotkey_callback(self, callback):
         self._hotkey_callback = callback
@@ -152,7 +148,8 @@ class ClipboardMonitor:
                 self._suppress_next = False
                 return 0
             if not self._paused:
-                self._handle_clipboard_change()
+                # Snapshot only — processing happens on the pipeline workers
+                self._pipeline.on_clipboard_update()
             return 0
 
         if msg == WM_REGISTER_HOTKEY:
@@ -163,28 +160,3 @@ class ClipboardMonitor:
             return 0
 
         return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
-
-    def _handle_clipboard_change(self):
-        # Small delay to ensure clipboard data is fully available
-        time.sleep(0.05)
-
-        # Detect source app
-        source_app, source_window = get_foreground_app()
-
-        # Blacklist check
-        if source_app and source_app.lower() in self._blacklist:
-            return
-
-        # Read clipboard
-        entry = read_clipboard()
-        if entry is None:
-            return
-
-        entry.source_app = source_app
-        entry.source_window = source_window
-
-        # Notify callback
-        try:
-            self._on_new_entry(entry)
-        except Exception:
-            pass
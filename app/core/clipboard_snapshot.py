@@ -0,0 +1,208 @@
+"""תמונת מצב גולמית של הלוח והמרתה ל-ClipboardEntry — ללא תלות ב-Win32."""
+
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.constants import ContentType, ContentSubtype, STRINGS
+from app.core.classifier import classify
+from app.db.repository import ClipboardEntry
+from app.utils.text_utils import compute_hash, hash_text, truncate, strip_html
+
+# Raw format keys inside ClipboardSnapshot.formats
+FORMAT_FILES = "files"  # tuple of paths (CF_HDROP)
+FORMAT_HTML = "html"    # raw CF_HTML envelope (bytes or str)
+FORMAT_TEXT = "text"    # str (CF_UNICODETEXT)
+FORMAT_DIB = "dib"      # bytes (CF_DIB)
+FORMAT_RAW = "raw"      # [(format_name, bytes)] — every format, for direct paste-back
+
+# What to do with a text payload (IngestPolicy)
+INGEST_STORE = "store"        # whole text in the DB
+INGEST_EXTERNAL = "external"  # head in the DB, whole text compressed in data/blobs
+INGEST_SKIP = "skip"          # not captured
+
+
+@dataclass
+class IngestPolicy:
+    """
+    ספי גודל לקליטת טקסט. עד inline_max_bytes — נשמר ב-DB כרגיל;
+    מעל max_bytes — לא נקלט כלל; ביניהם — לפי large_action.
+    """
+    inline_max_bytes: int = 1024 * 1024
+    max_bytes: int = 64 * 1024 * 1024
+    large_action: str = INGEST_EXTERNAL
+    head_chars: int = 64 * 1024  # text kept in the DB (search + tooltip) when external
+
+    def action_for(self, size):
+        if size <= self.inline_max_bytes:
+            return INGEST_STORE
+        if size > self.max_bytes:
+            return INGEST_SKIP
+        return self.large_action
+
+
+DEFAULT_INGEST_POLICY = IngestPolicy()
+
+
+@dataclass
+class ClipboardSnapshot:
+    """הנתונים הגולמיים שנקראו מהלוח, לפני כל עיבוד."""
+    formats: dict = field(default_factory=dict)
+    source_app: Optional[str] = None
+    source_window: Optional[str] = None
+    taken_at: float = field(default_factory=time.monotonic)
+    trace: object = None  # tracing.Trace of the capture path, if tracing is on
+
+
+def entry_from_snapshot(snapshot, policy=DEFAULT_INGEST_POLICY):
+    """
+    המרת snapshot לרשומה — לפי סדר העדיפויות של הלוח.
+    מחזיר ClipboardEntry או None אם אין תוכן נתמך.
+    """
+    formats = snapshot.formats
+    entry = None
+
+    # Priority 1: File paths
+    if FORMAT_FILES in formats:
+        entry = _entry_from_files(formats[FORMAT_FILES])
+
+    # Priority 2: HTML
+    if entry is None and FORMAT_HTML in formats:
+        entry = _entry_from_html(formats[FORMAT_HTML], formats.get(FORMAT_TEXT), policy)
+
+    # Priority 3: Unicode text (also the fallback for an oversized HTML copy)
+    if entry is None and FORMAT_TEXT in formats:
+        entry = _entry_from_text(formats[FORMAT_TEXT], policy)
+
+    # Priority 4: Image
+    if entry is None and FORMAT_DIB in formats:
+        entry = _entry_from_dib(formats[FORMAT_DIB])
+
+    if entry is not None:
+        entry.source_app = snapshot.source_app
+        entry.source_window = snapshot.source_window
+        entry._formats = formats.get(FORMAT_RAW)
+    return entry
+
+
+def _entry_from_text(text, policy=DEFAULT_INGEST_POLICY):
+    try:
+        if not text or text.isspace():
+            return None
+        # Every character is at least one UTF-8 byte — reject without hashing
+        if len(text) > policy.max_bytes:
+            return None
+        content_hash, size = hash_text(text)
+        action = policy.action_for(size)
+        if action == INGEST_SKIP:
+            return None
+
+        stored = text[:policy.head_chars] if action == INGEST_EXTERNAL else text
+        subtype = classify(text)
+        content_type = ContentType.URL if subtype == ContentSubtype.URL else ContentType.TEXT
+        entry = ClipboardEntry(
+            content_type=content_type,
+            content_subtype=subtype,
+            content_text=stored,
+            content_preview=truncate(text),
+            content_hash=content_hash,
+            content_size=size,
+        )
+        if action == INGEST_EXTERNAL:
+            entry._blob_text = text  # written to BlobStorage by the consumer
+        return entry
+    except Exception:
+        return None
+
+
+def _entry_from_html(raw, plain_text=None, policy=DEFAULT_INGEST_POLICY):
+    try:
+        # Oversized rich text is captured as plain text (priority 3) instead
+        if len(raw) > policy.inline_max_bytes:
+            return None
+
+        if isinstance(raw, bytes):
+            html_text = raw.decode("utf-8", errors="replace")
+        else:
+            html_text = raw
+
+        if not html_text:
+            return None
+
+        # Extract the HTML fragment from the CF_HTML envelope
+        content_hash, size = hash_text(html_text)
+        fragment = extract_html_fragment(html_text)
+        if not plain_text:
+            plain_text = strip_html(fragment) if fragment else strip_html(html_text)
+
+        return ClipboardEntry(
+            content_type=ContentType.HTML,
+            content_subtype=classify(plain_text),
+            content_text=plain_text,
+            content_html=fragment or html_text,
+            content_preview=truncate(plain_text),
+            content_hash=content_hash,
+            content_size=size,
+        )
+    except Exception:
+        return None
+
+
+def extract_html_fragment(cf_html_data):
+    """חילוץ הפרגמנט מפורמט CF_HTML."""
+    try:
+        start_idx = cf_html_data.find("StartFragment:")
+        end_idx = cf_html_data.find("EndFragment:")
+        if start_idx == -1 or end_idx == -1:
+            return None
+        start_pos = int(cf_html_data[start_idx + 14:cf_html_data.index("\r", start_idx)])
+        end_pos = int(cf_html_data[end_idx + 12:cf_html_data.index("\r", end_idx)])
+        # CF_HTML uses byte offsets on the raw bytes
+        raw_bytes = cf_html_data.encode("utf-8") if isinstance(cf_html_data, str) else cf_html_data
+        return raw_bytes[start_pos:end_pos].decode("utf-8", errors="replace")
+    except Exception:
+        return None
+
+
+def _entry_from_files(file_list):
+    try:
+        if not file_list:
+            return None
+        paths = "\n".join(file_list)
+        content_hash, size = hash_text(paths)
+        return ClipboardEntry(
+            content_type=ContentType.FILE_PATH,
+            content_text=paths,
+            content_preview=truncate(paths),
+            content_hash=content_hash,
+            content_size=size,
+        )
+    except Exception:
+        return None
+
+
+def _entry_from_dib(dib_bytes):
+    """
+    רשומת תמונה ישירות מבתי ה-CF_DIB — ללא פענוח וללא העתקה.
+    ה-hash מחושב פעם אחת ומשמש גם לשם הקובץ באחסון.
+    """
+    try:
+        view = memoryview(dib_bytes)
+        # BITMAPINFOHEADER: biSize, biWidth, biHeight (negative = top-down)
+        header_size, width, height = struct.unpack_from("<Iii", view, 0)
+        if header_size < 40 or width <= 0 or height == 0:
+            return None
+        entry = ClipboardEntry(
+            content_type=ContentType.IMAGE,
+            content_preview=STRINGS["image_preview"],
+            image_width=width,
+            image_height=abs(height),
+            content_hash=compute_hash(view),
+            content_size=len(view),
+        )
+        # Decoding happens only in the encoder process
+        entry._image_data = dib_bytes
+        return entry
+    except Exception:
+        return None
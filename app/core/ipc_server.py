@@ -0,0 +1,411 @@
+"""
+שרת IPC מקומי (אופציונלי, ipc.enabled) — כלים חיצוניים שואלים את האפליקציה הרצה
+במקום לפתוח את clipboard.db בעצמם. הפרוטוקול: שורת JSON לבקשה (או מערך בקשות
+= batch), ושורת JSON לתשובה. התעבורה מאחורי IpcTransport — Unix socket, או
+named pipe ב-Windows (app/core/named_pipe.py).
+
+    {"req": 1, "op": "search", "query": "foo", "subtype": "url", "limit": 20}
+    [{"op": "recent", "limit": 5}, {"op": "get", "id": 42, "full": true}]
+    {"op": "paste", "id": 42}
+
+התשובה: {"req": <כמו בבקשה>, "ok": true, "result": ...} או {"ok": false, "error": ...}.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from app.db.repository import entry_to_dict
+
+# Longest request line accepted (bytes) and most requests in one batch
+MAX_LINE_BYTES = 1 << 20
+MAX_BATCH = 64
+# Cap on limit= for search/recent; lower with full=true (whole texts per row)
+MAX_LIMIT = 500
+MAX_FULL_LIMIT = 50
+# Longest content_text returned by get with full=true (characters)
+MAX_TEXT_CHARS = 1 << 20
+# Clients connected at once; more are refused
+MAX_CLIENTS = 16
+# A client connection idle this long is closed (seconds)
+CLIENT_TIMEOUT = 30.0
+# How often the accept loop checks for stop() (seconds)
+ACCEPT_POLL = 0.5
+# Integer parameters end up as SQLite INTEGER (signed 64-bit)
+INT_MIN, INT_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class IpcError(Exception):
+    """בקשה לא תקינה — מוחזרת ללקוח כ-{"ok": false, "error": ...}."""
+
+
+# --- Transport ---
+
+class IpcConnection:
+    """חיבור לקוח אחד — קריאה/כתיבה של שורות (bytes, בלי ה-\\n)."""
+
+    def read_line(self):
+        """השורה הבאה, או None בסוף החיבור."""
+        raise NotImplementedError
+
+    def write_line(self, data):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class IpcTransport:
+    """ממשק התעבורה — צד שרת (listen/accept) וצד לקוח (connect)."""
+
+    def listen(self):
+        raise NotImplementedError
+
+    def accept(self):
+        """IpcConnection הבא; None אחרי close() (או כשאין חיבור בזמן ACCEPT_POLL)."""
+        raise NotImplementedError
+
+    def connect(self):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class _SocketConnection(IpcConnection):
+    def __init__(self, sock):
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def read_line(self):
+        line = self._reader.readline(MAX_LINE_BYTES + 1)
+        if not line:
+            return None
+        if len(line) > MAX_LINE_BYTES:
+            raise IpcError("request too large")
+        return line.rstrip(b"\r\n")
+
+    def write_line(self, data):
+        self._sock.sendall(data + b"\n")
+
+    def close(self):
+        try:
+            # Also wakes a worker blocked in read_line() on this connection
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._reader.close()
+        self._sock.close()
+
+
+class UnixSocketTransport(IpcTransport):
+    """Unix domain socket — הקובץ נגיש רק למשתמש הנוכחי (0600)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._sock = None
+        self._closed = False
+
+    def listen(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a crashed instance
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        os.chmod(self.path, 0o600)
+        sock.listen()
+        sock.settimeout(ACCEPT_POLL)
+        self._sock = sock
+
+    def accept(self):
+        if self._closed:
+            return None
+        try:
+            client, _ = self._sock.accept()
+        except (socket.timeout, OSError):
+            return None
+        client.settimeout(CLIENT_TIMEOUT)
+        return _SocketConnection(client)
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return _SocketConnection(sock)
+
+    def close(self):
+        self._closed = True
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)  # wakes a pending accept()
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def default_transport(name, data_dir):
+    """named pipe ב-Windows, ו-Unix socket (data/<name>.sock) בשאר המערכות."""
+    if os.name == "nt":
+        from app.core.named_pipe import NamedPipeTransport
+        user = os.environ.get("USERNAME", "user")
+        return NamedPipeTransport(rf"\\.\pipe\{name}-{user}")
+    return UnixSocketTransport(os.path.join(data_dir, f"{name}.sock"))
+
+
+# --- Server ---
+
+class IpcServer:
+    """
+    thread קורא לכל לקוח (I/O בלבד), והשאילתות רצות ב-workers קבועים — כל worker
+    עם חיבור SQLite משלו (thread-local ב-Database), קריאות WAL בלבד, כך שלא מתחרים
+    בכותב. תוצאות search/recent/get נשמרות ב-LRU שמתרוקן בכל שינוי ב-DB (change events).
+    paste — מעביר את הרשומה ל-paste(entry), שמתזמן אותה ב-thread של Tk.
+    """
+
+    def __init__(self, transport, repo, paste=None, blob_storage=None,
+                 workers=2, cache_size=128, max_clients=MAX_CLIENTS):
+        self._transport = transport
+        self._repo = repo
+        self._paste = paste
+        self._blob_storage = blob_storage
+        self._workers = max(1, workers)
+        self._max_clients = max_clients
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._generation = 0
+        self._executor = None
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._accept_thread = None
+        self._running = False
+        self._ops = {
+            "search": self._op_search,
+            "recent": self._op_recent,
+            "get": self._op_get,
+            "paste": self._op_paste,
+        }
+
+    def start(self):
+        self._transport.listen()
+        self._repo.subscribe(self._on_repository_event)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="ipc")
+        self._running = True
+        self._accept_thread = threading.Thread(
+            target=self._accept_loop, daemon=True, name="IpcAccept"
+        )
+        self._accept_thread.start()
+
+    def stop(self, timeout=2.0):
+        if not self._running:
+            return
+        self._running = False
+        self._repo.unsubscribe(self._on_repository_event)
+        self._transport.close()
+        with self._active_lock:
+            active = list(self._active)
+        for conn in active:
+            conn.close()
+        self._accept_thread.join(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_repository_event(self, _event):
+        with self._cache_lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def _accept_loop(self):
+        while self._running:
+            conn = self._transport.accept()
+            if conn is None:
+                continue
+            with self._active_lock:
+                full = len(self._active) >= self._max_clients
+                if not full:
+                    self._active.add(conn)
+            if full:
+                conn.close()
+                continue
+            threading.Thread(
+                target=self._serve, args=(conn,), daemon=True, name="IpcClient"
+            ).start()
+
+    def _serve(self, conn):
+        try:
+            while self._running:
+                line = conn.read_line()
+                if line is None:
+                    return
+                if line.strip():
+                    response = self._executor.submit(self.handle_line, line).result()
+                    conn.write_line(response)
+        except (OSError, IpcError, RuntimeError, CancelledError):
+            pass  # client went away, timed out or sent an oversized line; or stop()
+        finally:
+            with self._active_lock:
+                self._active.discard(conn)
+            conn.close()
+
+    def handle_line(self, line):
+        """שורת בקשה (אובייקט או מערך) → שורת תשובה, באותו מבנה."""
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            return _encode(_error(None, "invalid JSON"))
+        if isinstance(payload, list):
+            if len(payload) > MAX_BATCH:
+                return _encode(_error(None, f"batch larger than {MAX_BATCH}"))
+            return _encode([self._handle(request) for request in payload])
+        return _encode(self._handle(payload))
+
+    def _handle(self, request):
+        if not isinstance(request, dict):
+            return _error(None, "request must be an object")
+        request_id = request.get("req")
+        try:
+            handler = self._ops.get(request.get("op"))
+            if handler is None:
+                raise IpcError(f"unknown op: {request.get('op')!r}")
+            result = handler(request)
+        except (IpcError, sqlite3.Error) as e:
+            return _error(request_id, str(e))
+        except Exception as e:
+            # A bug in one request must not drop the connection (or the batch)
+            return _error(request_id, f"internal error: {type(e).__name__}: {e}")
+        return {"req": request_id, "ok": True, "result": result}
+
+    # --- Ops ---
+
+    def _cached(self, key, load):
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            generation = self._generation
+        result = load()
+        with self._cache_lock:
+            # A change landed while loading — the result may already be stale
+            if generation == self._generation:
+                self._cache[key] = result
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _query(self, key, full, load):
+        # full results carry whole texts — never kept in the LRU
+        return load() if full else self._cached(key, load)
+
+    def _op_search(self, request):
+        query = _param(request, "query", str, "")
+        content_type = _param(request, "type", str)
+        content_subtype = _param(request, "subtype", str)
+        full = bool(request.get("full"))
+        limit, offset = _paging(request, full)
+        key = ("search", query, content_type, content_subtype, limit, offset)
+        return self._query(key, full, lambda: [
+            entry_to_dict(e, full) for e in self._repo.search(
+                query, content_type=content_type, content_subtype=content_subtype,
+                limit=limit, offset=offset,
+            )
+        ])
+
+    def _op_recent(self, request):
+        full = bool(request.get("full"))
+        limit, offset = _paging(request, full)
+        return self._query(("recent", limit, offset), full, lambda: [
+            entry_to_dict(e, full) for e in self._repo.get_recent(limit=limit, offset=offset)
+        ])
+
+    def _op_get(self, request):
+        entry_id = _param(request, "id", int)
+        full = bool(request.get("full"))
+
+        def load():
+            entry = self._repo.get_by_id(entry_id)
+            if entry is None:
+                return None
+            data = entry_to_dict(entry, full)
+            # The DB row holds only the head of an oversized text
+            data["truncated"] = bool(entry.content_blob)
+            if full and entry.content_blob and self._blob_storage is not None:
+                # One char more than returned — tells whether the blob was cut
+                text = self._blob_storage.read_text(entry.content_blob, MAX_TEXT_CHARS + 1)
+                if text is not None:
+                    data["content_text"] = text[:MAX_TEXT_CHARS]
+                    data["truncated"] = len(text) > MAX_TEXT_CHARS
+            return data
+
+        data = self._query(("get", entry_id), full, load)
+        if data is None:
+            raise IpcError(f"entry {entry_id} not found")
+        return data
+
+    def _op_paste(self, request):
+        if self._paste is None:
+            raise IpcError("paste is not available")
+        entry_id = _param(request, "id", int)
+        entry = self._repo.get_by_id(entry_id)
+        if entry is None:
+            raise IpcError(f"entry {entry_id} not found")
+        self._paste(entry)
+        return {"id": entry_id, "queued": True}
+
+
+def _param(request, name, kind, default=None):
+    value = request.get(name, default)
+    if value is None:
+        if default is None and kind is int:
+            raise IpcError(f"missing '{name}'")
+        return default
+    if (kind is int and isinstance(value, bool)) or not isinstance(value, kind):
+        raise IpcError(f"'{name}' must be {kind.__name__}")
+    if kind is int and not INT_MIN <= value <= INT_MAX:
+        raise IpcError(f"'{name}' out of range")
+    return value
+
+
+def _paging(request, full=False):
+    max_limit = MAX_FULL_LIMIT if full else MAX_LIMIT
+    limit = min(max(_param(request, "limit", int, 50), 1), max_limit)
+    offset = max(_param(request, "offset", int, 0), 0)
+    return limit, offset
+
+
+def _error(request_id, message):
+    return {"req": request_id, "ok": False, "error": message}
+
+
+def _encode(response):
+    return json.dumps(response, ensure_ascii=False).encode("utf-8")
+
+
+# --- Client ---
+
+class IpcClient:
+    """לקוח פשוט (לכלים ולבדיקות): request() לבקשה אחת, batch() לכמה בשורה אחת."""
+
+    def __init__(self, transport):
+        self._conn = transport.connect()
+
+    def request(self, op, **params):
+        return self._call(dict(params, op=op))
+
+    def batch(self, requests):
+        return self._call(list(requests))
+
+    def _call(self, payload):
+        self._conn.write_line(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        line = self._conn.read_line()
+        if line is None:
+            raise ConnectionError("IPC server closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,221 @@
+"""
+תעבורת named pipe ל-IpcServer ב-Windows (pywin32). ה-pipe נפתח ב-overlapped
+I/O, כך שקריאה, כתיבה והמתנה ללקוח חוזרות אחרי timeout במקום להיתקע.
+"""
+
+import threading
+import time
+
+import ntsecuritycon
+import pywintypes
+import win32api
+import win32event
+import win32file
+import win32pipe
+import win32security
+import winerror
+
+from app.core.ipc_server import (
+    ACCEPT_POLL, CLIENT_TIMEOUT, IpcConnection, IpcError, IpcTransport, MAX_LINE_BYTES,
+)
+
+BUFFER_SIZE = 64 * 1024
+# Local clients only (not exported by pywin32 on every version)
+PIPE_REJECT_REMOTE_CLIENTS = 0x00000008
+# Fails if the name already exists — nobody else can squat on it before us
+FILE_FLAG_FIRST_PIPE_INSTANCE = 0x00080000
+
+
+def _current_user_security():
+    """SECURITY_ATTRIBUTES עם DACL שמתיר גישה רק למשתמש הנוכחי."""
+    token = win32security.OpenProcessToken(
+        win32api.GetCurrentProcess(), win32security.TOKEN_QUERY
+    )
+    sid = win32security.GetTokenInformation(token, win32security.TokenUser)[0]
+    dacl = win32security.ACL()
+    dacl.AddAccessAllowedAce(win32security.ACL_REVISION, ntsecuritycon.GENERIC_ALL, sid)
+    descriptor = win32security.SECURITY_DESCRIPTOR()
+    descriptor.SetSecurityDescriptorDacl(1, dacl, 0)
+    attributes = win32security.SECURITY_ATTRIBUTES()
+    attributes.SECURITY_DESCRIPTOR = descriptor
+    return attributes
+
+
+def _new_overlapped():
+    overlapped = pywintypes.OVERLAPPED()
+    overlapped.hEvent = win32event.CreateEvent(None, True, False, None)
+    return overlapped
+
+
+def _wait(handle, overlapped, timeout):
+    """המתנה לסיום פעולת overlapped — מספר הבתים; TimeoutError אם לא הסתיימה בזמן."""
+    if win32event.WaitForSingleObject(overlapped.hEvent, int(timeout * 1000)) \
+            != win32event.WAIT_OBJECT_0:
+        win32file.CancelIo(handle)
+        try:
+            # The buffer must stay alive until the cancelled operation completes
+            win32file.GetOverlappedResult(handle, overlapped, True)
+        except pywintypes.error:
+            pass
+        raise TimeoutError("named pipe I/O timed out")
+    return win32file.GetOverlappedResult(handle, overlapped, False)
+
+
+class _PipeConnection(IpcConnection):
+    def __init__(self, handle, server_side, timeout=CLIENT_TIMEOUT):
+        self._handle = handle
+        self._server_side = server_side
+        self._timeout = timeout
+        self._buffer = b""
+        self._read_buffer = win32file.AllocateReadBuffer(BUFFER_SIZE)
+        self._read_overlapped = _new_overlapped()
+        self._write_overlapped = _new_overlapped()
+        self._lock = threading.Lock()
+
+    def read_line(self):
+        while b"\n" not in self._buffer:
+            if len(self._buffer) > MAX_LINE_BYTES:
+                raise IpcError("request too large")
+            handle = self._handle
+            if handle is None:
+                return None
+            try:
+                win32file.ReadFile(handle, self._read_buffer, self._read_overlapped)
+                count = _wait(handle, self._read_overlapped, self._timeout)
+            except pywintypes.error:
+                return None  # client disconnected (ERROR_BROKEN_PIPE), or close()
+            if not count:
+                return None
+            self._buffer += bytes(self._read_buffer[:count])
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.rstrip(b"\r")
+
+    def write_line(self, data):
+        handle = self._handle
+        if handle is None:
+            raise OSError("pipe closed")
+        payload = data + b"\n"
+        try:
+            win32file.WriteFile(handle, payload, self._write_overlapped)
+            _wait(handle, self._write_overlapped, self._timeout)
+        except pywintypes.error as e:
+            raise OSError(str(e)) from e
+
+    def close(self):
+        with self._lock:
+            if self._handle is None:
+                return
+            handle, self._handle = self._handle, None
+        try:
+            if self._server_side:
+                # Also fails a read pending on this pipe
+                win32pipe.DisconnectNamedPipe(handle)
+        except pywintypes.error:
+            pass
+        win32file.CloseHandle(handle)
+
+
+class NamedPipeTransport(IpcTransport):
+    """
+    pipe בשם name — מופע חדש לכל לקוח, מקומי בלבד ונגיש רק למשתמש הנוכחי.
+    המופע הבא נוצר לפני שהקודם נמסר ללקוח, כך שהשם לא משתחרר בזמן ריצה.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._closed = False
+        self._security = None
+        # (handle, overlapped, connected) of the instance waiting for the next client
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def listen(self):
+        try:
+            self._security = _current_user_security()
+            self._pending = self._create_instance(first=True)
+        except pywintypes.error as e:
+            # Name already taken — another instance, or another user squatting on it
+            raise OSError(f"cannot create pipe {self.name}: {e}") from e
+
+    def _create_instance(self, first=False):
+        open_mode = win32pipe.PIPE_ACCESS_DUPLEX | win32file.FILE_FLAG_OVERLAPPED
+        if first:
+            open_mode |= FILE_FLAG_FIRST_PIPE_INSTANCE
+        handle = win32pipe.CreateNamedPipe(
+            self.name,
+            open_mode,
+            win32pipe.PIPE_TYPE_BYTE | win32pipe.PIPE_READMODE_BYTE
+            | win32pipe.PIPE_WAIT | PIPE_REJECT_REMOTE_CLIENTS,
+            win32pipe.PIPE_UNLIMITED_INSTANCES,
+            BUFFER_SIZE, BUFFER_SIZE, 0, self._security,
+        )
+        overlapped = _new_overlapped()
+        try:
+            result = win32pipe.ConnectNamedPipe(handle, overlapped)
+        except pywintypes.error:
+            win32file.CloseHandle(handle)
+            raise
+        # ERROR_PIPE_CONNECTED: a client connected between the two calls
+        return handle, overlapped, result == winerror.ERROR_PIPE_CONNECTED
+
+    def accept(self):
+        if self._closed:
+            return None
+        with self._lock:
+            pending = self._pending
+        if pending is None:
+            try:
+                pending = self._create_instance()
+            except pywintypes.error:
+                time.sleep(ACCEPT_POLL)  # e.g. out of handles — don't spin
+                return None
+            with self._lock:
+                if self._closed:
+                    win32file.CloseHandle(pending[0])
+                    return None
+                self._pending = pending
+        handle, overlapped, connected = pending
+        if not connected and win32event.WaitForSingleObject(
+                overlapped.hEvent, int(ACCEPT_POLL * 1000)) != win32event.WAIT_OBJECT_0:
+            return None  # no client yet — the same instance keeps waiting
+        with self._lock:
+            if self._closed or self._pending is not pending:
+                return None  # woken by close(), which closed the instance
+            self._pending = None
+        if not connected:
+            try:
+                win32file.GetOverlappedResult(handle, overlapped, False)
+            except pywintypes.error:
+                win32file.CloseHandle(handle)
+                return None
+        # Next instance first, so the name stays ours while this one is in use
+        try:
+            following = self._create_instance()
+        except pywintypes.error:
+            following = None  # created again by the next accept()
+        with self._lock:
+            if self._closed:
+                if following is not None:
+                    win32file.CloseHandle(following[0])
+            else:
+                self._pending = following
+        return _PipeConnection(handle, server_side=True)
+
+    def connect(self):
+        handle = win32file.CreateFile(
+            self.name,
+            win32file.GENERIC_READ | win32file.GENERIC_WRITE,
+            0, None, win32file.OPEN_EXISTING, win32file.FILE_FLAG_OVERLAPPED, None,
+        )
+        return _PipeConnection(handle, server_side=False)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            handle, overlapped, _ = pending
+            win32file.CloseHandle(handle)
+            win32event.SetEvent(overlapped.hEvent)  # wakes a waiting accept()
@@ -2,14 +2,31 @@
 
 import ctypes
 import ctypes.wintypes
+import os
+import threading
+import time
+from collections import OrderedDict
 
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
 
-def get_foreground_app():
-    """
-    החזרת (שם_תהליך, כותרת_חלון) של האפליקציה בחזית.
-    מחזיר (None, None) אם לא ניתן לזהות.
-    """
-    try:
+
+class ProcessInspector:
+    """ממשק לשאילתות מערכת ההפעלה — מימוש Win32, ומימוש מדומה לבדיקות ב-Linux."""
+
+    def foreground(self):
+        """החזרת (pid, כותרת_חלון) של החלון בחזית, או (None, None)."""
+        raise NotImplementedError
+
+    def create_time(self, pid):
+        """זמן יצירת התהליך — מבדיל בין תהליכים שקיבלו אותו PID."""
+        raise NotImplementedError
+
+    def process_name(self, pid):
+        raise NotImplementedError
+
+
+class Win32ProcessInspector(ProcessInspector):
+    def foreground(self):
         hwnd = ctypes.windll.user32.GetForegroundWindow()
         if not hwnd:
             return None, None
@@ -23,27 +40,144 @@ def get_foreground_app():
         # Process ID
         pid = ctypes.wintypes.DWORD()
         ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return (pid.value or None), window_title
 
-        if pid.value == 0:
-            return None, window_title
+    def create_time(self, pid):
+        handle = ctypes.windll.kernel32.OpenProcess(
+            PROCESS_QUERY_LIMITED_INFORMATION, False, pid
+        )
+        if not handle:
+            return None
+        try:
+            creation = ctypes.wintypes.FILETIME()
+            exit_time = ctypes.wintypes.FILETIME()
+            kernel = ctypes.wintypes.FILETIME()
+            user = ctypes.wintypes.FILETIME()
+            if not ctypes.windll.kernel32.GetProcessTimes(
+                handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                ctypes.byref(kernel), ctypes.byref(user),
+            ):
+                return None
+            return (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
 
+    def process_name(self, pid):
         # Process name via psutil (more reliable than OpenProcess)
         try:
             import psutil
-            proc = psutil.Process(pid.value)
-            app_name = proc.name()
+            return psutil.Process(pid).name()
         except Exception:
-            app_name = _get_process_name_win32(pid.value)
+            return _get_process_name_win32(pid)
 
-        return app_name, window_title
 
-    except Exception:
-        return None, None
+class FakeProcessInspector(ProcessInspector):
+    """תהליכים מדומים: processes = {pid: (שם, זמן_יצירה)}."""
+
+    def __init__(self, processes=None):
+        self.processes = dict(processes or {})
+        self.foreground_pid = None
+        self.foreground_title = None
+        self.name_lookups = 0
+
+    def foreground(self):
+        return self.foreground_pid, self.foreground_title
+
+    def create_time(self, pid):
+        proc = self.processes.get(pid)
+        return proc[1] if proc else None
+
+    def process_name(self, pid):
+        self.name_lookups += 1
+        proc = self.processes.get(pid)
+        return proc[0] if proc else None
+
+
+class SourceDetector:
+    """
+    זיהוי האפליקציה בחזית עם מטמון LRU של שם התהליך לפי (pid, זמן יצירה),
+    כך ש-PID שמוחזר לשימוש לא יקבל שם של תהליך קודם.
+    """
+
+    def __init__(self, inspector, cache_size=128):
+        self._inspector = inspector
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "cache_hits": 0, "total_us": 0.0, "max_us": 0.0}
+
+    def get_foreground_app(self):
+        """
+        החזרת (שם_תהליך, כותרת_חלון) של האפליקציה בחזית.
+        מחזיר (None, None) אם לא ניתן לזהות.
+        """
+        start = time.perf_counter()
+        hit = False
+        try:
+            pid, window_title = self._inspector.foreground()
+            if not pid:
+                return None, window_title
+            app_name, hit = self._resolve_name(pid)
+            return app_name, window_title
+        except Exception:
+            return None, None
+        finally:
+            self._record(time.perf_counter() - start, hit)
+
+    def _resolve_name(self, pid):
+        created = self._inspector.create_time(pid)
+        if created is None:
+            return self._inspector.process_name(pid), False
+
+        key = (pid, created)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key], True
+
+        name = self._inspector.process_name(pid)
+        if name:
+            with self._lock:
+                self._cache[key] = name
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return name, False
+
+    def _record(self, elapsed, hit):
+        elapsed_us = elapsed * 1e6
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["cache_hits"] += int(hit)
+            self._stats["total_us"] += elapsed_us
+            self._stats["max_us"] = max(self._stats["max_us"], elapsed_us)
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._stats)
+        result["avg_us"] = result["total_us"] / result["calls"] if result["calls"] else 0.0
+        return result
+
+
+_default_detector = None
+
+
+def get_default_detector():
+    global _default_detector
+    if _default_detector is None:
+        _default_detector = SourceDetector(Win32ProcessInspector())
+    return _default_detector
+
+
+def get_foreground_app():
+    """
+    החזרת (שם_תהליך, כותרת_חלון) של האפליקציה בחזית.
+    מחזיר (None, None) אם לא ניתן לזהות.
+    """
+    return get_default_detector().get_foreground_app()
 
 
 def _get_process_name_win32(pid):
     """Fallback: get process name via Win32 API."""
-    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
     try:
         handle = ctypes.windll.kernel32.OpenProcess(
             PROCESS_QUERY_LIMITED_INFORMATION, False, pid
@@ -57,7 +191,6 @@ def _get_process_name_win32(pid):
         )
         ctypes.windll.kernel32.CloseHandle(handle)
         if success and buf.value:
-            import os
             return os.path.basename(buf.value)
     except Exception:
         pass
@@ -0,0 +1,143 @@
+"""
+מדידת זמנים מקצה לקצה של המסלולים הקריטיים (hotkey → ציור, עדכון לוח → שורה
+ברשימה, הדבקה). כל trace אוסף חותמות monotonic לכל שלב, וה-traces שהסתיימו
+נשמרים ב-ring buffer עם סיכום p50/p95/p99 לכל שלב.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+
+PATH_HOTKEY = "hotkey"
+PATH_CAPTURE = "capture"
+PATH_PASTE = "paste"
+
+
+class Trace:
+    """trace אחד: path, זמן התחלה, ורשימת (stage, timestamp) לפי הסדר."""
+
+    __slots__ = ("path", "start", "marks")
+
+    def __init__(self, path, start=None):
+        self.path = path
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+
+    def mark(self, stage):
+        """סוף השלב stage (משך השלב = מהסימון הקודם עד עכשיו)."""
+        self.marks.append((stage, time.perf_counter()))
+
+    def durations(self):
+        """[(stage, ms)] — משך כל שלב במילישניות."""
+        result = []
+        previous = self.start
+        for stage, ts in self.marks:
+            result.append((stage, (ts - previous) * 1000.0))
+            previous = ts
+        return result
+
+    def total_ms(self):
+        if not self.marks:
+            return 0.0
+        return (self.marks[-1][1] - self.start) * 1000.0
+
+
+class Tracer:
+    """
+    begin() פותח trace, finish() מכניס אותו ל-ring buffer (capacity אחרונים).
+    כש-enabled=False, begin() מחזיר None — קוד שמסמן שלבים בודק `if trace`.
+    """
+
+    def __init__(self, capacity=512, enabled=True):
+        self.enabled = enabled
+        self._traces = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def begin(self, path, start=None):
+        if not self.enabled:
+            return None
+        return Trace(path, start)
+
+    def finish(self, trace):
+        if trace is None or not trace.marks:
+            return
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self, path=None):
+        with self._lock:
+            traces = list(self._traces)
+        if path is not None:
+            traces = [t for t in traces if t.path == path]
+        return traces
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+    def summary(self):
+        """{path: {stage: {count, p50, p95, p99, max}}} במילישניות; "total" לכל path."""
+        samples = {}
+        for trace in self.traces():
+            stages = samples.setdefault(trace.path, {})
+            for stage, ms in trace.durations():
+                stages.setdefault(stage, []).append(ms)
+            stages.setdefault("total", []).append(trace.total_ms())
+        return {
+            path: {stage: _percentiles(values) for stage, values in stages.items()}
+            for path, stages in samples.items()
+        }
+
+    def to_dict(self):
+        return {
+            "summary": self.summary(),
+            "traces": [
+                {
+                    "path": t.path,
+                    "total_ms": round(t.total_ms(), 3),
+                    "stages": [[stage, round(ms, 3)] for stage, ms in t.durations()],
+                }
+                for t in self.traces()
+            ],
+        }
+
+    def dump_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _percentiles(values):
+    ordered = sorted(values)
+    count = len(ordered)
+
+    def rank(p):
+        # Nearest-rank percentile
+        index = max(0, math.ceil(p / 100.0 * count) - 1)
+        return round(ordered[index], 3)
+
+    return {
+        "count": count,
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def format_summary(summary):
+    """טבלת טקסט של summary() לתצוגת debug."""
+    lines = []
+    for path, stages in sorted(summary.items()):
+        lines.append(f"[{path}]")
+        lines.append(f"  {'stage':<12}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        ordered = [s for s in stages if s != "total"] + ["total"]
+        for stage in ordered:
+            s = stages[stage]
+            lines.append(
+                f"  {stage:<12}{s['count']:>6}{s['p50']:>10.2f}{s['p95']:>10.2f}"
+                f"{s['p99']:>10.2f}{s['max']:>10.2f}"
+            )
+        lines.append("")
+    return "\n".join(lines) if lines else "—"
@@ -3,47 +3,106 @@
 import threading
 from datetime import datetime, timedelta
 
+from app.constants import ImageState
+from app.db.repository import DIB_FORMAT
+from app.utils.image_storage import (
+    BUCKETS, LEGACY_META_KEY, LAYOUT_CONTENT_ADDRESSED, THUMBNAIL_SIZE,
+)
+
+SCAN_CURSOR_KEY = "orphan_scan_cursor"
+SCAN_COMPLETED_KEY = "orphan_scan_completed_at"
+
 
 class CleanupManager:
     """מנהל ניקוי תקופתי של היסטוריית הלוח."""
 
-    def __init__(self, repo, config, image_storage):
+    def __init__(self, repo, config, image_storage, image_encoder=None, blob_storage=None,
+                 pending_before=None, files_lock=None):
+        """
+        pending_before — זמן עליית האפליקציה (כמו created_at ב-DB); תמונות pending
+        מלפניו נשארו מהפעלה קודמת ואין קידוד שרץ עבורן.
+        files_lock — משותף עם הקליטה: "הקובץ כבר קיים" + הכנסת הרשומה שם, ובדיקת
+        ההפניות + מחיקת הקובץ כאן, כך שקובץ לא נמחק מתחת לרשומה חדשה.
+        """
         self._repo = repo
         self._config = config
         self._image_storage = image_storage
+        self._image_encoder = image_encoder
+        self._blob_storage = blob_storage
+        self._pending_before = pending_before or datetime.now().isoformat(timespec="milliseconds")
+        self._files_lock = files_lock or threading.Lock()
         self._timer = None
+        self._gc_timer = None
         self._running = False
+        self._lock = threading.Lock()
+        # Image paths with an encode submitted by cleanup that hasn't finished
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
 
     def schedule(self, interval_minutes=30):
-        """תזמון ניקוי תקופתי."""
+        """תזמון ניקוי תקופתי. גם ההרצה הראשונה רצה ב-thread של Timer, לא אצל הקורא."""
         self._running = True
-        self._run_periodic(interval_minutes)
+        self._timer = self._start_timer(0, self._run_periodic, interval_minutes)
+        self._gc_timer = self._start_timer(
+            0, self._run_gc_periodic, self._config.get("image_gc_interval_seconds", 60)
+        )
 
     def cancel(self):
         """ביטול הניקוי התקופתי."""
         self._running = False
-        if self._timer:
-            self._timer.cancel()
-            self._timer = None
+        for timer in (self._timer, self._gc_timer):
+            if timer:
+                timer.cancel()
+        self._timer = None
+        self._gc_timer = None
 
     def run_cleanup(self):
         """הרצת ניקוי מיידי."""
-        try:
-            self._cleanup_by_count()
-            self._cleanup_by_age()
-            self._cleanup_orphan_images()
-        except Exception:
-            pass
+        with self._lock:
+            try:
+                self._image_storage.migrate_legacy_layout(self._repo)
+                self._cleanup_by_count()
+                self._cleanup_by_age()
+                self._drain_image_gc_queue()
+                self._recover_pending_images()
+                self._reconcile_orphan_images()
+                self._optimize_deferred_images()
+                self._backfill_thumbnails()
+            except Exception:
+                pass
+
+    def run_image_gc(self):
+        """מחיקת קבצי התמונות שבתור המחיקה."""
+        with self._lock:
+            try:
+                self._drain_image_gc_queue()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _start_timer(delay_seconds, func, interval):
+        timer = threading.Timer(delay_seconds, func, args=[interval])
+        timer.daemon = True
+        timer.start()
+        return timer
 
     def _run_periodic(self, interval_minutes):
         if not self._running:
             return
         self.run_cleanup()
-        self._timer = threading.Timer(
-            interval_minutes * 60, self._run_periodic, args=[interval_minutes]
-        )
-        self._timer.daemon = True
-        self._timer.start()
+        if self._running:
+            self._timer = self._start_timer(
+                interval_minutes * 60, self._run_periodic, interval_minutes
+            )
+
+    def _run_gc_periodic(self, interval_seconds):
+        if not self._running:
+            return
+        self.run_image_gc()
+        if self._running:
+            self._gc_timer = self._start_timer(
+                interval_seconds, self._run_gc_periodic, interval_seconds
+            )
 
     def _cleanup_by_count(self):
         max_entries = self._config.get("max_entries", 5000)
@@ -59,6 +118,135 @@ class CleanupManager:
         cutoff_str = cutoff.strftime("%Y-%m-%dT%H:%M:%S")
         self._repo.delete_older_than(cutoff_str)
 
-    def _cleanup_orphan_images(self):
-        valid_paths = set(self._repo.get_image_paths())
-        self._image_storage.cleanup_orphans(valid_paths)
+    def _claim(self, image_path):
+        with self._in_flight_lock:
+            if image_path in self._in_flight:
+                return False
+            self._in_flight.add(image_path)
+            return True
+
+    def _release(self, image_path):
+        with self._in_flight_lock:
+            self._in_flight.discard(image_path)
+
+    def _optimize_deferred_images(self, batch_size=20):
+        """
+        קידוד מחדש (optimize) של תמונות שנשמרו בקידוד מהיר — מצב deferred.
+        מנה אחת בכל הרצה; המצב מתעדכן ב-callback, בלי לחכות ל-pool.
+        """
+        if self._image_encoder is None:
+            return
+        entries = self._repo.get_by_image_state(ImageState.UNOPTIMIZED, limit=batch_size)
+        for image_path in {e.image_path for e in entries}:
+            if not self._claim(image_path):
+                continue  # submitted by an earlier run, still encoding
+
+            def on_optimized(future, image_path=image_path):
+                # Cancelled (shutdown) — stays unoptimized for the next launch;
+                # a failed optimize keeps the fast encode, still a valid image
+                if not future.cancelled():
+                    self._repo.set_image_state(image_path, ImageState.READY)
+                self._release(image_path)
+
+            try:
+                future = self._image_encoder.optimize(
+                    self._image_storage.get_full_path(image_path)
+                )
+            except Exception:
+                self._release(image_path)  # broken or shut-down pool
+                return
+            future.add_done_callback(on_optimized)
+
+    def _recover_pending_images(self, batch_size=20):
+        """
+        תמונות שנשארו "בעיבוד" מהפעלה קודמת (קריסה/יציאה באמצע קידוד) — מקודדות
+        מחדש מה-CF_DIB שנשמר בקליטה, ואם אין כזה (או שהקידוד נכשל) מסומנות failed.
+        מנה אחת בכל הרצה; המצב מתעדכן ב-on_done, כמו בקליטה.
+        """
+        done_state = ImageState.READY
+        if self._image_encoder is not None and self._image_encoder.needs_optimize:
+            done_state = ImageState.UNOPTIMIZED
+        entries = self._repo.get_by_image_state(
+            ImageState.PENDING, limit=batch_size, created_before=self._pending_before,
+        )
+        for image_path, entry in {e.image_path: e for e in entries}.items():
+            if not self._claim(image_path):
+                continue
+            dib = next(
+                (data for name, data in self._repo.get_formats(entry.id) if name == DIB_FORMAT),
+                None,
+            )
+            if dib is None or self._image_encoder is None:
+                self._repo.set_image_state(image_path, ImageState.FAILED)
+                self._release(image_path)
+                continue
+
+            def on_encoded(success, image_path=image_path):
+                self._repo.set_image_state(
+                    image_path, done_state if success else ImageState.FAILED
+                )
+                self._release(image_path)
+
+            try:
+                self._image_encoder.submit(
+                    dib, self._image_storage.get_full_path(image_path),
+                    thumb_path=self._image_storage.get_thumbnail_path(image_path),
+                    thumb_size=THUMBNAIL_SIZE,
+                    on_done=on_encoded,
+                )
+            except Exception:
+                self._repo.set_image_state(image_path, ImageState.FAILED)
+                self._release(image_path)
+
+    def _backfill_thumbnails(self):
+        if self._image_encoder is not None:
+            self._image_storage.backfill_thumbnails(self._repo, self._image_encoder)
+
+    def _drain_image_gc_queue(self):
+        """מחיקת קבצים שספירת ההפניות שלהם ירדה לאפס (נרשמו בתור ע"י trigger)."""
+        while True:
+            paths = self._repo.drain_image_gc_queue()
+            if paths is None:
+                return  # queue empty
+            for path in paths:
+                with self._files_lock:
+                    # Copied again since the queue row was taken — keep the file
+                    if self._repo.is_path_referenced(path):
+                        continue
+                    if self._blob_storage and self._blob_storage.owns(path):
+                        self._blob_storage.delete(path)
+                    else:
+                        self._image_storage.delete(path)
+
+    def _reconcile_orphan_images(self, buckets_per_run=32):
+        """
+        סריקת התאמה מלאה בין הדיסק ל-DB — נדירה (פעם ב-orphan_scan_interval_days)
+        וממשיכה מהנקודה שבה עצרה, כמה תיקיות fan-out בכל הרצה.
+        """
+        if self._repo.get_meta(LEGACY_META_KEY) != LAYOUT_CONTENT_ADDRESSED:
+            return
+        cursor = self._repo.get_meta(SCAN_CURSOR_KEY)
+        if cursor is None:
+            interval_days = self._config.get("orphan_scan_interval_days", 7)
+            last = self._repo.get_meta(SCAN_COMPLETED_KEY)
+            if last:
+                elapsed = datetime.now() - datetime.fromisoformat(last)
+                if elapsed < timedelta(days=interval_days):
+                    return
+            cursor = ""
+
+        stores = [self._image_storage]
+        if self._blob_storage is not None:
+            stores.append(self._blob_storage)
+        for bucket in [b for b in BUCKETS if b > cursor][:buckets_per_run]:
+            for store in stores:
+                with self._files_lock:
+                    referenced = self._repo.get_referenced_image_paths(
+                        prefix=store.bucket_prefix(bucket)
+                    )
+                    store.reconcile_bucket(bucket, referenced)
+            self._repo.set_meta(SCAN_CURSOR_KEY, bucket)
+
+        if self._repo.get_meta(SCAN_CURSOR_KEY) == BUCKETS[-1]:
+            self._repo.delete_meta(SCAN_CURSOR_KEY)
+            self._repo.set_meta(SCAN_COMPLETED_KEY, datetime.now().isoformat(timespec="seconds"))
@@ -0,0 +1,375 @@
+"""
+מיגרציות סכמה עם גרסה (schema_version ב-app_meta).
+
+כשה-DB בגרסה העדכנית, העלייה מריצה שאילתה אחת בלבד — בלי DDL. מיגרציה
+מהירה (טבלאות, עמודות) רצה בעלייה; עבודה כבדה (בניית אינדקס, מילוי עמודה,
+בניית FTS מחדש) נרשמת כשלב רקע עם cursor ב-app_meta, רצה ב-thread נפרד
+במנות קטנות, וממשיכה מאותה נקודה אחרי הפעלה מחדש.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+SCHEMA_VERSION_KEY = "schema_version"
+# app_meta key per pending background step: value = resume cursor ("" = start)
+BACKGROUND_PREFIX = "migration:"
+
+BACKFILL_BATCH = 500
+
+
+@dataclass
+class Migration:
+    """
+    version — המיגרציות רצות לפי הסדר עד הגרסה האחרונה.
+    apply(conn) — DDL מהיר; מחזיר שמות של שלבי רקע לתזמון (או None).
+    """
+    version: int
+    description: str
+    apply: Callable
+
+
+@dataclass
+class BackgroundStep:
+    """
+    run(conn, cursor) — מנה אחת של עבודה. מחזיר cursor חדש (str) אם נשארה
+    עבודה, או None בסיום. ה-cursor נשמר ב-app_meta באותה טרנזקציה כמו המנה.
+    """
+    name: str
+    run: Callable
+
+
+def current_version(conn):
+    """גרסת הסכמה השמורה, או 0 ל-DB חדש / DB מלפני הגרסאות."""
+    try:
+        row = conn.execute(
+            "SELECT value FROM app_meta WHERE key = ?", (SCHEMA_VERSION_KEY,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0  # no app_meta table yet
+    return int(row[0]) if row else 0
+
+
+def migrate(conn):
+    """הרצת המיגרציות המהירות שחסרות. מחזיר את הגרסה הנוכחית."""
+    version = current_version(conn)
+    if version >= LATEST_VERSION:
+        return version  # fast path — no DDL at all
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        steps = migration.apply(conn) or []
+        for name in steps:
+            conn.execute(
+                "INSERT OR IGNORE INTO app_meta(key, value) VALUES (?, '')",
+                (BACKGROUND_PREFIX + name,),
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO app_meta(key, value) VALUES (?, ?)",
+            (SCHEMA_VERSION_KEY, str(migration.version)),
+        )
+        conn.commit()
+        version = migration.version
+    return version
+
+
+def pending_steps(conn):
+    """[(name, cursor)] של שלבי רקע שעוד לא הסתיימו."""
+    return [
+        (key[len(BACKGROUND_PREFIX):], value)
+        for key, value in conn.execute(
+            "SELECT key, value FROM app_meta WHERE key LIKE ? ORDER BY rowid",
+            (BACKGROUND_PREFIX + "%",),
+        )
+    ]
+
+
+def run_background(conn, stop_event=None):
+    """
+    הרצת שלבי הרקע שממתינים, מנה אחר מנה, עד שכולם מסתיימים או ש-stop_event
+    מופעל. בטוח להפסיק בכל רגע — ההפעלה הבאה ממשיכה מה-cursor האחרון.
+    """
+    for name, cursor in pending_steps(conn):
+        step = BACKGROUND_STEPS.get(name)
+        if step is None:
+            continue  # step from a newer build — left queued for it
+        key = BACKGROUND_PREFIX + name
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return
+            cursor = step.run(conn, cursor or None)
+            if cursor is None:
+                conn.execute("DELETE FROM app_meta WHERE key = ?", (key,))
+                conn.commit()
+                break
+            conn.execute("UPDATE app_meta SET value = ? WHERE key = ?", (str(cursor), key))
+            conn.commit()
+
+
+# --- Migrations ---
+
+# Columns added before versioning: (table, column, declaration)
+PRE_VERSIONING_COLUMNS = [
+    ("clipboard_entries", "image_state", "TEXT"),
+    ("clipboard_entries", "content_blob", "TEXT"),
+    ("clipboard_entries", "content_subtype", "TEXT"),
+]
+
+
+def _add_column_if_missing(conn, table, column, decl):
+    existing = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def _baseline(conn):
+    # New DB, or one created before versioning (CREATE ... IF NOT EXISTS
+    # doesn't alter an existing table, so its newer columns are added here)
+    conn.executescript(SCHEMA_SQL)
+    for table, column, decl in PRE_VERSIONING_COLUMNS:
+        _add_column_if_missing(conn, table, column, decl)
+
+
+def _content_subtype(conn):
+    # Index build and backfill scan the whole table — done in the background
+    return ["subtype_index", "subtype_backfill"]
+
+
+def _image_dib_purge(conn):
+    # Images stored as files also kept their raw CF_DIB in format_blobs
+    return ["image_dib_purge"]
+
+
+def _fts_update_columns(conn):
+    # The FTS update trigger fired on every UPDATE (pin, last_used_at,
+    # image_state...) and rewrote the row's FTS entry each time
+    conn.executescript("""
+        DROP TRIGGER IF EXISTS entries_au;
+        CREATE TRIGGER entries_au
+        AFTER UPDATE OF content_text, content_preview, source_window ON clipboard_entries
+        BEGIN
+            INSERT INTO clipboard_fts(clipboard_fts, rowid, content_text, content_preview, source_window)
+            VALUES ('delete', old.id, old.content_text, old.content_preview, old.source_window);
+            INSERT INTO clipboard_fts(rowid, content_text, content_preview, source_window)
+            VALUES (new.id, new.content_text, new.content_preview, new.source_window);
+        END;
+    """)
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(2, "content_subtype index and backfill", _content_subtype),
+    Migration(3, "drop CF_DIB copies of stored images", _image_dib_purge),
+    Migration(4, "FTS update trigger on indexed columns only", _fts_update_columns),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# --- Background steps ---
+
+def _create_subtype_index(conn, cursor):
+    """
+    אינדקס חלקי (רק רשומות מסווגות). נבנה לפני המילוי, כשכמעט כל הערכים NULL —
+    הבנייה היא סריקה אחת בלי מיון, והרשומות נכנסות לאינדקס במנות של המילוי.
+    """
+    # `content_subtype = ?` implies IS NOT NULL, so search still uses it
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entries_content_subtype "
+        "ON clipboard_entries(content_subtype) WHERE content_subtype IS NOT NULL"
+    )
+    return None
+
+
+def _backfill_subtypes(conn, cursor):
+    """סיווג רשומות שנשמרו לפני שנוסף content_subtype — מנה לפי id."""
+    from app.core.classifier import HEAD_CHARS, classify
+
+    last_id = int(cursor) if cursor else 0
+    rows = conn.execute(
+        # HEAD_CHARS + 1 — enough for classify() to tell the head was cut
+        """SELECT id, substr(content_text, 1, ?) FROM clipboard_entries
+           WHERE id > ? AND content_text IS NOT NULL
+             AND content_type IN ('text', 'html', 'url')
+           ORDER BY id LIMIT ?""",
+        (HEAD_CHARS + 1, last_id, BACKFILL_BATCH),
+    ).fetchall()
+    if not rows:
+        return None
+    updates = []
+    for entry_id, head in rows:
+        subtype = classify(head)
+        if subtype:
+            updates.append((subtype, entry_id))
+    conn.executemany(
+        "UPDATE clipboard_entries SET content_subtype = ? WHERE id = ?", updates
+    )
+    return str(rows[-1][0])
+
+
+def _purge_image_dibs(conn, cursor):
+    """מחיקת עותקי CF_DIB של תמונות שכבר נשמרו כקובץ — מנה לפי id."""
+    last_id = int(cursor) if cursor else 0
+    ids = [r[0] for r in conn.execute(
+        """SELECT id FROM clipboard_entries
+           WHERE id > ? AND content_type = 'image'
+             AND (image_state IS NULL OR image_state IN ('ready', 'unoptimized'))
+           ORDER BY id LIMIT ?""",
+        (last_id, BACKFILL_BATCH),
+    )]
+    if not ids:
+        return None
+    placeholders = ",".join("?" * len(ids))
+    # format_blobs rows are released by their ref-count trigger
+    conn.execute(
+        f"""DELETE FROM clipboard_formats
+            WHERE format_name = 'CF_DIB' AND entry_id IN ({placeholders})""",
+        ids,
+    )
+    return str(ids[-1])
+
+
+BACKGROUND_STEPS = {
+    step.name: step for step in (
+        BackgroundStep("subtype_index", _create_subtype_index),
+        BackgroundStep("subtype_backfill", _backfill_subtypes),
+        BackgroundStep("image_dib_purge", _purge_image_dibs),
+    )
+}
+
+# Baseline schema (version 1) — later changes are new entries in MIGRATIONS
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS clipboard_entries (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_type    TEXT NOT NULL CHECK(content_type IN ('text', 'html', 'image', 'file_path', 'url')),
+    content_subtype TEXT,
+    content_text    TEXT,
+    content_html    TEXT,
+    content_preview TEXT,
+    image_path      TEXT,
+    image_width     INTEGER,
+    image_height    INTEGER,
+    image_state     TEXT,
+    content_hash    TEXT NOT NULL,
+    content_size    INTEGER NOT NULL DEFAULT 0,
+    content_blob    TEXT,
+    source_app      TEXT,
+    source_window   TEXT,
+    is_pinned       INTEGER NOT NULL DEFAULT 0,
+    is_favorite     INTEGER NOT NULL DEFAULT 0,
+    created_at      TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')),
+    last_used_at    TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_entries_created_at ON clipboard_entries(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_entries_content_type ON clipboard_entries(content_type);
+CREATE INDEX IF NOT EXISTS idx_entries_content_hash ON clipboard_entries(content_hash);
+CREATE INDEX IF NOT EXISTS idx_entries_source_app ON clipboard_entries(source_app);
+CREATE INDEX IF NOT EXISTS idx_entries_is_pinned ON clipboard_entries(is_pinned);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS clipboard_fts USING fts5(
+    content_text,
+    content_preview,
+    source_window,
+    content='clipboard_entries',
+    content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON clipboard_entries BEGIN
+    INSERT INTO clipboard_fts(rowid, content_text, content_preview, source_window)
+    VALUES (new.id, new.content_text, new.content_preview, new.source_window);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON clipboard_entries BEGIN
+    INSERT INTO clipboard_fts(clipboard_fts, rowid, content_text, content_preview, source_window)
+    VALUES ('delete', old.id, old.content_text, old.content_preview, old.source_window);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON clipboard_entries BEGIN
+    INSERT INTO clipboard_fts(clipboard_fts, rowid, content_text, content_preview, source_window)
+    VALUES ('delete', old.id, old.content_text, old.content_preview, old.source_window);
+    INSERT INTO clipboard_fts(rowid, content_text, content_preview, source_window)
+    VALUES (new.id, new.content_text, new.content_preview, new.source_window);
+END;
+
+-- Content-addressed files (images, text blobs) and how many entries point at each
+CREATE TABLE IF NOT EXISTS image_refs (
+    path      TEXT PRIMARY KEY,
+    ref_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS entries_image_ref_ai AFTER INSERT ON clipboard_entries
+WHEN new.image_path IS NOT NULL BEGIN
+    INSERT INTO image_refs(path, ref_count) VALUES (new.image_path, 1)
+    ON CONFLICT(path) DO UPDATE SET ref_count = ref_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_image_ref_ad AFTER DELETE ON clipboard_entries
+WHEN old.image_path IS NOT NULL BEGIN
+    UPDATE image_refs SET ref_count = ref_count - 1 WHERE path = old.image_path;
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_blob_ref_ai AFTER INSERT ON clipboard_entries
+WHEN new.content_blob IS NOT NULL BEGIN
+    INSERT INTO image_refs(path, ref_count) VALUES (new.content_blob, 1)
+    ON CONFLICT(path) DO UPDATE SET ref_count = ref_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_blob_ref_ad AFTER DELETE ON clipboard_entries
+WHEN old.content_blob IS NOT NULL BEGIN
+    UPDATE image_refs SET ref_count = ref_count - 1 WHERE path = old.content_blob;
+END;
+
+-- Files whose last reference went away; drained by CleanupManager
+CREATE TABLE IF NOT EXISTS image_gc_queue (
+    path      TEXT PRIMARY KEY,
+    queued_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TRIGGER IF NOT EXISTS image_refs_released AFTER UPDATE OF ref_count ON image_refs
+WHEN new.ref_count <= 0 BEGIN
+    INSERT OR IGNORE INTO image_gc_queue(path) VALUES (new.path);
+END;
+
+-- Every format captured with an entry (RTF, PNG, app-specific...), stored
+-- once per distinct content and fetched only at paste time
+CREATE TABLE IF NOT EXISTS format_blobs (
+    hash       TEXT PRIMARY KEY,
+    data       BLOB NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    size       INTEGER NOT NULL,
+    ref_count  INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS clipboard_formats (
+    entry_id    INTEGER NOT NULL REFERENCES clipboard_entries(id) ON DELETE CASCADE,
+    position    INTEGER NOT NULL,
+    format_name TEXT NOT NULL,
+    blob_hash   TEXT NOT NULL,
+    PRIMARY KEY (entry_id, position)
+);
+
+CREATE TRIGGER IF NOT EXISTS formats_blob_ref_ai AFTER INSERT ON clipboard_formats BEGIN
+    UPDATE format_blobs SET ref_count = ref_count + 1 WHERE hash = new.blob_hash;
+END;
+
+CREATE TRIGGER IF NOT EXISTS formats_blob_ref_ad AFTER DELETE ON clipboard_formats BEGIN
+    UPDATE format_blobs SET ref_count = ref_count - 1 WHERE hash = old.blob_hash;
+END;
+
+CREATE TRIGGER IF NOT EXISTS format_blobs_released AFTER UPDATE OF ref_count ON format_blobs
+WHEN new.ref_count <= 0 BEGIN
+    DELETE FROM format_blobs WHERE hash = new.hash;
+END;
+
+CREATE TABLE IF NOT EXISTS blacklisted_apps (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS app_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
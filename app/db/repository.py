@@ -1,21 +1,37 @@
 """CRUD operations + FTS5 search for clipboard entries."""
 
+import threading
+import zlib
 from dataclasses import dataclass, field
 from typing import Optional, List
 
+from app.constants import ImageState
+from app.utils.text_utils import compute_hash
+
+# Format blobs smaller than this are stored as-is
+COMPRESS_MIN_BYTES = 512
+
+# Raw image format — kept only until the image file holds the same payload
+DIB_FORMAT = "CF_DIB"
+# Image states whose file is written (a NULL state predates image_state)
+_IMAGE_STORED_STATES = (ImageState.READY, ImageState.UNOPTIMIZED)
+
 
 @dataclass
 class ClipboardEntry:
     """מייצג רשומה אחת בהיסטוריית הלוח."""
     content_type: str
+    content_subtype: Optional[str] = None
     content_text: Optional[str] = None
     content_html: Optional[str] = None
     content_preview: str = ""
     image_path: Optional[str] = None
     image_width: Optional[int] = None
     image_height: Optional[int] = None
+    image_state: Optional[str] = None
     content_hash: str = ""
     content_size: int = 0
+    content_blob: Optional[str] = None  # full text stored outside the DB (BlobStorage)
     source_app: Optional[str] = None
     source_window: Optional[str] = None
     is_pinned: bool = False
@@ -23,40 +39,175 @@ class ClipboardEntry:
     created_at: Optional[str] = None
     last_used_at: Optional[str] = None
     id: Optional[int] = None
-    # Transient field — not stored in DB
-    _pil_image: object = field(default=None, repr=False)
+    # Transient fields — written elsewhere (raw CF_DIB bytes, oversized text,
+    # every captured clipboard format as (format_name, bytes) in clipboard order,
+    # the capture-path latency trace)
+    _image_data: object = field(default=None, repr=False)
+    _blob_text: Optional[str] = field(default=None, repr=False)
+    _formats: object = field(default=None, repr=False)
+    _trace: object = field(default=None, repr=False)
+
+
+# Columns needed to render a row in the list — everything except the
+# (potentially large) text/html payloads.
+SUMMARY_COLUMNS = (
+    "id, content_type, content_subtype, content_preview, image_path, image_width, image_height, "
+    "image_state, content_hash, content_size, content_blob, source_app, source_window, is_pinned, "
+    "is_favorite, created_at, last_used_at"
+)
+
+
+# Entry fields that leave the process (CLI / IPC JSON); text and html only on request
+PUBLIC_FIELDS = (
+    "id", "content_type", "content_subtype", "content_preview", "content_size",
+    "image_path", "image_width", "image_height", "source_app", "source_window",
+    "is_pinned", "is_favorite", "created_at", "last_used_at",
+)
+
+
+def entry_to_dict(entry, full=False):
+    """רשומה כ-dict שניתן לסדר ל-JSON (בלי שדות פנימיים)."""
+    data = {name: getattr(entry, name) for name in PUBLIC_FIELDS}
+    if full:
+        data["content_text"] = entry.content_text
+        data["content_html"] = entry.content_html
+    return data
+
+
+class ChangeKind:
+    INSERTED = "inserted"
+    DELETED = "deleted"
+    PINNED = "pinned"
+    BUMPED = "bumped"
+    EVICTED = "evicted"
+    UPDATED = "updated"
+
+
+@dataclass
+class ChangeEvent:
+    """שינוי ב-DB שנשלח למנויים — סוג השינוי + סיכומי השורות שהושפעו."""
+    kind: str
+    entries: List[ClipboardEntry]
+
+    @property
+    def ids(self) -> List[int]:
+        return [e.id for e in self.entries]
 
 
 class ClipboardRepository:
     def __init__(self, db):
         self._db = db
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+
+    # --- Change events ---
+
+    def subscribe(self, callback):
+        """
+        רישום מנוי לאירועי שינוי. callback(ChangeEvent) נקרא ב-thread
+        שביצע את השינוי — על המנוי להעביר ל-thread שלו בעצמו.
+        """
+        with self._subscribers_lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._subscribers_lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _emit(self, kind, entries):
+        if not entries:
+            return
+        event = ChangeEvent(kind=kind, entries=entries)
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                pass
 
     def insert(self, entry: ClipboardEntry) -> int:
         conn = self._db.get_connection()
-        cursor = conn.execute(
+        row = conn.execute(
             """INSERT INTO clipboard_entries
-               (content_type, content_text, content_html, content_preview,
-                image_path, image_width, image_height, content_hash,
-                content_size, source_app, source_window, is_pinned, is_favorite)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+               (content_type, content_subtype, content_text, content_html,
+                content_preview, image_path, image_width, image_height, image_state,
+                content_hash, content_size, content_blob, source_app, source_window,
+                is_pinned, is_favorite)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               RETURNING id, created_at""",
             (
                 entry.content_type,
+                entry.content_subtype,
                 entry.content_text,
                 entry.content_html,
                 entry.content_preview,
                 entry.image_path,
                 entry.image_width,
                 entry.image_height,
+                entry.image_state,
                 entry.content_hash,
                 entry.content_size,
+                entry.content_blob,
                 entry.source_app,
                 entry.source_window,
                 int(entry.is_pinned),
                 int(entry.is_favorite),
             ),
-        )
+        ).fetchone()
+        if entry._formats:
+            formats, entry._formats = entry._formats, None
+            self._insert_formats(conn, row["id"], formats, entry)
         conn.commit()
-        return cursor.lastrowid
+        entry.id = row["id"]
+        entry.created_at = row["created_at"]
+        self._emit(ChangeKind.INSERTED, [entry])
+        return entry.id
+
+    @staticmethod
+    def _insert_formats(conn, entry_id, formats, entry=None):
+        """
+        שמירת כל פורמטי הלוח של רשומה — blob זהה נשמר פעם אחת (לפי hash).
+        CF_DIB של תמונה: ה-hash כבר חושב בקליטה (content_hash), והוא נשמר רק
+        כל עוד קובץ התמונה עוד לא נכתב (לקידוד מחדש אחרי קריסה).
+        """
+        is_image = entry is not None and entry.content_type == "image"
+        for position, (format_name, data) in enumerate(formats):
+            if format_name == DIB_FORMAT and is_image:
+                if entry.image_state in _IMAGE_STORED_STATES:
+                    continue  # the image file already holds this payload
+                view = memoryview(data)
+                digest = entry.content_hash or compute_hash(view)
+            else:
+                view = memoryview(data)
+                digest = compute_hash(view)
+            known = conn.execute(
+                "SELECT 1 FROM format_blobs WHERE hash = ?", (digest,)
+            ).fetchone()
+            if not known:
+                stored, compressed = _pack(view)
+                conn.execute(
+                    """INSERT INTO format_blobs(hash, data, compressed, size)
+                       VALUES (?, ?, ?, ?)""",
+                    (digest, stored, int(compressed), len(view)),
+                )
+            conn.execute(
+                """INSERT OR IGNORE INTO clipboard_formats
+                   (entry_id, position, format_name, blob_hash) VALUES (?, ?, ?, ?)""",
+                (entry_id, position, format_name, digest),
+            )
+
+    def get_formats(self, entry_id):
+        """כל הפורמטים שנשמרו לרשומה — [(format_name, bytes)] בסדר המקורי בלוח."""
+        conn = self._db.get_connection()
+        rows = conn.execute(
+            """SELECT cf.format_name, fb.data, fb.compressed
+               FROM clipboard_formats cf JOIN format_blobs fb ON fb.hash = cf.blob_hash
+               WHERE cf.entry_id = ? ORDER BY cf.position""",
+            (entry_id,),
+        ).fetchall()
+        return [(r["format_name"], _unpack(r["data"], r["compressed"])) for r in rows]
 
     def get_recent(self, limit=50, offset=0) -> List[ClipboardEntry]:
         conn = self._db.get_connection()
@@ -69,7 +220,7 @@ class ClipboardRepository:
         return [self._row_to_entry(r) for r in rows]
 
     def search(self, query, content_type=None, date_from=None, date_to=None,
-               limit=50, offset=0) -> List[ClipboardEntry]:
+               limit=50, offset=0, content_subtype=None) -> List[ClipboardEntry]:
         conn = self._db.get_connection()
 
         if query and query.strip():
@@ -86,6 +237,9 @@ class ClipboardRepository:
         if content_type:
             sql += " AND content_type = ?"
             params.append(content_type)
+        if content_subtype:
+            sql += " AND content_subtype = ?"
+            params.append(content_subtype)
         if date_from:
             sql += " AND created_at >= ?"
             params.append(date_from)
@@ -99,6 +253,13 @@ class ClipboardRepository:
         rows = conn.execute(sql, params).fetchall()
         return [self._row_to_entry(r) for r in rows]
 
+    def interrupt(self, thread_id):
+        """
+        ביטול שאילתה שרצה כרגע ב-thread אחר (למשל חיפוש שהוחלף בחדש) —
+        שם היא נכשלת ב-sqlite3.OperationalError("interrupted").
+        """
+        self._db.interrupt(thread_id)
+
     def get_by_id(self, entry_id) -> Optional[ClipboardEntry]:
         conn = self._db.get_connection()
         row = conn.execute(
@@ -106,39 +267,91 @@ class ClipboardRepository:
         ).fetchone()
         return self._row_to_entry(row) if row else None
 
+    def get_text_head(self, entry_id, max_chars) -> Optional[str]:
+        """תחילת הטקסט של רשומה (substr ב-SQL — בלי לקרוא את כולו), למשל ל-tooltip."""
+        conn = self._db.get_connection()
+        row = conn.execute(
+            "SELECT substr(content_text, 1, ?) AS head FROM clipboard_entries WHERE id = ?",
+            (max_chars, entry_id),
+        ).fetchone()
+        return row["head"] if row else None
+
     def delete(self, entry_id):
         conn = self._db.get_connection()
-        conn.execute("DELETE FROM clipboard_entries WHERE id = ?", (entry_id,))
+        rows = conn.execute(
+            f"DELETE FROM clipboard_entries WHERE id = ? RETURNING {SUMMARY_COLUMNS}",
+            (entry_id,),
+        ).fetchall()
         conn.commit()
+        self._emit(ChangeKind.DELETED, [self._row_to_entry(r) for r in rows])
 
     def delete_all(self):
         conn = self._db.get_connection()
-        conn.execute("DELETE FROM clipboard_entries WHERE is_pinned = 0")
+        rows = conn.execute(
+            f"DELETE FROM clipboard_entries WHERE is_pinned = 0 RETURNING {SUMMARY_COLUMNS}"
+        ).fetchall()
         conn.commit()
+        self._emit(ChangeKind.DELETED, [self._row_to_entry(r) for r in rows])
 
     def pin(self, entry_id):
-        conn = self._db.get_connection()
-        conn.execute(
-            "UPDATE clipboard_entries SET is_pinned = 1 WHERE id = ?", (entry_id,)
-        )
-        conn.commit()
+        self._set_pinned(entry_id, True)
 
     def unpin(self, entry_id):
+        self._set_pinned(entry_id, False)
+
+    def _set_pinned(self, entry_id, pinned):
         conn = self._db.get_connection()
-        conn.execute(
-            "UPDATE clipboard_entries SET is_pinned = 0 WHERE id = ?", (entry_id,)
-        )
+        rows = conn.execute(
+            f"""UPDATE clipboard_entries SET is_pinned = ? WHERE id = ?
+                RETURNING {SUMMARY_COLUMNS}""",
+            (int(pinned), entry_id),
+        ).fetchall()
         conn.commit()
+        self._emit(ChangeKind.PINNED, [self._row_to_entry(r) for r in rows])
 
     def update_last_used(self, entry_id):
         conn = self._db.get_connection()
-        conn.execute(
-            """UPDATE clipboard_entries
-               SET last_used_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
-               WHERE id = ?""",
+        rows = conn.execute(
+            f"""UPDATE clipboard_entries
+                SET last_used_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')
+                WHERE id = ?
+                RETURNING {SUMMARY_COLUMNS}""",
             (entry_id,),
-        )
+        ).fetchall()
         conn.commit()
+        self._emit(ChangeKind.BUMPED, [self._row_to_entry(r) for r in rows])
+
+    def set_image_state(self, image_path, state):
+        """
+        עדכון מצב קובץ התמונה (למשל pending → ready כשהקידוד הסתיים)
+        בכל הרשומות שמפנות לאותו קובץ.
+        """
+        conn = self._db.get_connection()
+        rows = conn.execute(
+            f"""UPDATE clipboard_entries SET image_state = ? WHERE image_path = ?
+                RETURNING {SUMMARY_COLUMNS}""",
+            (state, image_path),
+        ).fetchall()
+        if state in _IMAGE_STORED_STATES and rows:
+            # The file now holds the image — drop the raw copy kept for recovery
+            placeholders = ",".join("?" * len(rows))
+            conn.execute(
+                f"""DELETE FROM clipboard_formats
+                    WHERE format_name = ? AND entry_id IN ({placeholders})""",
+                [DIB_FORMAT] + [r["id"] for r in rows],
+            )
+        conn.commit()
+        self._emit(ChangeKind.UPDATED, [self._row_to_entry(r) for r in rows])
+
+    def get_by_image_state(self, state, limit=50, created_before=None) -> List[ClipboardEntry]:
+        conn = self._db.get_connection()
+        sql = f"SELECT {SUMMARY_COLUMNS} FROM clipboard_entries WHERE image_state = ?"
+        params = [state]
+        if created_before:
+            sql += " AND created_at < ?"
+            params.append(created_before)
+        rows = conn.execute(sql + " ORDER BY id LIMIT ?", params + [limit]).fetchall()
+        return [self._row_to_entry(r) for r in rows]
 
     def is_duplicate(self, content_hash) -> bool:
         """בדיקה אם הרשומה האחרונה זהה (deduplication)."""
@@ -154,52 +367,194 @@ class ClipboardRepository:
         row = conn.execute("SELECT COUNT(*) as cnt FROM clipboard_entries").fetchone()
         return row["cnt"]
 
+    def get_stats(self):
+        """סיכום ההיסטוריה: מספר רשומות, לפי סוג ותת-סוג, מוצמדות, טווח תאריכים."""
+        conn = self._db.get_connection()
+        totals = conn.execute(
+            """SELECT COUNT(*) AS cnt, SUM(is_pinned) AS pinned,
+                      COALESCE(SUM(content_size), 0) AS size,
+                      MIN(created_at) AS oldest, MAX(created_at) AS newest
+               FROM clipboard_entries"""
+        ).fetchone()
+        by_type = {
+            r["content_type"]: r["cnt"] for r in conn.execute(
+                "SELECT content_type, COUNT(*) AS cnt FROM clipboard_entries GROUP BY content_type"
+            )
+        }
+        by_subtype = {
+            r["content_subtype"]: r["cnt"] for r in conn.execute(
+                """SELECT content_subtype, COUNT(*) AS cnt FROM clipboard_entries
+                   WHERE content_subtype IS NOT NULL GROUP BY content_subtype"""
+            )
+        }
+        return {
+            "count": totals["cnt"],
+            "pinned": totals["pinned"] or 0,
+            "content_bytes": totals["size"],
+            "oldest": totals["oldest"],
+            "newest": totals["newest"],
+            "by_type": by_type,
+            "by_subtype": by_subtype,
+        }
+
+    def get_after_id(self, last_id, limit=500) -> List[ClipboardEntry]:
+        """רשומות לפי סדר id, אחרי last_id — מעבר על כל ההיסטוריה במנות (ייצוא)."""
+        conn = self._db.get_connection()
+        rows = conn.execute(
+            "SELECT * FROM clipboard_entries WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, limit),
+        ).fetchall()
+        return [self._row_to_entry(r) for r in rows]
+
     def delete_oldest(self, keep_count) -> int:
         """מחיקת רשומות ישנות מעבר למגבלה (ללא pinned)."""
         conn = self._db.get_connection()
-        cursor = conn.execute(
-            """DELETE FROM clipboard_entries
-               WHERE is_pinned = 0 AND id NOT IN (
-                   SELECT id FROM clipboard_entries
-                   ORDER BY created_at DESC LIMIT ?
-               )""",
+        rows = conn.execute(
+            f"""DELETE FROM clipboard_entries
+                WHERE is_pinned = 0 AND id NOT IN (
+                    SELECT id FROM clipboard_entries
+                    ORDER BY created_at DESC LIMIT ?
+                )
+                RETURNING {SUMMARY_COLUMNS}""",
             (keep_count,),
-        )
+        ).fetchall()
         conn.commit()
-        return cursor.rowcount
+        self._emit(ChangeKind.EVICTED, [self._row_to_entry(r) for r in rows])
+        return len(rows)
 
     def delete_older_than(self, date_str) -> int:
         """מחיקת רשומות ישנות מתאריך מסוים (ללא pinned)."""
         conn = self._db.get_connection()
-        cursor = conn.execute(
-            """DELETE FROM clipboard_entries
-               WHERE is_pinned = 0 AND created_at < ?""",
+        rows = conn.execute(
+            f"""DELETE FROM clipboard_entries
+                WHERE is_pinned = 0 AND created_at < ?
+                RETURNING {SUMMARY_COLUMNS}""",
             (date_str,),
-        )
+        ).fetchall()
         conn.commit()
-        return cursor.rowcount
+        self._emit(ChangeKind.EVICTED, [self._row_to_entry(r) for r in rows])
+        return len(rows)
 
-    def get_image_paths(self) -> List[str]:
-        """רשימת כל נתיבי התמונות ב-DB."""
+    def drain_image_gc_queue(self, limit=200) -> Optional[List[str]]:
+        """
+        שליפת קבצים מתור המחיקה. מחזיר רק נתיבים שעדיין אין אליהם הפניות —
+        תמונה שהועתקה שוב בינתיים נשארת. מחזיר None כשהתור ריק.
+        """
         conn = self._db.get_connection()
+        queued = [r["path"] for r in conn.execute(
+            "SELECT path FROM image_gc_queue ORDER BY queued_at LIMIT ?", (limit,)
+        )]
+        if not queued:
+            return None
+        placeholders = ",".join("?" * len(queued))
         rows = conn.execute(
-            "SELECT image_path FROM clipboard_entries WHERE image_path IS NOT NULL"
+            f"""DELETE FROM image_refs WHERE ref_count <= 0 AND path IN ({placeholders})
+                RETURNING path""",
+            queued,
         ).fetchall()
-        return [r["image_path"] for r in rows]
+        conn.execute(f"DELETE FROM image_gc_queue WHERE path IN ({placeholders})", queued)
+        conn.commit()
+        return [r["path"] for r in rows]
+
+    def is_path_referenced(self, path) -> bool:
+        """האם יש רשומה שמפנה לקובץ (תמונה / blob טקסט) — בדיקה אחרונה לפני מחיקה."""
+        conn = self._db.get_connection()
+        row = conn.execute(
+            "SELECT 1 FROM image_refs WHERE path = ? AND ref_count > 0", (path,)
+        ).fetchone()
+        return row is not None
+
+    def get_referenced_image_paths(self, prefix=None, after=None, limit=None) -> List[str]:
+        """
+        נתיבי תמונות עם הפניות — כולם, או רק אלו שמתחילים ב-prefix.
+        after/limit — מנה לפי סדר הנתיב, שמתחילה אחרי after.
+        """
+        conn = self._db.get_connection()
+        sql = "SELECT path FROM image_refs WHERE ref_count > 0"
+        params = []
+        if prefix is not None:
+            # Range scan on the primary key instead of LIKE
+            sql += " AND path >= ? AND path < ?"
+            params += [prefix, prefix + "\uffff"]
+        if after:
+            sql += " AND path > ?"
+            params.append(after)
+        if limit is not None:
+            sql += " ORDER BY path LIMIT ?"
+            params.append(limit)
+        return [r["path"] for r in conn.execute(sql, params).fetchall()]
+
+    def get_image_paths_with_hash(self):
+        conn = self._db.get_connection()
+        return [
+            (r["image_path"], r["content_hash"]) for r in conn.execute(
+                """SELECT DISTINCT image_path, content_hash FROM clipboard_entries
+                   WHERE image_path IS NOT NULL"""
+            )
+        ]
+
+    def relink_image(self, old_path, new_path):
+        """החלפת נתיב תמונה בכל הרשומות (הגירת מבנה האחסון)."""
+        conn = self._db.get_connection()
+        rows = conn.execute(
+            f"""UPDATE clipboard_entries SET image_path = ? WHERE image_path = ?
+                RETURNING {SUMMARY_COLUMNS}""",
+            (new_path, old_path),
+        ).fetchall()
+        conn.commit()
+        self._emit(ChangeKind.UPDATED, [self._row_to_entry(r) for r in rows])
+
+    def rebuild_image_refs(self):
+        """חישוב מחדש של ספירת ההפניות מתוך clipboard_entries."""
+        conn = self._db.get_connection()
+        conn.execute("DELETE FROM image_refs")
+        conn.execute(
+            """INSERT INTO image_refs(path, ref_count)
+               SELECT path, COUNT(*) FROM (
+                   SELECT image_path AS path FROM clipboard_entries
+                   WHERE image_path IS NOT NULL
+                   UNION ALL
+                   SELECT content_blob FROM clipboard_entries
+                   WHERE content_blob IS NOT NULL
+               ) GROUP BY path"""
+        )
+        conn.commit()
+
+    def delete_meta(self, key):
+        conn = self._db.get_connection()
+        conn.execute("DELETE FROM app_meta WHERE key = ?", (key,))
+        conn.commit()
+
+    def get_meta(self, key, default=None):
+        conn = self._db.get_connection()
+        row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key, value):
+        conn = self._db.get_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO app_meta(key, value) VALUES (?, ?)", (key, value)
+        )
+        conn.commit()
 
     @staticmethod
     def _row_to_entry(row) -> ClipboardEntry:
+        # Summary rows (SUMMARY_COLUMNS) carry no text/html payload
+        keys = row.keys()
         return ClipboardEntry(
             id=row["id"],
             content_type=row["content_type"],
-            content_text=row["content_text"],
-            content_html=row["content_html"],
+            content_subtype=row["content_subtype"],
+            content_text=row["content_text"] if "content_text" in keys else None,
+            content_html=row["content_html"] if "content_html" in keys else None,
             content_preview=row["content_preview"],
             image_path=row["image_path"],
             image_width=row["image_width"],
             image_height=row["image_height"],
+            image_state=row["image_state"],
             content_hash=row["content_hash"],
             content_size=row["content_size"],
+            content_blob=row["content_blob"],
             source_app=row["source_app"],
             source_window=row["source_window"],
             is_pinned=bool(row["is_pinned"]),
@@ -207,3 +562,16 @@ class ClipboardRepository:
             created_at=row["created_at"],
             last_used_at=row["last_used_at"],
         )
+
+
+def _pack(view):
+    """דחיסת blob (zlib) רק כשזה משתלם. מחזיר (נתונים, האם_דחוס)."""
+    if len(view) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(view, 1)
+        if len(packed) < len(view) * 0.9:
+            return packed, True
+    return view.tobytes(), False
+
+
+def _unpack(data, compressed):
+    return zlib.decompress(data) if compressed else bytes(data)
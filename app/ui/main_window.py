@@ -2,13 +2,17 @@
 
 import ctypes
 import ctypes.wintypes
+import sqlite3
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 
 from app.ui import styles
 from app.ui.widgets.search_bar import SearchBar
 from app.ui.widgets.clip_list import ClipList
 from app.ui.widgets.settings_panel import SettingsPanel
 from app.constants import STRINGS
+from app.db.repository import ChangeKind
 
 DWMWA_WINDOW_CORNER_PREFERENCE = 33
 DWMWCP_ROUND = 2
@@ -17,14 +21,37 @@ DWMWCP_ROUND = 2
 class MainWindow(tk.Toplevel):
     """חלון ראשי צף ללא מסגרת עם ערכת נושא כהה."""
 
-    def __init__(self, master, repo, config, image_storage, on_paste):
+    # Rows per search/scroll page (also how far ahead ClipList prefetches)
+    PAGE_SIZE = 200
+
+    def __init__(self, master, repo, config, image_storage, on_paste, tracer=None):
         super().__init__(master)
         self._repo = repo
+        self._tracer = tracer  # finishes hotkey and capture traces (render/paint stages)
         self._config = config
         self._image_storage = image_storage
         self._on_paste = on_paste
         self._visible = False
         self._settings_open = False
+        # Pre-warmed: the list stays loaded (and updated) while hidden, show() is instant
+        self._prewarm = config.get("window.prewarm", True)
+        self._list_ready = False
+
+        # Current list model — kept in sync with repository change events
+        self._entries = []
+        self._query = ""
+        self._content_type = None
+        self._content_subtype = None
+
+        # Searches and infinite-scroll pages run on one worker thread
+        self._page_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="list-pages")
+        self._generation = 0      # bumped whenever the query changes
+        self._has_more = False
+        self._loading = False
+        # The query running on the worker right now — interrupted when superseded
+        self._running_lock = threading.Lock()
+        self._running_generation = None
+        self._running_thread = None
 
         self.withdraw()
 
@@ -43,6 +70,9 @@ class MainWindow(tk.Toplevel):
             self,
             image_storage=image_storage,
             on_item_click=self._on_item_clicked,
+            on_near_end=self._load_more,
+            prefetch_rows=self.PAGE_SIZE,
+            load_text=repo.get_text_head,
         )
         self._clip_list.pack(fill="both", expand=True)
 
@@ -87,6 +117,9 @@ class MainWindow(tk.Toplevel):
         # Apply Windows 11 rounded corners
         self.after(50, self._apply_rounded_corners)
 
+        if self._prewarm:
+            self.refresh_list()  # loads on the worker — ready before the first hotkey
+
     def _build_title_bar(self):
         bar = tk.Frame(self, bg=styles.BG_SURFACE, height=styles.TITLE_BAR_HEIGHT)
         bar.pack(fill="x", side="top")
@@ -225,9 +258,11 @@ class MainWindow(tk.Toplevel):
     def _on_window_release(self, event):
         self._resize_edge = None
 
-    def show(self):
+    def show(self, trace=None):
         if self._visible:
             return
+        if trace:
+            trace.mark("dispatch")  # hotkey thread -> Tk thread
 
         scale = self._config.get("ui_scale", 100) / 100.0
         base_w = self._config.get("window.width", styles.WINDOW_WIDTH)
@@ -245,43 +280,219 @@ class MainWindow(tk.Toplevel):
         y = max(10, y)
 
         self.geometry(f"{width}x{height}+{x}+{y}")
+
+        warm = self._prewarm and self._list_ready
+        if warm:
+            self._clip_list.select(0)  # back to the top of the cached list
+        else:
+            self._search_bar.clear()
+            self.refresh_list()
+
         self.deiconify()
-        self._fade_in()
+        if self._config.get("window.fade", True):
+            self._fade_in()
+        else:
+            self.attributes("-alpha", self._config.get("window.opacity", 0.97))
         self._visible = True
-
-        self._search_bar.clear()
-        self.refresh_list()
         self.focus_force()
+        if trace:
+            trace.mark("show")
+            # Idle callbacks run after the redraws queued by the map
+            self.after_idle(self._finish_paint_trace, trace)
+
+        if warm:
+            # Events kept the list current while hidden; re-query once painted
+            # to catch anything missed, without moving the selection
+            self.after(50, self._reconcile, self._generation)
+
+    def _finish_paint_trace(self, trace):
+        trace.mark("paint")
+        self._tracer.finish(trace)
+
+    def _reconcile(self, generation):
+        if generation != self._generation or not self._visible:
+            return  # the user already searched/filtered — that query wins
+        self.refresh_list(reconcile=True)
 
     def hide(self):
         if not self._visible:
             return
-        self._fade_out()
+        if self._config.get("window.fade", True):
+            self._fade_out()
+        else:
+            self.attributes("-alpha", 0.0)
+            self.withdraw()
         self._visible = False
 
-    def toggle(self):
+        if self._prewarm and (self._query or self._content_type or self._content_subtype):
+            # The next show() reuses this list — go back to the unfiltered view now
+            self._search_bar.clear()
+            self.refresh_list()
+
+    def toggle(self, trace=None):
         if self._visible:
             self.hide()
         else:
-            self.show()
+            self.show(trace)
+
+    def refresh_list(self, query="", content_type=None, content_subtype=None, reconcile=False):
+        """
+        הרצת השאילתה ב-worker. כל שאילתה מתויגת ב-generation: שאילתה ישנה
+        שעוד רצה נקטעת, ותוצאות שמגיעות אחרי שהוחלפה נזרקות.
+        reconcile=True — התוצאה מוחלת במקום (הבחירה והגלילה נשמרות).
+        """
+        self._query = query
+        self._content_type = content_type
+        self._content_subtype = content_subtype
+        self._generation += 1
+        self._loading = True  # no page prefetch until the first page lands
+        self._has_more = False
+        self._interrupt_stale(self._generation)
+        self._page_executor.submit(
+            self._run_page, self._generation, query, content_type, content_subtype, 0, reconcile
+        )
 
-    def refresh_list(self, query="", content_type=None):
-        if query:
-            entries = self._repo.search(query, content_type=content_type, limit=100)
-        else:
-            entries = self._repo.get_recent(limit=100)
-            if content_type:
-                entries = [e for e in entries if e.content_type == content_type]
+    def _interrupt_stale(self, generation):
+        with self._running_lock:
+            if self._running_generation is not None and self._running_generation < generation:
+                self._repo.interrupt(self._running_thread)
+
+    def _fetch_page(self, query, content_type, content_subtype, offset):
+        if query or content_type or content_subtype:
+            # Type/subtype filters are indexed columns — filter in SQL
+            return self._repo.search(
+                query, content_type=content_type, content_subtype=content_subtype,
+                limit=self.PAGE_SIZE, offset=offset,
+            )
+        return self._repo.get_recent(limit=self.PAGE_SIZE, offset=offset)
+
+    def _load_more(self):
+        """ClipList מתקרב לסוף הרשומות הטעונות — טעינת העמוד הבא ברקע."""
+        if self._loading or not self._has_more:
+            return
+        self._loading = True
+        self._page_executor.submit(
+            self._run_page, self._generation, self._query, self._content_type,
+            self._content_subtype, len(self._entries),
+        )
 
+    def _run_page(self, generation, query, content_type, content_subtype, offset,
+                  reconcile=False):
+        # Worker thread — the repository gives it its own SQLite connection
+        if generation != self._generation:
+            return  # superseded while queued — keystrokes don't pile up
+        with self._running_lock:
+            self._running_generation = generation
+            self._running_thread = threading.get_ident()
+        try:
+            entries = self._fetch_page(query, content_type, content_subtype, offset)
+        except sqlite3.OperationalError:
+            entries = None  # interrupted by a newer query (or a locked DB)
+        except Exception:
+            entries = None
+        finally:
+            with self._running_lock:
+                self._running_generation = None
+        try:
+            self.after(0, self._on_page_loaded, generation, offset, entries, reconcile)
+        except (RuntimeError, tk.TclError):
+            pass  # window destroyed
+
+    def _on_page_loaded(self, generation, offset, entries, reconcile=False):
+        if generation != self._generation:
+            return  # the query changed while this page was loading
+        self._loading = False
+        if entries is None:
+            return
+        self._has_more = len(entries) == self.PAGE_SIZE
+        if offset == 0:
+            self._list_ready = True
+            if reconcile:
+                self._entries = entries
+                self._clip_list.update_entries(entries)
+                self._update_status()
+            else:
+                self._set_entries(entries)
+            return
+        # Rows inserted since the first page shift the offsets — skip repeats
+        known = {e.id for e in self._entries}
+        page = [e for e in entries if e.id not in known]
+        if page:
+            self._entries = self._entries + page
+            self._clip_list.append_entries(page)
+            self._update_status()
+
+    def _matches_filter(self, entry):
+        if self._content_type and entry.content_type != self._content_type:
+            return False
+        if self._content_subtype and entry.content_subtype != self._content_subtype:
+            return False
+        return True
+
+    def _set_entries(self, entries):
+        self._entries = entries
         self._clip_list.set_entries(entries)
+        self._update_status()
+
+    def _update_status(self):
+        self._status_var.set(STRINGS["items_count"].format(count=len(self._entries)))
+
+    def on_repository_event(self, event):
+        """
+        נקרא ב-thread של Tk (דרך root.after) על כל שינוי ב-DB.
+        מחיל את השינוי על הרשימה הקיימת במקום לשאול את ה-DB מחדש.
+        """
+        traces = []
+        if self._tracer:
+            for e in event.entries:
+                if e._trace:
+                    traces.append(e._trace)
+                    e._trace = None  # finished once, here
+                    traces[-1].mark("notify")  # committed -> Tk thread
+        try:
+            self._apply_event(event)
+        finally:
+            if traces:
+                for trace in traces:
+                    trace.mark("render")
+                    self._tracer.finish(trace)
+
+    def _apply_event(self, event):
+        if not self._visible and not self._prewarm:
+            return  # show() reloads the list anyway
+
+        entries = list(self._entries)
+        if event.kind == ChangeKind.INSERTED:
+            # FTS matching can't be evaluated locally — new rows only
+            # join an unfiltered (or type-filtered) list.
+            if self._query:
+                return
+            # A page loaded just after the commit may already hold the row
+            known = {e.id for e in entries}
+            entries.extend(
+                e for e in event.entries if e.id not in known and self._matches_filter(e)
+            )
+        elif event.kind in (ChangeKind.DELETED, ChangeKind.EVICTED):
+            removed = set(event.ids)
+            entries = [e for e in entries if e.id not in removed]
+        elif event.kind in (ChangeKind.PINNED, ChangeKind.BUMPED, ChangeKind.UPDATED):
+            # Summaries carry no text payload — keep the one already loaded
+            changed = {e.id: e for e in event.entries}
+            for i, e in enumerate(entries):
+                if e.id in changed:
+                    summary = changed[e.id]
+                    summary.content_text = e.content_text
+                    summary.content_html = e.content_html
+                    entries[i] = summary
+        else:
+            return
 
-        count = len(entries)
-        self._status_var.set(STRINGS["items_count"].format(count=count))
-
-    def on_new_entry_added(self):
-        """נקרא מ-thread אחר דרך root.after() כשנוסף פריט חדש."""
-        if self._visible:
-            self.refresh_list()
+        # Same ordering as the repository queries
+        entries.sort(key=lambda e: (e.is_pinned, e.created_at or ""), reverse=True)
+        self._entries = entries
+        # In place — keeps the selection and scroll position
+        self._clip_list.update_entries(self._entries)
+        self._update_status()
 
     def show_settings(self):
         if self._settings_open:
@@ -300,8 +511,8 @@ class MainWindow(tk.Toplevel):
     def _on_settings_closed(self):
         self._settings_open = False
 
-    def _on_search_changed(self, query, content_type):
-        self.refresh_list(query, content_type)
+    def _on_search_changed(self, query, content_type, content_subtype=None):
+        self.refresh_list(query, content_type, content_subtype)
 
     def _on_item_clicked(self, entry):
         self._do_paste(entry)
@@ -324,10 +535,8 @@ class MainWindow(tk.Toplevel):
     def _delete_selected(self):
         entry = self._clip_list.get_selected_entry()
         if entry and entry.id:
+            # The image file (if unreferenced now) is freed by the cleanup GC
             self._repo.delete(entry.id)
-            if entry.image_path:
-                self._image_storage.delete(entry.image_path)
-            self.refresh_list()
 
     def _on_focus_out(self, event):
         if self._settings_open:
@@ -0,0 +1,79 @@
+"""שעון משותף לתוויות זמן יחסי ("לפני 5 דקות") בשורות הרשימה."""
+
+import time
+import tkinter as tk
+
+from app.utils.date_utils import parse_epoch, relative_bucket
+
+# Never tick more often than this, even when several labels are due
+MIN_TICK_MS = 250
+
+
+class RelativeTimeTicker:
+    """
+    טיימר after() אחד לכל התוויות. לכל תווית נשמרים ה-epoch (מפוענח פעם אחת),
+    הטקסט הנוכחי ומועד השינוי הבא שלו; בכל tick מחושבות מחדש רק תוויות
+    שהגיע מועדן, ו-callback נקרא רק אם הטקסט באמת השתנה.
+    """
+
+    def __init__(self, widget):
+        self._widget = widget
+        self._items = {}          # key -> [epoch, text, due, callback]
+        self._timer = None
+        self._timer_due = None
+
+    def track(self, key, timestamp_str, callback):
+        """
+        מעקב אחרי תווית (key — בדרך כלל השורה). מחזיר את הטקסט הנוכחי;
+        callback(text) נקרא ב-thread של Tk כשהטקסט משתנה.
+        """
+        epoch = parse_epoch(timestamp_str)
+        if epoch is None:
+            self._items.pop(key, None)
+            return timestamp_str or ""
+        text, due = self._evaluate(epoch, time.time())
+        self._items[key] = [epoch, text, due, callback]
+        self._schedule(due)
+        return text
+
+    def untrack(self, key):
+        self._items.pop(key, None)
+
+    @staticmethod
+    def _evaluate(epoch, now):
+        text, next_age = relative_bucket(now - epoch)
+        return text, epoch + next_age
+
+    def _schedule(self, due):
+        if self._timer is not None:
+            if self._timer_due <= due:
+                return
+            self._widget.after_cancel(self._timer)
+        delay = max(MIN_TICK_MS, int((due - time.time()) * 1000))
+        try:
+            self._timer = self._widget.after(delay, self._tick)
+            self._timer_due = due
+        except (RuntimeError, tk.TclError):
+            self._timer = None  # window destroyed
+
+    def _tick(self):
+        self._timer = None
+        now = time.time()
+        next_due = None
+        changed = []
+        for item in self._items.values():
+            epoch, text, due, callback = item
+            if due <= now:
+                new_text, due = self._evaluate(epoch, now)
+                item[2] = due
+                if new_text != text:
+                    item[1] = new_text
+                    changed.append((callback, new_text))
+            if next_due is None or due < next_due:
+                next_due = due
+
+        # All label updates in one batch — Tk redraws once
+        for callback, text in changed:
+            callback(text)
+        if next_due is not None:
+            self._schedule(next_due)
@@ -0,0 +1,105 @@
+"""מטמון LRU של thumbnails מפוענחים (PhotoImage) לשורות הרשימה, עם טעינה ברקע."""
+
+import base64
+import os
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ThumbnailRequest:
+    """בקשת טעינה אחת. cancel() — השורה גוללה/עברה לרשומה אחרת."""
+
+    def __init__(self):
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class ThumbnailCache:
+    """
+    טוען את קובץ ה-thumbnail הקטן שנוצר בקליטה ושומר PhotoImage בזיכרון.
+    קריאת הקובץ (או פענוח התמונה המלאה לתמונות ישנות בלי thumbnail) רצה
+    ב-worker pool; רק יצירת ה-PhotoImage רצה ב-thread של Tk, דרך after().
+    """
+
+    def __init__(self, image_storage, capacity=256, workers=2):
+        self._image_storage = image_storage
+        self._capacity = capacity
+        self._items = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+
+    def get(self, relative_path):
+        """PhotoImage מהמטמון בלבד, או None (בלי טעינה)."""
+        photo = self._items.get(relative_path)
+        if photo is not None:
+            self._items.move_to_end(relative_path)
+        return photo
+
+    def request(self, widget, relative_path, size, callback):
+        """
+        טעינה ברקע. callback(photo) נקרא ב-thread של Tk (photo=None אם נכשל),
+        אלא אם הבקשה בוטלה. מחזיר ThumbnailRequest.
+        """
+        request = ThumbnailRequest()
+
+        def on_decoded(future):
+            if request.cancelled or future.cancelled():
+                return
+            try:
+                decoded = future.result()
+            except Exception:
+                decoded = None
+            try:
+                widget.after(0, finish, decoded)
+            except (RuntimeError, tk.TclError):
+                pass  # window destroyed
+
+        def finish(decoded):
+            if request.cancelled:
+                return
+            photo = self._to_photo(decoded)
+            if photo is not None:
+                self._put(relative_path, photo)
+            callback(photo)
+
+        request.future = self._executor.submit(self._decode, relative_path, size)
+        request.future.add_done_callback(on_decoded)
+        return request
+
+    def _put(self, relative_path, photo):
+        self._items[relative_path] = photo
+        if len(self._items) > self._capacity:
+            self._items.popitem(last=False)
+
+    def _decode(self, relative_path, size):
+        # Worker thread — no Tk calls here
+        thumb_path = self._image_storage.get_thumbnail_path(relative_path)
+        if os.path.exists(thumb_path):
+            with open(thumb_path, "rb") as f:
+                return "png", base64.b64encode(f.read())
+
+        # Legacy image without a stored thumbnail (until the backfill runs)
+        thumb = self._image_storage.load_thumbnail(relative_path, size=size)
+        if thumb is None:
+            return None
+        thumb.load()
+        return "pil", thumb
+
+    @staticmethod
+    def _to_photo(decoded):
+        if decoded is None:
+            return None
+        kind, data = decoded
+        if kind == "png":
+            try:
+                # Tk decodes a small PNG natively — no Pillow round trip
+                return tk.PhotoImage(data=data)
+            except tk.TclError:
+                return None
+        from PIL import ImageTk
+        return ImageTk.PhotoImage(data)
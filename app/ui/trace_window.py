@@ -0,0 +1,94 @@
+"""חלון debug — סיכום זמני התגובה (p50/p95/p99) מה-Tracer, וייצוא JSON."""
+
+import tkinter as tk
+
+from app.ui import styles
+from app.constants import STRINGS
+from app.core.tracing import format_summary
+
+REFRESH_MS = 1000
+
+
+class TraceWindow(tk.Toplevel):
+    """
+    מציג את Tracer.summary() ומתרענן כל שנייה כל עוד החלון פתוח.
+    source_stats — SourceDetector.stats (זמן זיהוי אפליקציית המקור ופגיעות במטמון).
+    """
+
+    def __init__(self, master, tracer, dump_path, source_stats=None):
+        super().__init__(master)
+        self._tracer = tracer
+        self._source_stats = source_stats
+        self._dump_path = dump_path
+        self._after_id = None
+
+        self.title(STRINGS["trace_title"])
+        self.configure(bg=styles.BG_SURFACE)
+        self.attributes("-topmost", True)
+        self.protocol("WM_DELETE_WINDOW", self._close)
+
+        self._text = tk.Text(
+            self, bg=styles.BG_PRIMARY, fg=styles.TEXT_PRIMARY,
+            font=("Consolas", styles.FONT_SIZE_SMALL), width=70, height=24,
+            relief="flat", borderwidth=0, highlightthickness=0, padx=8, pady=8,
+        )
+        self._text.pack(fill="both", expand=True)
+
+        btn_frame = tk.Frame(self, bg=styles.BG_SURFACE)
+        btn_frame.pack(fill="x", padx=8, pady=8)
+
+        dump_btn = tk.Label(
+            btn_frame, text=STRINGS["trace_dump"],
+            bg=styles.ACCENT, fg=styles.TEXT_PRIMARY, font=styles.FONT_BOLD,
+            padx=16, pady=6, cursor="hand2",
+        )
+        dump_btn.pack(side="right", padx=(4, 0))
+        dump_btn.bind("<Button-1>", lambda e: self._dump())
+
+        clear_btn = tk.Label(
+            btn_frame, text=STRINGS["trace_clear"],
+            bg=styles.BG_HOVER, fg=styles.TEXT_PRIMARY, font=styles.FONT_NORMAL,
+            padx=16, pady=6, cursor="hand2",
+        )
+        clear_btn.pack(side="right")
+        clear_btn.bind("<Button-1>", lambda e: self._clear())
+
+        self._status = tk.Label(
+            btn_frame, text="", bg=styles.BG_SURFACE, fg=styles.TEXT_SECONDARY,
+            font=styles.FONT_SMALL,
+        )
+        self._status.pack(side="left")
+
+        self._refresh()
+
+    def _refresh(self):
+        self._text.configure(state="normal")
+        self._text.delete("1.0", "end")
+        self._text.insert("end", format_summary(self._tracer.summary()))
+        if self._source_stats:
+            s = self._source_stats()
+            hits = s["cache_hits"] / s["calls"] * 100 if s["calls"] else 0.0
+            self._text.insert(
+                "end",
+                f"\n[source]\n  calls {s['calls']}, cache hits {hits:.1f}%, "
+                f"avg {s['avg_us']:.1f} µs, max {s['max_us']:.1f} µs\n",
+            )
+        self._text.configure(state="disabled")
+        self._after_id = self.after(REFRESH_MS, self._refresh)
+
+    def _dump(self):
+        try:
+            self._tracer.dump_json(self._dump_path)
+            self._status.configure(text=self._dump_path)
+        except OSError as e:
+            self._status.configure(text=str(e))
+
+    def _clear(self):
+        self._tracer.clear()
+        self._status.configure(text="")
+
+    def _close(self):
+        if self._after_id:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        self.destroy()
@@ -11,12 +11,14 @@ from app.constants import STRINGS
 class SystemTrayIcon:
     """אייקון במגש המערכת עם תפריט הקשר."""
 
-    def __init__(self, icon_path, on_show, on_settings, on_pause_toggle, on_exit):
+    def __init__(self, icon_path, on_show, on_settings, on_pause_toggle, on_exit,
+                 on_latency=None):
         self._icon_path = icon_path
         self._on_show = on_show
         self._on_settings = on_settings
         self._on_pause_toggle = on_pause_toggle
         self._on_exit = on_exit
+        self._on_latency = on_latency  # latency debug view (only when tracing is on)
         self._icon = None
         self._paused = False
         self._thread = None
@@ -65,12 +67,17 @@ class SystemTrayIcon:
 
     def _create_menu(self):
         pause_text = STRINGS["tray_resume"] if self._paused else STRINGS["tray_pause"]
-        return pystray.Menu(
+        items = [
             pystray.MenuItem(
                 STRINGS["tray_show"], self._on_show, default=True
             ),
             pystray.MenuItem(STRINGS["tray_settings"], self._on_settings),
             pystray.MenuItem(pause_text, self._on_pause_toggle),
+        ]
+        if self._on_latency:
+            items.append(pystray.MenuItem(STRINGS["tray_latency"], self._on_latency))
+        items += [
             pystray.Menu.SEPARATOR,
             pystray.MenuItem(STRINGS["tray_exit"], self._on_exit),
-        )
+        ]
+        return pystray.Menu(*items)
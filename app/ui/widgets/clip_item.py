@@ -1,172 +1,219 @@
 """Widget עבור שורת פריט בודד בהיסטוריית הלוח."""
 
 import tkinter as tk
-from PIL import ImageTk
 
 from app.ui import styles
-from app.ui.widgets.tooltip import Tooltip
-from app.constants import STRINGS, CONTENT_TYPE_ICONS
+from app.constants import STRINGS, CONTENT_TYPE_ICONS, ImageState
 from app.utils.date_utils import relative_time
+from app.utils.image_storage import THUMBNAIL_SIZE
 
 
 class ClipItem(tk.Frame):
-    """שורת פריט בודד ברשימת ההיסטוריה."""
+    """
+    שורת פריט ברשימת ההיסטוריה. ה-widgets נבנים פעם אחת, ו-bind_entry() מחבר
+    את השורה לרשומה אחרת — ClipList ממחזר כמה שורות לכל הרשימה.
+    """
 
-    def __init__(self, parent, entry, image_storage=None, on_click=None,
-                 on_delete=None, on_pin_toggle=None, index=0, selected=False):
+    def __init__(self, parent, thumbnails=None, ticker=None, on_click=None,
+                 on_delete=None, on_pin_toggle=None, on_hover=None):
         super().__init__(parent, bg=styles.BG_PRIMARY, cursor="hand2")
-        self.entry = entry
+        self.entry = None
         self._on_click = on_click
         self._on_delete = on_delete
         self._on_pin_toggle = on_pin_toggle
-        self._image_storage = image_storage
-        self._index = index
-        self._selected = selected
+        self._on_hover = on_hover  # on_hover(item, inside) — drives the list's shared tooltip
+        self._thumbnails = thumbnails
+        self._ticker = ticker  # shared RelativeTimeTicker
+        self._meta_prefix = ""
+        self._index = -1
+        self._selected = False
+        self._hover = False
         self._thumbnail_ref = None  # Keep reference to prevent GC
+        self._thumbnail_request = None
 
         self._build()
+        self._widgets = self._collect(self)
         self._bind_events()
-        self.set_selected(selected)
 
     def _build(self):
         self.configure(height=styles.ITEM_HEIGHT, padx=0, pady=0)
         self.pack_propagate(False)
 
+        # Bottom separator line
+        sep = tk.Frame(self, bg=styles.BORDER, height=1)
+        sep.pack(side="bottom", fill="x")
+        self._separator = sep
+
         # Main row container
         row = tk.Frame(self, bg=self.cget("bg"))
         row.pack(fill="both", expand=True, padx=styles.ITEM_PADDING_X,
                  pady=styles.ITEM_PADDING_Y)
 
-        # Left side: index number + actions
+        # Left side: index number (1-9 for quick access)
         left = tk.Frame(row, bg=row.cget("bg"))
         left.pack(side="left", fill="y")
+        self._index_label = tk.Label(
+            left, text="",
+            bg=left.cget("bg"), fg=styles.TEXT_SECONDARY,
+            font=styles.FONT_SMALL, width=2,
+        )
+        self._index_label.pack(side="top", anchor="w")
 
-        # Index number (1-9 for quick access)
-        if self._index < 9:
-            idx_label = tk.Label(
-                left, text=str(self._index + 1),
-                bg=left.cget("bg"), fg=styles.TEXT_SECONDARY,
-                font=styles.FONT_SMALL, width=2,
-            )
-            idx_label.pack(side="top", anchor="w")
-
-        # Right side: content type icon
-        icon_key = CONTENT_TYPE_ICONS.get(self.entry.content_type, "icon_text")
-        icon_text = STRINGS.get(icon_key, "")
-
+        # Right side: content type icon + pin indicator
         right = tk.Frame(row, bg=row.cget("bg"))
         right.pack(side="right", fill="y", padx=(0, 4))
-
-        icon_label = tk.Label(
-            right, text=icon_text,
+        self._icon_label = tk.Label(
+            right, text="",
             bg=right.cget("bg"), fg=styles.TEXT_SECONDARY,
             font=(styles.FONT_FAMILY, 14),
         )
-        icon_label.pack(side="top")
-
-        # Pin indicator
-        if self.entry.is_pinned:
-            pin_label = tk.Label(
-                right, text="📌",
-                bg=right.cget("bg"), fg=styles.PIN_COLOR,
-                font=styles.FONT_SMALL,
-            )
-            pin_label.pack(side="top")
+        self._icon_label.pack(side="top")
+        self._pin_label = tk.Label(
+            right, text="📌",
+            bg=right.cget("bg"), fg=styles.PIN_COLOR,
+            font=styles.FONT_SMALL,
+        )
 
-        # Center: preview text + metadata
+        # Center: preview (text or thumbnail) + metadata
         center = tk.Frame(row, bg=row.cget("bg"))
         center.pack(side="right", fill="both", expand=True, padx=(4, 4))
+        self._preview_label = tk.Label(
+            center, text="",
+            bg=center.cget("bg"), fg=styles.TEXT_PRIMARY,
+            font=styles.FONT_NORMAL, anchor="e", justify="right",
+            wraplength=280,
+        )
+        self._preview_label.pack(side="top", anchor="e")
 
-        # Preview text or thumbnail
-        if self.entry.content_type == "image" and self._image_storage and self.entry.image_path:
-            thumb = self._image_storage.load_thumbnail(self.entry.image_path, size=(60, 40))
-            if thumb:
-                self._thumbnail_ref = ImageTk.PhotoImage(thumb)
-                preview_label = tk.Label(
-                    center, image=self._thumbnail_ref,
-                    bg=center.cget("bg"),
-                )
-                preview_label.pack(side="top", anchor="e")
-            else:
-                self._make_text_preview(center)
-        else:
-            self._make_text_preview(center)
-
-        # Metadata: source app + time
         meta_frame = tk.Frame(center, bg=center.cget("bg"))
         meta_frame.pack(side="bottom", fill="x")
-
-        time_text = relative_time(self.entry.created_at)
-        meta_text = time_text
-        if self.entry.source_app:
-            meta_text = f"{self.entry.source_app}  |  {time_text}"
-
-        meta_label = tk.Label(
-            meta_frame, text=meta_text,
+        self._meta_label = tk.Label(
+            meta_frame, text="",
             bg=meta_frame.cget("bg"), fg=styles.TEXT_SECONDARY,
             font=styles.FONT_SMALL, anchor="e", justify="right",
         )
-        meta_label.pack(side="right")
+        self._meta_label.pack(side="right")
 
-        # Tooltip with full text
-        if self.entry.content_text:
-            full_text = self.entry.content_text[:500]
-            Tooltip(self, full_text)
+    @property
+    def index(self):
+        return self._index
 
-        # Bottom separator line
-        sep = tk.Frame(self, bg=styles.BORDER, height=1)
-        sep.pack(side="bottom", fill="x")
+    @staticmethod
+    def _collect(widget):
+        widgets = [widget]
+        for child in widget.winfo_children():
+            widgets.extend(ClipItem._collect(child))
+        return widgets
+
+    def bind_entry(self, entry, index):
+        """חיבור השורה לרשומה (ולמיקום שלה ברשימה)."""
+        self.entry = entry
+        self._index = index
+
+        self._index_label.configure(text=str(index + 1) if index < 9 else "")
+
+        icon_key = CONTENT_TYPE_ICONS.get(entry.content_type, "icon_text")
+        self._icon_label.configure(text=STRINGS.get(icon_key, ""))
+        if entry.is_pinned:
+            self._pin_label.pack(side="top")
+        else:
+            self._pin_label.pack_forget()
+
+        self._bind_preview(entry)
 
-    def _make_text_preview(self, parent):
-        preview = self.entry.content_preview or ""
+        self._meta_prefix = f"{entry.source_app}  |  " if entry.source_app else ""
+        if self._ticker is not None:
+            time_text = self._ticker.track(self, entry.created_at, self._set_time_text)
+        else:
+            time_text = relative_time(entry.created_at)
+        self._set_time_text(time_text)
+
+    def unbind_entry(self):
+        """השורה יצאה מהתצוגה — ביטול טעינת thumbnail ומעקב הזמן היחסי."""
+        self.entry = None
+        self._cancel_thumbnail()
+        if self._ticker is not None:
+            self._ticker.untrack(self)
+
+    def _set_time_text(self, time_text):
+        self._meta_label.configure(text=self._meta_prefix + time_text)
+
+    def _cancel_thumbnail(self):
+        if self._thumbnail_request is not None:
+            self._thumbnail_request.cancel()
+            self._thumbnail_request = None
+
+    def _bind_preview(self, entry):
+        self._cancel_thumbnail()
+        self._thumbnail_ref = None
+        if entry.image_state == ImageState.PENDING:
+            self._set_text_preview(STRINGS["image_pending"])
+            return
+        if entry.content_type == "image" and self._thumbnails and entry.image_path:
+            self._thumbnail_ref = self._thumbnails.get(entry.image_path)
+            if self._thumbnail_ref:
+                self._preview_label.configure(image=self._thumbnail_ref, text="")
+                return
+            # Placeholder now, the decoded thumbnail when the worker is done
+            self._set_text_preview()
+            self._thumbnail_request = self._thumbnails.request(
+                self, entry.image_path, THUMBNAIL_SIZE, self._on_thumbnail_loaded
+            )
+            return
+        self._set_text_preview()
+
+    def _on_thumbnail_loaded(self, photo):
+        self._thumbnail_request = None
+        if photo is not None:
+            self._thumbnail_ref = photo
+            self._preview_label.configure(image=photo, text="")
+
+    def _set_text_preview(self, preview=None):
+        if preview is None:
+            preview = self.entry.content_preview or ""
         if not preview and self.entry.content_text:
             preview = self.entry.content_text[:200]
-
-        label = tk.Label(
-            parent, text=preview,
-            bg=parent.cget("bg"), fg=styles.TEXT_PRIMARY,
-            font=styles.FONT_NORMAL, anchor="e", justify="right",
-            wraplength=280,
-        )
-        label.pack(side="top", anchor="e")
+        self._preview_label.configure(image="", text=preview)
 
     def set_selected(self, selected):
+        if selected == self._selected:
+            return
         self._selected = selected
-        bg = styles.BG_SELECTED if selected else styles.BG_PRIMARY
-        self._set_bg_recursive(self, bg)
-
-    def _set_bg_recursive(self, widget, bg):
-        try:
-            widget.configure(bg=bg)
-        except tk.TclError:
-            pass
-        for child in widget.winfo_children():
-            self._set_bg_recursive(child, bg)
+        self._apply_bg()
+
+    def _apply_bg(self):
+        if self._selected:
+            bg = styles.BG_SELECTED
+        elif self._hover:
+            bg = styles.BG_HOVER
+        else:
+            bg = styles.BG_PRIMARY
+        for widget in self._widgets:
+            if widget is not self._separator:
+                widget.configure(bg=bg)
 
     def _bind_events(self):
-        self.bind("<Button-1>", self._click)
-        self.bind("<Enter>", self._on_enter)
-        self.bind("<Leave>", self._on_leave)
-        # Bind children too
-        for child in self.winfo_children():
-            child.bind("<Button-1>", self._click)
-            self._bind_children(child)
-
-    def _bind_children(self, widget):
-        for child in widget.winfo_children():
-            child.bind("<Button-1>", self._click)
-            child.bind("<Enter>", self._on_enter)
-            child.bind("<Leave>", self._on_leave)
-            self._bind_children(child)
+        for widget in self._widgets:
+            widget.bind("<Button-1>", self._click, add="+")
+            widget.bind("<Enter>", self._on_enter, add="+")
+            widget.bind("<Leave>", self._on_leave, add="+")
 
     def _click(self, event=None):
-        if self._on_click:
+        if self._on_hover:
+            self._on_hover(self, False)
+        if self._on_click and self.entry is not None:
             self._on_click(self.entry)
 
     def _on_enter(self, event=None):
+        self._hover = True
+        if self._on_hover and self.entry is not None:
+            self._on_hover(self, True)
         if not self._selected:
-            self._set_bg_recursive(self, styles.BG_HOVER)
+            self._apply_bg()
 
     def _on_leave(self, event=None):
+        self._hover = False
+        if self._on_hover:
+            self._on_hover(self, False)
         if not self._selected:
-            self._set_bg_recursive(self, styles.BG_PRIMARY)
+            self._apply_bg()
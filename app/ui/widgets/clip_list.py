@@ -1,115 +1,138 @@
 """רשימה גלילה של פריטי לוח — Scrollable list of clipboard items."""
 
+import math
 import tkinter as tk
 
 from app.ui import styles
+from app.ui.relative_time_ticker import RelativeTimeTicker
+from app.ui.thumbnail_cache import ThumbnailCache
 from app.ui.widgets.clip_item import ClipItem
+from app.ui.widgets.tooltip import SharedTooltip
 from app.constants import STRINGS
 
 
 class ClipList(tk.Frame):
-    """רשימת פריטים עם גלילה ותמיכה בניווט מקלדת."""
+    """
+    רשימה וירטואלית: רק השורות הנראות קיימות כ-widgets. מאגר קטן של ClipItem
+    ממוחזר בגלילה (bind_entry לרשומה אחרת), והגלילה מחושבת מסך הרשומות —
+    עלות הרענון קבועה ולא תלויה באורך הרשימה.
+    """
 
     def __init__(self, parent, image_storage=None, on_item_click=None,
-                 on_item_delete=None, on_pin_toggle=None):
+                 on_item_delete=None, on_pin_toggle=None, on_near_end=None,
+                 prefetch_rows=0, load_text=None):
         super().__init__(parent, bg=styles.BG_PRIMARY)
-        self._image_storage = image_storage
+        self._thumbnails = ThumbnailCache(image_storage) if image_storage else None
+        self._ticker = RelativeTimeTicker(self)
+        # One tooltip for all rows; load_text(entry_id, max_chars) runs only on hover
+        self._tooltip = SharedTooltip(self, load_text) if load_text else None
         self._on_item_click = on_item_click
         self._on_item_delete = on_item_delete
         self._on_pin_toggle = on_pin_toggle
-        self._items = []
+        # Called when the visible rows come within prefetch_rows of the end
+        self._on_near_end = on_near_end
+        self._prefetch_rows = prefetch_rows
+        self._rows = []           # pooled ClipItem widgets
         self._entries = []
         self._selected_index = -1
+        self._top = 0             # scroll offset in pixels
+        self._row_height = styles.ITEM_HEIGHT
 
         self._build()
 
     def _build(self):
-        # Canvas for scrolling
-        self._canvas = tk.Canvas(
-            self, bg=styles.BG_PRIMARY, highlightthickness=0,
-            borderwidth=0,
-        )
         self._scrollbar = tk.Scrollbar(
-            self, orient="vertical", command=self._canvas.yview,
+            self, orient="vertical", command=self._on_scrollbar,
             width=styles.SCROLLBAR_WIDTH,
         )
-        self._canvas.configure(yscrollcommand=self._scrollbar.set)
-
         self._scrollbar.pack(side="left", fill="y")
-        self._canvas.pack(side="right", fill="both", expand=True)
-
-        # Inner frame
-        self._inner = tk.Frame(self._canvas, bg=styles.BG_PRIMARY)
-        self._canvas_window = self._canvas.create_window(
-            (0, 0), window=self._inner, anchor="nw",
-        )
 
-        self._inner.bind("<Configure>", self._on_inner_configure)
-        self._canvas.bind("<Configure>", self._on_canvas_configure)
-        self._canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        # Viewport — pooled rows are placed at absolute y offsets
+        self._viewport = tk.Frame(self, bg=styles.BG_PRIMARY)
+        self._viewport.pack(side="right", fill="both", expand=True)
+        self._viewport.bind("<Configure>", self._on_viewport_configure)
+        self._viewport.bind_all("<MouseWheel>", self._on_mousewheel)
 
         # Empty state label
         self._empty_label = tk.Label(
-            self._inner, text=STRINGS["empty_history"],
+            self._viewport, text=STRINGS["empty_history"],
             bg=styles.BG_PRIMARY, fg=styles.TEXT_SECONDARY,
             font=styles.FONT_LARGE, anchor="center", justify="center",
         )
 
+    # --- Data ---
+
     def set_entries(self, entries):
         """עדכון רשימת הפריטים."""
-        # Clear existing items
-        for item in self._items:
-            item.destroy()
-        self._items.clear()
+        self._hide_tooltip()
         self._entries = entries
-        self._selected_index = -1
+        self._top = 0
+        # Select first item
+        self._selected_index = 0 if entries else -1
+
+        if not entries:
+            self._empty_label.place(relx=0.5, y=80, anchor="n")
+        else:
+            self._empty_label.place_forget()
+
+        self._render()
 
+    def append_entries(self, entries):
+        """הוספת עמוד רשומות בסוף (גלילה אינסופית) — הבחירה והגלילה לא משתנות."""
         if not entries:
-            self._empty_label.pack(fill="both", expand=True, pady=80)
             return
+        self._entries = self._entries + list(entries)
+        self._empty_label.place_forget()
+        self._render()
+
+    def update_entries(self, entries):
+        """
+        החלפת הרשימה אחרי שינוי מקומי (הוספה/מחיקה/הזזה) — בלי לאפס:
+        הבחירה נשארת על אותה רשומה, והשורה העליונה הנראית נשארת במקומה.
+        """
+        selected = self.get_selected_entry()
+        first = self._top // self._row_height
+        anchor = self._entries[first] if self._top and first < len(self._entries) else None
+        anchor_offset = self._top % self._row_height
 
-        self._empty_label.pack_forget()
+        self._entries = entries
+        positions = {e.id: i for i, e in enumerate(entries)}
 
-        for i, entry in enumerate(entries):
-            item = ClipItem(
-                self._inner,
-                entry=entry,
-                image_storage=self._image_storage,
-                on_click=self._on_item_click,
-                on_delete=self._on_item_delete,
-                on_pin_toggle=self._on_pin_toggle,
-                index=i,
-                selected=False,
-            )
-            item.pack(fill="x")
-            self._items.append(item)
+        if selected is not None and selected.id in positions:
+            self._selected_index = positions[selected.id]
+        else:
+            self._selected_index = min(self._selected_index, len(entries) - 1)
+        if not entries:
+            self._selected_index = -1
 
-        # Select first item
-        if self._items:
-            self.select(0)
+        # At the very top, new rows slide in above; otherwise keep the view still
+        if anchor is not None and anchor.id in positions:
+            self._top = positions[anchor.id] * self._row_height + anchor_offset
+        max_top = max(0, self._content_height() - self._view_height())
+        self._top = min(self._top, max_top)
+
+        if not entries:
+            self._empty_label.place(relx=0.5, y=80, anchor="n")
+        else:
+            self._empty_label.place_forget()
+        self._render()
+
+    # --- Selection ---
 
     def select(self, index):
         """בחירת פריט לפי אינדקס."""
-        if not self._items:
+        if not self._entries:
             return
-        index = max(0, min(index, len(self._items) - 1))
-
-        # Deselect previous
-        if 0 <= self._selected_index < len(self._items):
-            self._items[self._selected_index].set_selected(False)
-
-        self._selected_index = index
-        self._items[index].set_selected(True)
-
-        # Scroll into view
-        self._scroll_to_item(index)
+        self._selected_index = max(0, min(index, len(self._entries) - 1))
+        self._scroll_to_item(self._selected_index)
+        self._render()
 
     def select_next(self):
-        if self._items:
+        if self._entries:
             self.select(self._selected_index + 1)
 
     def select_previous(self):
-        if self._items:
+        if self._entries:
             self.select(self._selected_index - 1)
 
     def get_selected_entry(self):
@@ -122,29 +145,103 @@ class ClipList(tk.Frame):
             return self._entries[index]
         return None
 
+    # --- Virtual scrolling ---
+
+    def _content_height(self):
+        return len(self._entries) * self._row_height
+
+    def _view_height(self):
+        return max(1, self._viewport.winfo_height())
+
+    def _set_top(self, top):
+        max_top = max(0, self._content_height() - self._view_height())
+        top = max(0, min(int(top), max_top))
+        if top != self._top:
+            self._hide_tooltip()  # the row under the pointer is about to change
+            self._top = top
+            self._render()
+
     def _scroll_to_item(self, index):
         """גלילה אוטומטית לפריט."""
-        if not self._items or index >= len(self._items):
+        item_y = index * self._row_height
+        view_h = self._view_height()
+        if item_y < self._top:
+            self._top = item_y
+        elif item_y + self._row_height > self._top + view_h:
+            self._top = item_y + self._row_height - view_h
+
+    def _ensure_pool(self):
+        # Enough rows to cover the viewport plus one partially visible row
+        needed = math.ceil(self._view_height() / self._row_height) + 1
+        while len(self._rows) < needed:
+            self._rows.append(ClipItem(
+                self._viewport,
+                thumbnails=self._thumbnails,
+                ticker=self._ticker,
+                on_click=self._on_item_click,
+                on_delete=self._on_item_delete,
+                on_pin_toggle=self._on_pin_toggle,
+                on_hover=self._on_row_hover,
+            ))
+
+    def _render(self):
+        """חיבור שורות המאגר לרשומות הנראות ומיקומן."""
+        self._ensure_pool()
+        first = self._top // self._row_height
+        offset = self._top % self._row_height
+
+        for slot, row in enumerate(self._rows):
+            index = first + slot
+            if index >= len(self._entries):
+                if row.entry is not None:
+                    row.unbind_entry()
+                    row.place_forget()
+                continue
+            entry = self._entries[index]
+            if row.entry is not entry or row.index != index:
+                row.bind_entry(entry, index)
+            row.set_selected(index == self._selected_index)
+            row.place(x=0, y=slot * self._row_height - offset,
+                      relwidth=1, height=self._row_height)
+
+        self._update_scrollbar()
+
+        last_visible = first + len(self._rows) - 1
+        if self._on_near_end and self._entries and \
+                last_visible >= len(self._entries) - self._prefetch_rows:
+            self._on_near_end()
+
+    def _on_row_hover(self, row, inside):
+        if self._tooltip is None:
+            return
+        if inside:
+            self._tooltip.schedule(row, row.entry.id)
+        else:
+            self._tooltip.leave(row)
+
+    def _hide_tooltip(self):
+        if self._tooltip is not None:
+            self._tooltip.cancel()
+
+    def _update_scrollbar(self):
+        total = self._content_height()
+        if total <= 0:
+            self._scrollbar.set(0.0, 1.0)
             return
-        self._inner.update_idletasks()
-        item = self._items[index]
-        item_y = item.winfo_y()
-        item_h = item.winfo_height()
-        canvas_h = self._canvas.winfo_height()
-        scroll_top = self._canvas.canvasy(0)
-        scroll_bottom = scroll_top + canvas_h
-
-        if item_y < scroll_top:
-            self._canvas.yview_moveto(item_y / self._inner.winfo_reqheight())
-        elif item_y + item_h > scroll_bottom:
-            target = (item_y + item_h - canvas_h) / self._inner.winfo_reqheight()
-            self._canvas.yview_moveto(target)
-
-    def _on_inner_configure(self, event=None):
-        self._canvas.configure(scrollregion=self._canvas.bbox("all"))
-
-    def _on_canvas_configure(self, event=None):
-        self._canvas.itemconfig(self._canvas_window, width=event.width)
+        self._scrollbar.set(self._top / total, min(1.0, (self._top + self._view_height()) / total))
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._set_top(float(amount) * self._content_height())
+        elif action == "scroll":
+            step = self._view_height() if unit == "pages" else self._row_height
+            self._set_top(self._top + int(amount) * step)
+
+    def _on_viewport_configure(self, event=None):
+        # Clamp the offset and (re)fill the pool for the new height
+        max_top = max(0, self._content_height() - self._view_height())
+        self._top = min(self._top, max_top)
+        self._render()
 
     def _on_mousewheel(self, event):
-        self._canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self._set_top(self._top - (event.delta / 120) * self._row_height)
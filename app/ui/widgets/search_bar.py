@@ -4,19 +4,27 @@ import tkinter as tk
 
 from app.ui import styles
 from app.ui.rtl_helpers import configure_rtl_entry
-from app.constants import STRINGS, ContentType
+from app.constants import STRINGS, ContentType, ContentSubtype
 
 
 class SearchBar(tk.Frame):
-    """סרגל חיפוש עם שדה טקסט ולחצני סינון סוג."""
+    """סרגל חיפוש עם שדה טקסט ולחצני סינון סוג ותת-סוג."""
 
+    # (content_type, content_subtype, label) — both map to indexed columns
     FILTER_OPTIONS = [
-        (None, "filter_all"),
-        (ContentType.TEXT, "filter_text"),
-        (ContentType.IMAGE, "filter_image"),
-        (ContentType.HTML, "filter_html"),
-        (ContentType.FILE_PATH, "filter_file"),
-        (ContentType.URL, "filter_url"),
+        (None, None, "filter_all"),
+        (ContentType.TEXT, None, "filter_text"),
+        (ContentType.IMAGE, None, "filter_image"),
+        (ContentType.HTML, None, "filter_html"),
+        (ContentType.FILE_PATH, None, "filter_file"),
+        (ContentType.URL, None, "filter_url"),
+        (None, ContentSubtype.EMAIL, "filter_email"),
+        (None, ContentSubtype.FILE_PATH, "filter_path"),
+        (None, ContentSubtype.COLOR, "filter_color"),
+        (None, ContentSubtype.JSON, "filter_json"),
+        (None, ContentSubtype.CODE, "filter_code"),
+        (None, ContentSubtype.NUMBER, "filter_number"),
+        (None, ContentSubtype.PHONE, "filter_phone"),
     ]
 
     def __init__(self, parent, on_search_changed=None):
@@ -24,6 +32,7 @@ class SearchBar(tk.Frame):
         self.pack_propagate(False)
         self._on_search_changed = on_search_changed
         self._active_filter = None
+        self._active_subtype = None
         self._debounce_id = None
         self._filter_buttons = []
 
@@ -61,7 +70,7 @@ class SearchBar(tk.Frame):
         filter_frame = tk.Frame(self, bg=styles.BG_SURFACE)
         filter_frame.pack(fill="x", padx=8, pady=(0, 4))
 
-        for content_type, label_key in self.FILTER_OPTIONS:
+        for content_type, subtype, label_key in self.FILTER_OPTIONS:
             btn = tk.Label(
                 filter_frame,
                 text=STRINGS[label_key],
@@ -73,7 +82,10 @@ class SearchBar(tk.Frame):
                 cursor="hand2",
             )
             btn.pack(side="right", padx=2)
-            btn.bind("<Button-1>", lambda e, ct=content_type, b=btn: self._set_filter(ct, b))
+            btn.bind(
+                "<Button-1>",
+                lambda e, ct=content_type, st=subtype, b=btn: self._set_filter(ct, b, st),
+            )
             self._filter_buttons.append((btn, content_type))
 
         # Highlight initial filter (All)
@@ -100,8 +112,9 @@ class SearchBar(tk.Frame):
             self.after_cancel(self._debounce_id)
         self._debounce_id = self.after(200, self._emit_search)
 
-    def _set_filter(self, content_type, button):
+    def _set_filter(self, content_type, button, subtype=None):
         self._active_filter = content_type
+        self._active_subtype = subtype
         # Update button highlighting
         for btn, _ in self._filter_buttons:
             btn.configure(bg=styles.BG_SURFACE, fg=styles.TEXT_SECONDARY)
@@ -114,7 +127,7 @@ class SearchBar(tk.Frame):
     def _emit_search(self):
         if self._on_search_changed:
             query = "" if self._placeholder_visible else self._search_var.get()
-            self._on_search_changed(query, self._active_filter)
+            self._on_search_changed(query, self._active_filter, self._active_subtype)
 
     def focus_search(self):
         """מיקוד הקלט על שדה החיפוש."""
@@ -125,6 +138,7 @@ class SearchBar(tk.Frame):
         self._entry.delete(0, "end")
         self._placeholder_visible = False
         self._active_filter = None
+        self._active_subtype = None
         for btn, _ in self._filter_buttons:
             btn.configure(bg=styles.BG_SURFACE, fg=styles.TEXT_SECONDARY)
         if self._filter_buttons:
@@ -1,6 +1,9 @@
 """Tooltip מותאם אישית עבור Tkinter."""
 
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from app.ui import styles
 
 
@@ -73,3 +76,171 @@ class Tooltip:
         if self._tip_window:
             self._tip_window.destroy()
             self._tip_window = None
+
+
+# List tooltip size — only as much text as fits is fetched
+LIST_TOOLTIP_MAX_LINES = 20
+LIST_TOOLTIP_WIDTH_CHARS = 45
+LIST_TOOLTIP_MAX_CHARS = LIST_TOOLTIP_MAX_LINES * LIST_TOOLTIP_WIDTH_CHARS
+# Loaded texts kept per entry id (an entry's text never changes)
+LIST_TOOLTIP_CACHE_SIZE = 64
+
+
+class SharedTooltip:
+    """
+    tooltip אחד לרשימה שלמה (במקום Tooltip לכל שורה). הטקסט נטען לפי מפתח
+    (id של רשומה) רק אחרי שהשהיית הריחוף עברה — load_text(key, max_chars) רץ
+    ב-worker, לא ב-thread של Tk, ונשמר במטמון LRU קטן לריחוף הבא.
+    """
+
+    def __init__(self, master, load_text, delay=500, max_chars=LIST_TOOLTIP_MAX_CHARS,
+                 cache_size=LIST_TOOLTIP_CACHE_SIZE):
+        self._master = master
+        self._load_text = load_text
+        self._delay = delay
+        self._max_chars = max_chars
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._executor = None
+        self._anchor = None
+        self._key = None
+        self._after_id = None
+        self._shown = False
+        self._tip_window = None
+        self._text = None
+
+    def schedule(self, anchor, key):
+        """העכבר נכנס ל-anchor שמייצג את key."""
+        if key == self._key and anchor is self._anchor and (self._after_id or self._shown):
+            return  # moved between the row's child widgets
+        self.cancel()
+        self._anchor = anchor
+        self._key = key
+        self._after_id = self._master.after(self._delay, self._show)
+
+    def leave(self, anchor):
+        if anchor is not self._anchor:
+            return
+        # Leave fires when moving onto a child widget — still inside the row
+        x, y = anchor.winfo_pointerxy()
+        ax, ay = anchor.winfo_rootx(), anchor.winfo_rooty()
+        if ax <= x < ax + anchor.winfo_width() and ay <= y < ay + anchor.winfo_height():
+            return
+        self.cancel()
+
+    def cancel(self):
+        if self._after_id:
+            self._master.after_cancel(self._after_id)
+            self._after_id = None
+        self._hide()
+        self._anchor = None
+        self._key = None
+
+    def _ensure_window(self):
+        if self._tip_window is not None:
+            return
+        # Built once and reused — withdrawn between hovers
+        self._tip_window = tw = tk.Toplevel(self._master)
+        tw.withdraw()
+        tw.wm_overrideredirect(True)
+        tw.wm_attributes("-topmost", True)
+        tw.configure(bg=styles.BG_SURFACE)
+        self._text = tk.Text(
+            tw,
+            bg=styles.BG_SURFACE,
+            fg=styles.TEXT_PRIMARY,
+            font=styles.FONT_SMALL,
+            padx=8,
+            pady=4,
+            wrap="word",
+            width=LIST_TOOLTIP_WIDTH_CHARS,
+            relief="flat",
+            borderwidth=0,
+            highlightthickness=0,
+        )
+        self._text.tag_configure("rtl", justify="right")
+        self._text.pack()
+
+    def _show(self):
+        self._after_id = None
+        key = self._key
+        if self._anchor is None:
+            return
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            self._display(text)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tooltip")
+        # One char more than fits — tells whether the text was cut
+        future = self._executor.submit(self._load_text, key, self._max_chars + 1)
+
+        def on_loaded(f):
+            try:
+                loaded = f.result()
+            except Exception:
+                loaded = None
+            try:
+                self._master.after(0, self._on_loaded, key, loaded)
+            except (RuntimeError, tk.TclError):
+                pass  # window destroyed
+
+        future.add_done_callback(on_loaded)
+
+    def _on_loaded(self, key, text):
+        if not text:
+            return
+        if len(text) > self._max_chars:
+            text = text[:self._max_chars - 1] + "…"
+        self._cache[key] = text
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        # Still hovering the same row, and not already showing it
+        if key == self._key and self._anchor is not None and not self._shown:
+            self._display(text)
+
+    def _display(self, text):
+        self._ensure_window()
+        widget = self._text
+        widget.configure(state="normal")
+        widget.delete("1.0", "end")
+        widget.insert("end", text, "rtl")
+        widget.configure(height=self._estimate_lines(text), state="disabled")
+        self._place()
+        self._shown = True
+
+    @staticmethod
+    def _estimate_lines(text):
+        lines = 0
+        for line in text.split("\n"):
+            lines += len(line) // LIST_TOOLTIP_WIDTH_CHARS + 1
+            if lines >= LIST_TOOLTIP_MAX_LINES:
+                return LIST_TOOLTIP_MAX_LINES
+        return max(1, lines)
+
+    def _place(self):
+        anchor = self._anchor
+        tw = self._tip_window
+        x = anchor.winfo_rootx() + anchor.winfo_width() // 2
+        y = anchor.winfo_rooty() + anchor.winfo_height() + 4
+
+        tw.update_idletasks()
+        tw_width = tw.winfo_reqwidth()
+        tw_height = tw.winfo_reqheight()
+
+        # Keep within screen bounds
+        screen_w = anchor.winfo_screenwidth()
+        screen_h = anchor.winfo_screenheight()
+        if x + tw_width > screen_w:
+            x = screen_w - tw_width - 10
+        if y + tw_height > screen_h:
+            y = anchor.winfo_rooty() - tw_height - 4
+
+        tw.wm_geometry(f"+{x}+{y}")
+        tw.deiconify()
+
+    def _hide(self):
+        if self._shown:
+            self._tip_window.withdraw()
+            self._shown = False
@@ -0,0 +1,89 @@
+"""
+אחסון טקסט גדול מהלוח מחוץ ל-DB, דחוס: blobs/ab/<digest>.txt.gz.
+ה-DB שומר רק את תחילת הטקסט; ספירת ההפניות משותפת עם התמונות (image_refs).
+"""
+
+import gzip
+import os
+
+BLOB_EXTENSION = "txt.gz"
+
+# Characters written per gzip write — bounds the encoded copy held in memory
+CHUNK_CHARS = 1 << 20
+
+
+class BlobStorage:
+    def __init__(self, base_dir):
+        """base_dir = data/blobs (absolute path)."""
+        self._base_dir = base_dir
+        os.makedirs(base_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        """מחזיר (נתיב יחסי ל-data/ שנשמר ב-DB, נתיב מלא לכתיבה)."""
+        full_path = os.path.join(self._base_dir, digest[:2], f"{digest}.{BLOB_EXTENSION}")
+        data_dir = os.path.dirname(self._base_dir)
+        return os.path.relpath(full_path, data_dir), full_path
+
+    def get_full_path(self, relative_path):
+        data_dir = os.path.dirname(self._base_dir)
+        return os.path.join(data_dir, relative_path)
+
+    def owns(self, relative_path):
+        """האם הנתיב (מטבלת image_refs) שייך לאחסון הזה."""
+        top = relative_path.replace("\\", "/").split("/", 1)[0]
+        return top == os.path.basename(self._base_dir)
+
+    def write_text(self, digest, text):
+        """שמירת הטקסט דחוס (אם עוד לא קיים). מחזיר את הנתיב היחסי."""
+        relative_path, full_path = self.path_for(digest)
+        if os.path.exists(full_path):
+            return relative_path
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = full_path + ".tmp"
+        # newline="" — store the clipboard text byte-for-byte (no \r\n translation)
+        with gzip.open(tmp_path, "wt", encoding="utf-8", newline="", compresslevel=1) as f:
+            for start in range(0, len(text), CHUNK_CHARS):
+                f.write(text[start:start + CHUNK_CHARS])
+        os.replace(tmp_path, full_path)
+        return relative_path
+
+    def read_text(self, relative_path, max_chars=None):
+        """טעינת הטקסט המלא (או max_chars התווים הראשונים), או None אם הקובץ חסר/פגום."""
+        try:
+            with gzip.open(self.get_full_path(relative_path), "rt",
+                           encoding="utf-8", newline="") as f:
+                return f.read(-1 if max_chars is None else max_chars)
+        except (OSError, EOFError):
+            return None
+
+    def bucket_prefix(self, bucket):
+        """הקידומת (יחסית ל-data/) של כל ה-blobs בתיקיית fan-out אחת."""
+        data_dir = os.path.dirname(self._base_dir)
+        return os.path.relpath(os.path.join(self._base_dir, bucket), data_dir) + os.sep
+
+    def reconcile_bucket(self, bucket, referenced_paths):
+        """מחיקת blobs יתומים בתיקיית fan-out אחת (referenced_paths — יחסיים ל-data/)."""
+        referenced = {os.path.basename(p.replace("\\", "/")) for p in referenced_paths}
+        deleted = 0
+        try:
+            with os.scandir(os.path.join(self._base_dir, bucket)) as it:
+                for item in it:
+                    if not item.is_file() or item.name.endswith(".tmp"):
+                        continue  # .tmp = still being written
+                    if item.name not in referenced:
+                        try:
+                            os.remove(item.path)
+                            deleted += 1
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return deleted
+
+    def delete(self, relative_path):
+        full_path = self.get_full_path(relative_path)
+        if os.path.exists(full_path):
+            try:
+                os.remove(full_path)
+            except OSError:
+                pass
@@ -1,38 +1,47 @@
 """פורמט תאריכים בעברית — זמן יחסי ותצוגת תאריך."""
 
+import time
 from datetime import datetime
+from functools import lru_cache
 
 from app.constants import STRINGS
 
 
-def relative_time(timestamp_str) -> str:
-    """המרת timestamp לזמן יחסי בעברית (לפני X דקות וכו')."""
+@lru_cache(maxsize=4096)
+def parse_epoch(timestamp_str):
+    """timestamp ISO (שעון מקומי) ל-epoch בשניות, או None. נשמר במטמון לכל ערך."""
     if not timestamp_str:
-        return ""
+        return None
     try:
-        ts = datetime.fromisoformat(timestamp_str)
+        return datetime.fromisoformat(timestamp_str).timestamp()
     except ValueError:
-        return timestamp_str
+        return None
 
-    now = datetime.now()
-    diff = now - ts
-    seconds = int(diff.total_seconds())
 
+def relative_bucket(seconds):
+    """
+    הטקסט היחסי לגיל של seconds שניות, וגם הגיל (בשניות) שבו הטקסט עשוי
+    להשתנות — כך שאפשר לחשב מחדש רק כשהגיע הזמן.
+    """
+    seconds = int(seconds)
     if seconds < 5:
-        return STRINGS["ago_now"]
+        return STRINGS["ago_now"], 5
     if seconds < 60:
-        return STRINGS["ago_seconds"].format(n=seconds)
+        return STRINGS["ago_seconds"].format(n=seconds), seconds + 1
     minutes = seconds // 60
-    if minutes == 1:
-        return STRINGS["ago_minute"]
     if minutes < 60:
-        return STRINGS["ago_minutes"].format(n=minutes)
+        text = STRINGS["ago_minute"] if minutes == 1 else STRINGS["ago_minutes"].format(n=minutes)
+        return text, (minutes + 1) * 60
     hours = minutes // 60
-    if hours == 1:
-        return STRINGS["ago_hour"]
     if hours < 24:
-        return STRINGS["ago_hours"].format(n=hours)
-    days = diff.days
+        text = STRINGS["ago_hour"] if hours == 1 else STRINGS["ago_hours"].format(n=hours)
+        return text, (hours + 1) * 3600
+    # Day granularity and up — re-evaluated once a day
+    days = seconds // 86400
+    return _days_text(days), (days + 1) * 86400
+
+
+def _days_text(days):
     if days == 1:
         return STRINGS["ago_yesterday"]
     if days < 7:
@@ -51,6 +60,16 @@ def relative_time(timestamp_str) -> str:
     return STRINGS["ago_years"].format(n=years)
 
 
+def relative_time(timestamp_str) -> str:
+    """המרת timestamp לזמן יחסי בעברית (לפני X דקות וכו')."""
+    if not timestamp_str:
+        return ""
+    epoch = parse_epoch(timestamp_str)
+    if epoch is None:
+        return timestamp_str
+    return relative_bucket(time.time() - epoch)[0]
+
+
 def format_date(timestamp_str) -> str:
     """תצוגת תאריך מלא."""
     if not timestamp_str:
@@ -0,0 +1,137 @@
+"""קידוד תמונות מהלוח ב-process pool — מחוץ לנתיב הקליטה ומחוץ ל-GIL."""
+
+import io
+import os
+
+CODEC_PNG_FAST = "png_fast"            # PNG with a low compress_level
+CODEC_PNG = "png"                      # PNG optimize=True (slowest, smallest)
+CODEC_WEBP_LOSSLESS = "webp_lossless"  # lossless WebP
+CODEC_DEFERRED = "deferred"            # fast PNG now, optimized PNG when idle
+
+CODEC_EXTENSIONS = {
+    CODEC_PNG_FAST: "png",
+    CODEC_PNG: "png",
+    CODEC_WEBP_LOSSLESS: "webp",
+    CODEC_DEFERRED: "png",
+}
+
+# Default effort per codec: PNG compress_level (0-9) / WebP method (0-6)
+DEFAULT_EFFORT = {
+    CODEC_PNG_FAST: 1,
+    CODEC_PNG: 9,
+    CODEC_WEBP_LOSSLESS: 4,
+    CODEC_DEFERRED: 1,
+}
+
+
+def _save(image, full_path, codec, effort):
+    # Write to a temp file first so readers never see a half-written image
+    tmp_path = full_path + ".tmp"
+    if codec == CODEC_WEBP_LOSSLESS:
+        image.save(tmp_path, "WEBP", lossless=True, method=effort)
+    elif codec == CODEC_PNG:
+        image.save(tmp_path, "PNG", optimize=True)
+    else:
+        image.save(tmp_path, "PNG", compress_level=effort)
+    os.replace(tmp_path, full_path)
+
+
+def _save_thumbnail(image, thumb_path, size):
+    from PIL import Image
+    thumb = image.copy()
+    thumb.thumbnail(size, Image.Resampling.LANCZOS)
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    tmp_path = thumb_path + ".tmp"
+    thumb.save(tmp_path, "PNG", compress_level=6)
+    os.replace(tmp_path, thumb_path)
+
+
+def encode_dib(dib_bytes, full_path, codec, effort, thumb_path=None, thumb_size=None):
+    """פענוח CF_DIB וקידוד לקובץ + thumbnail מאותו פענוח. רץ בתהליך נפרד."""
+    from PIL import BmpImagePlugin
+    image = BmpImagePlugin.DibImageFile(io.BytesIO(dib_bytes))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    _save(image, full_path, codec, effort)
+    if thumb_path:
+        _save_thumbnail(image, thumb_path, thumb_size)
+    return full_path
+
+
+def make_thumbnail(full_path, thumb_path, thumb_size):
+    """יצירת thumbnail מקובץ תמונה קיים. רץ בתהליך נפרד."""
+    from PIL import Image
+    with Image.open(full_path) as image:
+        image.load()
+        _save_thumbnail(image, thumb_path, thumb_size)
+    return thumb_path
+
+
+def optimize_file(full_path):
+    """קידוד מחדש של PNG קיים עם optimize=True. רץ בתהליך נפרד."""
+    from PIL import Image
+    with Image.open(full_path) as image:
+        image.load()
+    _save(image, full_path, CODEC_PNG, DEFAULT_EFFORT[CODEC_PNG])
+    return full_path
+
+
+class ImageEncoder:
+    """שירות קידוד תמונות. ה-process pool נוצר רק בשימוש הראשון."""
+
+    def __init__(self, codec=CODEC_PNG_FAST, effort=None, workers=1):
+        if codec not in CODEC_EXTENSIONS:
+            codec = CODEC_PNG_FAST
+        self._codec = codec
+        self._effort = DEFAULT_EFFORT[codec] if effort is None else effort
+        self._workers = max(1, workers)
+        self._executor = None
+
+    @property
+    def codec(self):
+        return self._codec
+
+    @property
+    def extension(self):
+        return CODEC_EXTENSIONS[self._codec]
+
+    @property
+    def needs_optimize(self):
+        """האם קבצים שנכתבו עדיין ממתינים לקידוד מחדש (מצב deferred)."""
+        return self._codec == CODEC_DEFERRED
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Imported here — multiprocessing's pool machinery is slow to import at startup
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        return self._executor
+
+    def submit(self, dib_bytes, full_path, thumb_path=None, thumb_size=None, on_done=None):
+        """
+        קידוד אסינכרוני (כולל thumbnail אם התבקש).
+        on_done(success) נקרא מ-thread פנימי של ה-executor — גם כשהקידוד בוטל
+        (shutdown), עם success=False. מחזיר Future; זורק אם ה-pool שבור או סגור.
+        """
+        future = self._get_executor().submit(
+            encode_dib, dib_bytes, full_path, self._codec, self._effort,
+            thumb_path, thumb_size,
+        )
+        if on_done:
+            # f.exception() raises CancelledError on a cancelled future
+            future.add_done_callback(
+                lambda f: on_done(not f.cancelled() and f.exception() is None)
+            )
+        return future
+
+    def make_thumbnail(self, full_path, thumb_path, thumb_size):
+        """יצירת thumbnail לתמונה קיימת. מחזיר Future."""
+        return self._get_executor().submit(make_thumbnail, full_path, thumb_path, thumb_size)
+
+    def optimize(self, full_path):
+        """קידוד מחדש של קובץ (מצב deferred). מחזיר Future."""
+        return self._get_executor().submit(optimize_file, full_path)
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
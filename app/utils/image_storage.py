@@ -1,36 +1,51 @@
-"""ניהול שמירה, טעינה ומחיקה של תמונות מהלוח."""
+"""
+ניהול שמירה, טעינה ומחיקה של תמונות מהלוח.
+אחסון לפי תוכן: images/ab/cd/<digest>.<ext> — תמונה זהה נכתבת פעם אחת,
+וספירת ההפניות נשמרת ב-DB (טבלת image_refs).
+"""
 
-import hashlib
 import os
-from datetime import datetime
+
+LEGACY_META_KEY = "image_store_layout"
+LAYOUT_CONTENT_ADDRESSED = "content_addressed"
+THUMBNAILS_META_KEY = "thumbnails_backfilled"
+# Last image path the thumbnail backfill got through (resumed next run)
+THUMBNAILS_CURSOR_KEY = "thumbnails_backfill_cursor"
+
+# Top-level fan-out directories (images/ab/...), in scan order
+BUCKETS = [f"{i:02x}" for i in range(256)]
+
+# Size of the list-row thumbnails generated at ingest
+THUMBNAIL_SIZE = (60, 40)
 
 
 class ImageStorage:
     def __init__(self, base_dir):
         """base_dir = data/images (absolute path)."""
         self._base_dir = base_dir
+        # Thumbnails live next to images/, outside the orphan-cleanup walk
+        self._thumbs_dir = os.path.join(os.path.dirname(base_dir), "thumbs")
         os.makedirs(base_dir, exist_ok=True)
 
-    def save(self, image) -> str:
+    def path_for(self, digest, extension="png"):
         """
-        שמירת תמונה (PIL Image) וחזרת נתיב יחסי ל-data/.
-        הנתיב היחסי נשמר ב-DB.
+        הנתיב של תמונה לפי ה-digest שלה.
+        מחזיר (נתיב יחסי ל-data/ שנשמר ב-DB, נתיב מלא לכתיבה).
         """
-        now = datetime.now()
-        sub_dir = os.path.join(self._base_dir, now.strftime("%Y"), now.strftime("%m"))
-        os.makedirs(sub_dir, exist_ok=True)
-
-        # Unique filename
-        img_bytes = image.tobytes()
-        short_hash = hashlib.sha256(img_bytes).hexdigest()[:6]
-        filename = f"img_{now.strftime('%Y%m%d_%H%M%S')}_{short_hash}.png"
-        full_path = os.path.join(sub_dir, filename)
-
-        image.save(full_path, "PNG", optimize=True)
+        sub_dir = os.path.join(self._base_dir, digest[:2], digest[2:4])
+        full_path = os.path.join(sub_dir, f"{digest}.{extension}")
 
         # Return relative path from data/ directory
         data_dir = os.path.dirname(self._base_dir)
-        return os.path.relpath(full_path, data_dir)
+        return os.path.relpath(full_path, data_dir), full_path
+
+    def exists(self, relative_path):
+        return os.path.exists(self.get_full_path(relative_path))
+
+    def get_thumbnail_path(self, relative_path):
+        """נתיב מלא של קובץ ה-thumbnail (PNG קטן) של תמונה."""
+        digest = os.path.splitext(os.path.basename(relative_path.replace("\\", "/")))[0]
+        return os.path.join(self._thumbs_dir, digest[:2], f"{digest}.png")
 
     def get_full_path(self, relative_path):
         """המרת נתיב יחסי לנתיב מלא."""
@@ -38,7 +53,7 @@ class ImageStorage:
         return os.path.join(data_dir, relative_path)
 
     def load_thumbnail(self, relative_path, size=(80, 60)):
-        """טעינת תמונה ויצירת thumbnail."""
+        """טעינת תמונה ויצירת thumbnail (נתיב איטי — כשאין thumbnail שמור)."""
         full_path = self.get_full_path(relative_path)
         if not os.path.exists(full_path):
             return None
@@ -50,14 +65,54 @@ class ImageStorage:
         except Exception:
             return None
 
-    def delete(self, relative_path):
-        """מחיקת קובץ תמונה."""
-        full_path = self.get_full_path(relative_path)
-        if os.path.exists(full_path):
+    def backfill_thumbnails(self, repo, image_encoder, batch_size=200):
+        """
+        יצירת thumbnails חסרים לתמונות שנשמרו לפני שהם נוצרו בקליטה — מנה אחת
+        בכל הרצה, וממשיכה מה-cursor ב-app_meta בהרצה הבאה.
+        """
+        if repo.get_meta(THUMBNAILS_META_KEY):
+            return 0
+        data_dir = os.path.dirname(self._base_dir)
+        images_prefix = os.path.relpath(self._base_dir, data_dir) + os.sep
+        paths = repo.get_referenced_image_paths(
+            prefix=images_prefix, after=repo.get_meta(THUMBNAILS_CURSOR_KEY), limit=batch_size,
+        )
+        futures = []
+        for relative_path in paths:
+            thumb_path = self.get_thumbnail_path(relative_path)
+            full_path = self.get_full_path(relative_path)
+            if os.path.exists(thumb_path) or not os.path.exists(full_path):
+                continue
+            futures.append(image_encoder.make_thumbnail(full_path, thumb_path, THUMBNAIL_SIZE))
+        created = self._wait_all(futures)
+        if len(paths) < batch_size:
+            repo.set_meta(THUMBNAILS_META_KEY, "1")
+            repo.delete_meta(THUMBNAILS_CURSOR_KEY)
+        else:
+            repo.set_meta(THUMBNAILS_CURSOR_KEY, paths[-1])
+        return created
+
+    @staticmethod
+    def _wait_all(futures):
+        done = 0
+        for future in futures:
             try:
-                os.remove(full_path)
-            except OSError:
+                future.result()
+                done += 1
+            except Exception:
                 pass
+        futures.clear()
+        return done
+
+    def delete(self, relative_path):
+        """מחיקת קובץ תמונה וה-thumbnail שלו."""
+        for full_path in (self.get_full_path(relative_path),
+                          self.get_thumbnail_path(relative_path)):
+            if os.path.exists(full_path):
+                try:
+                    os.remove(full_path)
+                except OSError:
+                    pass
 
     def get_total_size_bytes(self) -> int:
         """חישוב גודל כולל של כל התמונות."""
@@ -70,21 +125,93 @@ class ImageStorage:
                     pass
         return total
 
-    def cleanup_orphans(self, valid_paths):
-        """מחיקת קבצי תמונה שלא קיימים ב-DB."""
-        valid_full = set()
+    def migrate_legacy_layout(self, repo):
+        """
+        המרה חד-פעמית של קבצי images/YYYY/MM/img_*.png למבנה לפי תוכן.
+        ה-digest של קובץ ישן הוא ה-content_hash של הרשומה שמפנה אליו.
+        """
+        if repo.get_meta(LEGACY_META_KEY) == LAYOUT_CONTENT_ADDRESSED:
+            return 0
+
+        moved = 0
+        failed = 0
+        for old_path, digest in repo.get_image_paths_with_hash():
+            if not os.path.basename(old_path.replace("\\", "/")).startswith("img_"):
+                continue
+            extension = os.path.splitext(old_path)[1].lstrip(".") or "png"
+            new_path, new_full = self.path_for(digest, extension)
+            old_full = self.get_full_path(old_path)
+            try:
+                if os.path.exists(old_full):
+                    if os.path.exists(new_full):
+                        os.remove(old_full)  # identical image already stored
+                    else:
+                        os.makedirs(os.path.dirname(new_full), exist_ok=True)
+                        os.replace(old_full, new_full)
+                repo.relink_image(old_path, new_path)
+                moved += 1
+            except OSError:
+                failed += 1  # e.g. file locked — retried on the next run
+
+        repo.rebuild_image_refs()
+        if not failed:
+            # Until then the orphan scan stays off — it would delete legacy files
+            repo.set_meta(LEGACY_META_KEY, LAYOUT_CONTENT_ADDRESSED)
+            self._remove_empty_dirs()
+        return moved
+
+    def _remove_empty_dirs(self):
+        for root, _dirs, _files in os.walk(self._base_dir, topdown=False):
+            if root != self._base_dir:
+                try:
+                    os.rmdir(root)  # fails (and is skipped) unless empty
+                except OSError:
+                    pass
+
+    def bucket_prefix(self, bucket):
+        """הקידומת (יחסית ל-data/) של כל הנתיבים בתיקיית fan-out אחת."""
         data_dir = os.path.dirname(self._base_dir)
-        for p in valid_paths:
-            valid_full.add(os.path.normpath(os.path.join(data_dir, p)))
+        return os.path.relpath(os.path.join(self._base_dir, bucket), data_dir) + os.sep
+
+    def reconcile_bucket(self, bucket, referenced_paths):
+        """
+        מחיקת קבצי תמונה ו-thumbnails יתומים בתיקיית fan-out אחת.
+        referenced_paths — הנתיבים היחסיים בתיקייה הזו שיש להם הפניות ב-DB.
+        """
+        referenced = {os.path.basename(p) for p in referenced_paths}
+        referenced_digests = {os.path.splitext(name)[0] for name in referenced}
 
         deleted = 0
-        for root, _dirs, files in os.walk(self._base_dir):
-            for f in files:
-                full = os.path.normpath(os.path.join(root, f))
-                if full not in valid_full:
-                    try:
-                        os.remove(full)
-                        deleted += 1
-                    except OSError:
-                        pass
+        for sub_dir in self._scandir_dirs(os.path.join(self._base_dir, bucket)):
+            deleted += self._remove_unlisted(sub_dir, lambda name: name in referenced)
+        deleted += self._remove_unlisted(
+            os.path.join(self._thumbs_dir, bucket),
+            lambda name: os.path.splitext(name)[0] in referenced_digests,
+        )
+        return deleted
+
+    @staticmethod
+    def _scandir_dirs(path):
+        try:
+            with os.scandir(path) as it:
+                return [e.path for e in it if e.is_dir()]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _remove_unlisted(dir_path, is_referenced):
+        deleted = 0
+        try:
+            with os.scandir(dir_path) as it:
+                for item in it:
+                    if not item.is_file() or item.name.endswith(".tmp"):
+                        continue  # .tmp = encoder output still being written
+                    if not is_referenced(item.name):
+                        try:
+                            os.remove(item.path)
+                            deleted += 1
+                        except OSError:
+                            pass
+        except OSError:
+            pass
         return deleted
@@ -0,0 +1,68 @@
+"""מדידת זמני עלייה — import ואתחול לכל רכיב, וזמן עד שהקליטה פעילה."""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    phase(name) מודד בלוק (import או אתחול) ואת מספר המודולים שנטענו בו;
+    milestone(name) רושם את הזמן מתחילת התהליך. הרישום תמיד פעיל (זול),
+    והדו"ח מודפס/נשמר רק כש-enabled.
+    """
+
+    def __init__(self, enabled=False, t0=None):
+        self.enabled = enabled
+        self._t0 = time.perf_counter() if t0 is None else t0
+        self._phases = []       # (name, ms, modules loaded)
+        self._milestones = []   # (name, ms since start)
+
+    @contextmanager
+    def phase(self, name):
+        modules = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((
+                name,
+                (time.perf_counter() - start) * 1000.0,
+                len(sys.modules) - modules,
+            ))
+
+    def milestone(self, name):
+        self._milestones.append((name, (time.perf_counter() - self._t0) * 1000.0))
+
+    def to_dict(self):
+        return {
+            "phases": [
+                {"name": name, "ms": round(ms, 2), "modules": modules}
+                for name, ms, modules in self._phases
+            ],
+            "milestones": [
+                {"name": name, "ms": round(ms, 2)} for name, ms in self._milestones
+            ],
+        }
+
+    def format_report(self):
+        lines = [f"{'phase':<28}{'ms':>10}{'modules':>10}"]
+        for name, ms, modules in self._phases:
+            lines.append(f"{name:<28}{ms:>10.1f}{modules:>10}")
+        lines.append("")
+        for name, ms in self._milestones:
+            lines.append(f"{name + ' at':<28}{ms:>10.1f}")
+        return "\n".join(lines)
+
+    def report(self, json_path=None):
+        """הדפסה (ושמירה ל-JSON) — רק במצב profiling."""
+        if not self.enabled:
+            return
+        print(self.format_report(), flush=True)
+        if json_path:
+            try:
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump(self.to_dict(), f, indent=2)
+            except OSError:
+                pass
@@ -6,18 +6,33 @@ import re
 
 
 def compute_hash(content) -> str:
-    """SHA-256 hash של תוכן (str או bytes)."""
+    """SHA-256 hash של תוכן (str, bytes או memoryview — ללא העתקה)."""
     if isinstance(content, str):
         content = content.encode("utf-8")
     return hashlib.sha256(content).hexdigest()
 
 
-def truncate(text, max_len=200) -> str:
-    """קיצור טקסט עם '...' אם ארוך מדי."""
+def hash_text(text, chunk_chars=1 << 20):
+    """
+    SHA-256 וגודל ב-UTF-8 של טקסט במעבר אחד, בחלקים —
+    בלי להחזיק עותק מקודד של הטקסט כולו. מחזיר (hash, גודל_בבתים).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for start in range(0, len(text), chunk_chars):
+        chunk = text[start:start + chunk_chars].encode("utf-8")
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def truncate(text, max_len=200, head_chars=4096) -> str:
+    """קיצור טקסט עם '...' אם ארוך מדי. עובד רק על תחילת הטקסט (head_chars)."""
     if not text:
         return ""
-    text = text.replace("\r\n", " ").replace("\n", " ").strip()
-    if len(text) <= max_len:
+    clipped = len(text) > head_chars
+    text = text[:head_chars].replace("\r\n", " ").replace("\n", " ").strip()
+    if len(text) <= max_len and not clipped:
         return text
     return text[:max_len - 3] + "..."
 
@@ -33,15 +48,3 @@ def strip_html(html_content) -> str:
     # Collapse whitespace
     text = re.sub(r"\s+", " ", text).strip()
     return text
-
-
-def is_url(text) -> bool:
-    """בדיקה אם הטקסט הוא URL."""
-    if not text:
-        return False
-    text = text.strip()
-    return bool(re.match(
-        r"^https?://[^\s]+$|^www\.[^\s]+$|^ftp://[^\s]+$",
-        text,
-        re.IGNORECASE,
-    ))
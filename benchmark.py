@@ -0,0 +1,196 @@
+"""
+מדידת ביצועים של רכיבי הליבה — רץ גם ב-Linux (ללא Win32).
+
+    python benchmark.py capture --count 5000
+    python benchmark.py coalesce --bursts 20 --burst-size 50
+    python benchmark.py classify --count 100000
+    python benchmark.py source --count 100000 --apps 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_ROOT)
+
+from app.core.capture_pipeline import CapturePipeline, FakeClipboardBackend
+from app.core.classifier import classify
+from app.core.source_detector import FakeProcessInspector, SourceDetector
+from app.core.clipboard_snapshot import FORMAT_TEXT
+from app.core.tracing import Tracer, format_summary
+from app.db.database import Database
+from app.db.repository import ClipboardRepository
+
+
+def bench_capture(args):
+    """מדידת זמן השלב ב-thread של ה-pump מול קצב העיבוד מקצה לקצה."""
+    tmp_dir = tempfile.mkdtemp()
+    db = Database(os.path.join(tmp_dir, "bench.db"))
+    repo = ClipboardRepository(db)
+    done = threading.Event()
+    inserted = [0]
+    tracer = Tracer(capacity=args.count)
+
+    def on_new_entry(entry):
+        repo.insert(entry)
+        if entry._trace:
+            entry._trace.mark("insert")
+            tracer.finish(entry._trace)
+        inserted[0] += 1
+        if inserted[0] >= args.count:
+            done.set()
+
+    backend = FakeClipboardBackend(source_app="bench.exe", source_window="bench")
+    pipeline = CapturePipeline(
+        backend, on_new_entry,
+        queue_size=args.queue_size, workers=args.workers, overflow="block",
+        block_timeout=60, coalesce_ms=0, tracer=tracer,
+    )
+    pipeline.start()
+
+    pump_time = 0.0
+    start = time.perf_counter()
+    for i in range(args.count):
+        backend.set_formats({FORMAT_TEXT: f"benchmark entry {i} " * args.words})
+        t0 = time.perf_counter()
+        pipeline.on_clipboard_update()
+        pump_time += time.perf_counter() - t0
+    done.wait(timeout=120)
+    total = time.perf_counter() - start
+    pipeline.stop()
+    db.close()
+
+    print(f"updates:         {args.count}")
+    print(f"pump thread:     {pump_time / args.count * 1e6:.1f} µs/update")
+    print(f"end-to-end:      {args.count / total:.0f} entries/s")
+    print(f"pipeline stats:  {pipeline.stats()}")
+    print(format_summary(tracer.summary()))
+
+
+def bench_coalesce(args):
+    """פרצי עדכונים (כמו Office/סקריפטים) — כמה עדכונים מול כמה קריאות בפועל."""
+    captured = []
+    backend = FakeClipboardBackend(source_app="bench.exe")
+    pipeline = CapturePipeline(
+        backend, captured.append, coalesce_ms=args.window_ms,
+        coalesce_max_ms=args.window_ms * 10,
+    )
+    pipeline.start()
+    for burst in range(args.bursts):
+        for i in range(args.burst_size):
+            backend.set_formats({FORMAT_TEXT: f"burst {burst} update {i}"})
+            pipeline.on_clipboard_update()
+            time.sleep(args.interval_ms / 1000.0)
+        time.sleep(args.window_ms * 3 / 1000.0)
+    pipeline.stop()
+
+    stats = pipeline.stats()
+    finals = sum(1 for e in captured if e.content_text.endswith(f"update {args.burst_size - 1}"))
+    print(f"updates received:   {stats['updates']}")
+    print(f"captures performed: {stats['captures']}")
+    print(f"final-state hits:   {finals}/{args.bursts}")
+
+
+CLASSIFY_SAMPLES = [
+    "https://example.com/path?query=1",
+    "someone.name@example.co.il",
+    "#1e90ff",
+    "rgba(30, 144, 255, 0.5)",
+    "-12,345.67",
+    "+972 (3) 555-1234",
+    "C:\\Users\\ari\\Documents\\report.docx",
+    '{"id": 17, "tags": ["a", "b"]}',
+    "def handler(event):\n    return event.id\n",
+    "פגישה מחר בשעה 10 במשרד, להביא את המסמכים",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 200,
+]
+
+
+def bench_classify(args):
+    """זמן סיווג לרשומה — תערובת של כל תתי-הסוגים וטקסט חופשי ארוך."""
+    samples = [CLASSIFY_SAMPLES[i % len(CLASSIFY_SAMPLES)] for i in range(args.count)]
+    counts = {}
+    start = time.perf_counter()
+    for text in samples:
+        subtype = classify(text)
+        counts[subtype] = counts.get(subtype, 0) + 1
+    total = time.perf_counter() - start
+
+    print(f"entries:         {args.count}")
+    print(f"classify:        {total / args.count * 1e6:.2f} µs/entry")
+    print(f"subtypes:        {counts}")
+
+
+def bench_source(args):
+    """זיהוי אפליקציית המקור עם המטמון — מעבר בין apps חלונות, ו-PID שממוחזר מדי פעם."""
+    inspector = FakeProcessInspector({
+        1000 + i: (f"app{i}.exe", i) for i in range(args.apps)
+    })
+    lookup_delay = args.lookup_us / 1e6
+    process_name = inspector.process_name
+
+    def slow_process_name(pid):
+        # Stands in for the psutil / OpenProcess round trip of the real inspector
+        time.sleep(lookup_delay)
+        return process_name(pid)
+
+    inspector.process_name = slow_process_name
+    detector = SourceDetector(inspector)
+    restarts = 0
+    for i in range(args.count):
+        pid = 1000 + i % args.apps
+        if args.restart_every and i and i % args.restart_every == 0:
+            # Same PID, new process — must not be served from the cache
+            name, created = inspector.processes[pid]
+            inspector.processes[pid] = (name, created + args.apps)
+            restarts += 1
+        inspector.foreground_pid = pid
+        inspector.foreground_title = f"window {i}"
+        detector.get_foreground_app()
+
+    stats = detector.stats()
+    print(f"lookups:         {stats['calls']}  (pid reuses: {restarts})")
+    print(f"cache hits:      {stats['cache_hits'] / stats['calls'] * 100:.1f}%")
+    print(f"name queries:    {inspector.name_lookups}")
+    print(f"avg / max:       {stats['avg_us']:.1f} / {stats['max_us']:.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clipboard AriGo benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    capture = sub.add_parser("capture", help="capture pipeline with a fake clipboard")
+    capture.add_argument("--count", type=int, default=2000)
+    capture.add_argument("--words", type=int, default=20)
+    capture.add_argument("--workers", type=int, default=1)
+    capture.add_argument("--queue-size", type=int, default=32)
+    capture.set_defaults(func=bench_capture)
+
+    coalesce = sub.add_parser("coalesce", help="burst coalescing")
+    coalesce.add_argument("--bursts", type=int, default=20)
+    coalesce.add_argument("--burst-size", type=int, default=50)
+    coalesce.add_argument("--interval-ms", type=float, default=1.0)
+    coalesce.add_argument("--window-ms", type=int, default=50)
+    coalesce.set_defaults(func=bench_coalesce)
+
+    classify_cmd = sub.add_parser("classify", help="content subtype classifier")
+    classify_cmd.add_argument("--count", type=int, default=100000)
+    classify_cmd.set_defaults(func=bench_classify)
+
+    source = sub.add_parser("source", help="foreground app detection with the name cache")
+    source.add_argument("--count", type=int, default=100000)
+    source.add_argument("--apps", type=int, default=20)
+    source.add_argument("--lookup-us", type=float, default=200.0)
+    source.add_argument("--restart-every", type=int, default=5000)
+    source.set_defaults(func=bench_source)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
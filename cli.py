@@ -0,0 +1,217 @@
+"""
+גישה להיסטוריית הלוח משורת הפקודה — בלי Tk ובלי Win32, פלט JSON.
+רץ גם ב-Linux, למשל על עותק של ה-DB במכונת build.
+
+    python cli.py search "query" --type text --subtype url --limit 20
+    python cli.py recent --limit 10
+    python cli.py show 42 --full
+    python cli.py pin 42 / unpin 42 / delete 42
+    python cli.py stats
+    python cli.py export --output history.json
+    python cli.py --db path/to/clipboard.db recent
+"""
+
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, "data", "clipboard.db")
+
+# Rows fetched per query while exporting the whole history
+EXPORT_BATCH = 500
+
+
+class CliError(Exception):
+    """שגיאה שמדווחת למשתמש (JSON ל-stderr, קוד יציאה 1)."""
+
+
+def _open_repo(db_path):
+    # Imported here so `--help` and argument errors stay instant
+    sys.path.insert(0, PROJECT_ROOT)
+    from app.db.database import Database
+    from app.db.migrations import LATEST_VERSION
+    from app.db.repository import ClipboardRepository
+
+    if not os.path.exists(db_path):
+        raise CliError(f"database not found: {db_path}")
+    # Never migrates — that is the app's job, and may run while it is open
+    db = Database(db_path, migrate=False)
+    if db.schema_version < LATEST_VERSION:
+        raise CliError(
+            f"database schema is v{db.schema_version}, expected v{LATEST_VERSION}"
+            " — run the app once to upgrade it"
+        )
+    return ClipboardRepository(db)
+
+
+def _entry_to_dict(entry, full=False):
+    # app.db is already imported by _open_repo at this point
+    from app.db.repository import entry_to_dict
+    return entry_to_dict(entry, full)
+
+
+def _full_text(entry, db_path):
+    """הטקסט המלא — מה-blob החיצוני אם ה-DB שומר רק את תחילתו."""
+    if not entry.content_blob:
+        return entry.content_text
+    from app.utils.blob_storage import BlobStorage
+
+    blobs = BlobStorage(os.path.join(os.path.dirname(db_path), "blobs"))
+    text = blobs.read_text(entry.content_blob)
+    return entry.content_text if text is None else text
+
+
+def _get_entry(repo, entry_id):
+    entry = repo.get_by_id(entry_id)
+    if entry is None:
+        raise CliError(f"entry {entry_id} not found")
+    return entry
+
+
+# --- Commands ---
+
+def cmd_search(repo, args):
+    entries = repo.search(
+        args.query, content_type=args.type, content_subtype=args.subtype,
+        date_from=args.date_from, date_to=args.date_to,
+        limit=args.limit, offset=args.offset,
+    )
+    return [_entry_to_dict(e, args.full) for e in entries]
+
+
+def cmd_recent(repo, args):
+    entries = repo.get_recent(limit=args.limit, offset=args.offset)
+    return [_entry_to_dict(e, args.full) for e in entries]
+
+
+def cmd_show(repo, args):
+    entry = _get_entry(repo, args.id)
+    data = _entry_to_dict(entry, full=True)
+    if args.full:
+        data["content_text"] = _full_text(entry, args.db)
+    data["truncated"] = bool(entry.content_blob) and not args.full
+    data["formats"] = [
+        {"name": name, "size": len(payload)} for name, payload in repo.get_formats(entry.id)
+    ]
+    return data
+
+
+def cmd_pin(repo, args):
+    _get_entry(repo, args.id)
+    repo.pin(args.id)
+    return {"id": args.id, "is_pinned": True}
+
+
+def cmd_unpin(repo, args):
+    _get_entry(repo, args.id)
+    repo.unpin(args.id)
+    return {"id": args.id, "is_pinned": False}
+
+
+def cmd_delete(repo, args):
+    _get_entry(repo, args.id)
+    repo.delete(args.id)
+    return {"id": args.id, "deleted": True}
+
+
+def cmd_stats(repo, args):
+    stats = repo.get_stats()
+    stats["db_path"] = os.path.abspath(args.db)
+    stats["db_bytes"] = os.path.getsize(args.db)
+    return stats
+
+
+def cmd_export(repo, args):
+    # Streamed in id order, one batch at a time — never the whole history in memory
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        out.write("[")
+        last_id, count = 0, 0
+        while True:
+            entries = repo.get_after_id(last_id, EXPORT_BATCH)
+            if not entries:
+                break
+            for entry in entries:
+                data = _entry_to_dict(entry, full=True)
+                if args.full:
+                    data["content_text"] = _full_text(entry, args.db)
+                out.write(",\n" if count else "\n")
+                out.write(json.dumps(data, ensure_ascii=False))
+                count += 1
+            last_id = entries[-1].id
+        out.write("\n]\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.output:
+        return {"output": os.path.abspath(args.output), "count": count}
+    return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Clipboard AriGo history — JSON output",
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="path to clipboard.db")
+    parser.add_argument("--indent", type=int, default=None, help="pretty-print JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_listing(p):
+        p.add_argument("--limit", type=int, default=50)
+        p.add_argument("--offset", type=int, default=0)
+        p.add_argument("--full", action="store_true", help="include content_text/html")
+
+    p = sub.add_parser("search", help="full-text search (FTS5)")
+    p.add_argument("query", nargs="?", default="")
+    p.add_argument("--type", help="content_type (text, html, image, file_path, url)")
+    p.add_argument("--subtype", help="content_subtype (url, email, path, ...)")
+    p.add_argument("--from", dest="date_from", help="created_at >= (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="created_at <= (YYYY-MM-DD)")
+    add_listing(p)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("recent", help="most recent entries (pinned first)")
+    add_listing(p)
+    p.set_defaults(func=cmd_recent)
+
+    p = sub.add_parser("show", help="one entry with its formats")
+    p.add_argument("id", type=int)
+    p.add_argument("--full", action="store_true", help="read oversized text from its blob")
+    p.set_defaults(func=cmd_show)
+
+    for name, func in (("pin", cmd_pin), ("unpin", cmd_unpin), ("delete", cmd_delete)):
+        p = sub.add_parser(name, help=f"{name} an entry by id")
+        p.add_argument("id", type=int)
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("stats", help="history summary")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("export", help="whole history as a JSON array")
+    p.add_argument("--output", "-o", help="file to write (default: stdout)")
+    p.add_argument("--full", action="store_true", help="read oversized text from its blob")
+    p.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if hasattr(sys.stdout, "reconfigure"):
+        # Hebrew text on a Windows console code page
+        sys.stdout.reconfigure(encoding="utf-8")
+    try:
+        repo = _open_repo(args.db)
+        result = args.func(repo, args)
+    except CliError as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False), file=sys.stderr)
+        return 1
+    if result is not None:
+        print(json.dumps(result, ensure_ascii=False, indent=args.indent))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,24 @@
 """
 Clipboard AriGo — מנהל היסטוריית לוח
 נקודת כניסה ראשית.
+
+    python main.py [--profile-startup]
+
+רק המוניטור, ה-DB והמגש נטענים בעלייה; חלון ה-UI נטען בשימוש הראשון
+(או ברקע, אחרי שהקליטה כבר פעילה, כש-window.prewarm מופעל).
 """
 
+import time
+
+_T0 = time.perf_counter()
+
 import os
 import sys
 import ctypes
-import tkinter as tk
+import dataclasses
+from datetime import datetime
+import multiprocessing
+import threading
 
 # Enable DPI awareness for sharp rendering on high-res displays
 try:
@@ -21,89 +33,242 @@ except Exception:
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, PROJECT_ROOT)
 
-from app.constants import MUTEX_NAME, APP_NAME
-from app.utils.single_instance import ensure_single_instance
-from app.config_manager import ConfigManager
-from app.db.database import Database
-from app.db.repository import ClipboardRepository
-from app.db.cleanup import CleanupManager
-from app.core.clipboard_monitor import ClipboardMonitor
-from app.core.clipboard_handler import push_to_clipboard
-from app.core.startup_manager import set_auto_start
-from app.utils.image_storage import ImageStorage
-from app.ui.main_window import MainWindow
-from app.ui.tray_icon import SystemTrayIcon
+from app.utils.startup_profiler import StartupProfiler
+
+PROFILER = StartupProfiler(
+    enabled="--profile-startup" in sys.argv or os.environ.get("ARIGO_PROFILE_STARTUP") == "1",
+    t0=_T0,
+)
+
+with PROFILER.phase("import tkinter"):
+    import tkinter as tk
+
+with PROFILER.phase("import config"):
+    from app.constants import MUTEX_NAME, APP_NAME, ImageState
+    from app.utils.single_instance import ensure_single_instance
+    from app.config_manager import ConfigManager
+
+with PROFILER.phase("import db"):
+    from app.db.database import Database
+    from app.db.repository import ClipboardRepository, ChangeKind
+    from app.db.cleanup import CleanupManager
+
+with PROFILER.phase("import capture"):
+    from app.core.clipboard_monitor import ClipboardMonitor
+    from app.core.capture_pipeline import CapturePipeline
+    from app.core.clipboard_snapshot import IngestPolicy
+    from app.core.clipboard_handler import push_to_clipboard, Win32ClipboardBackend
+    from app.core.startup_manager import set_auto_start
+    from app.core.source_detector import get_default_detector
+    from app.core.tracing import Tracer, PATH_HOTKEY, PATH_PASTE
+    from app.utils.image_storage import ImageStorage, THUMBNAIL_SIZE
+    from app.utils.image_encoder import ImageEncoder
+    from app.utils.blob_storage import BlobStorage
+
+# Pre-warmed window is built this long after startup — capture comes first
+WINDOW_WARMUP_MS = 1500
 
 
 def main():
+    # Pending images created before this moment have no encode running (see CleanupManager)
+    started_at = datetime.now().isoformat(timespec="milliseconds")
+
     # 1. Ensure single instance
     _mutex = ensure_single_instance(MUTEX_NAME)
 
     # 2. Load configuration
-    config_path = os.path.join(PROJECT_ROOT, "config.json")
-    config = ConfigManager(config_path)
+    with PROFILER.phase("init config"):
+        config_path = os.path.join(PROJECT_ROOT, "config.json")
+        config = ConfigManager(config_path)
 
     # 3. Initialize database
-    db_path = os.path.join(PROJECT_ROOT, "data", "clipboard.db")
-    db = Database(db_path)
-    repo = ClipboardRepository(db)
+    with PROFILER.phase("init db"):
+        db_path = os.path.join(PROJECT_ROOT, "data", "clipboard.db")
+        db = Database(db_path)
+        repo = ClipboardRepository(db)
 
     # 4. Initialize image storage
     images_dir = os.path.join(PROJECT_ROOT, "data", "images")
     image_storage = ImageStorage(images_dir)
+    image_encoder = ImageEncoder(
+        codec=config.get("images.codec", "png_fast"),
+        effort=config.get("images.effort"),
+        workers=config.get("images.encoder_workers", 1),
+    )
+    blob_storage = BlobStorage(os.path.join(PROJECT_ROOT, "data", "blobs"))
+    # Shared by capture and cleanup: reusing a stored file vs. deleting an unreferenced one
+    files_lock = threading.Lock()
+
+    # Latency tracing of the hotkey, capture and paste paths
+    tracer = Tracer(
+        capacity=config.get("tracing.capacity", 512),
+        enabled=config.get("tracing.enabled", True),
+    )
 
     # 5. Create hidden Tkinter root
-    root = tk.Tk()
-    root.withdraw()
-    root.title(APP_NAME)
+    with PROFILER.phase("init tk root"):
+        root = tk.Tk()
+        root.withdraw()
+        root.title(APP_NAME)
 
     # 6. State
     monitor = None
     tray = None
     cleanup = None
+    main_window = None
 
     # 7. Define paste callback
     def on_paste(entry):
+        trace = tracer.begin(PATH_PASTE)
         if monitor:
             monitor.set_suppress_next()
-        push_to_clipboard(entry)
+        if entry.content_blob:
+            # The DB row holds only the head of an oversized text
+            full_text = blob_storage.read_text(entry.content_blob)
+            if full_text is not None:
+                entry = dataclasses.replace(entry, content_text=full_text)
+        if entry.image_path:
+            # Pasted from the stored file when the raw CF_DIB is no longer kept
+            entry = dataclasses.replace(
+                entry, image_path=image_storage.get_full_path(entry.image_path)
+            )
+        # Captured formats are loaded only now, at paste time
+        formats = repo.get_formats(entry.id) if entry.id else None
+        if trace:
+            trace.mark("load")
+        push_to_clipboard(entry, formats)
+        if trace:
+            trace.mark("clipboard")
         if entry.id:
             repo.update_last_used(entry.id)
+        if trace:
+            trace.mark("update")
+            tracer.finish(trace)
+
+    # 8. Main popup window — created on first use (Tk thread only)
+    def get_main_window():
+        nonlocal main_window
+        if main_window is None:
+            with PROFILER.phase("import ui"):
+                from app.ui.main_window import MainWindow
+            with PROFILER.phase("init main window"):
+                main_window = MainWindow(root, repo, config, image_storage, on_paste, tracer)
+            PROFILER.milestone("main window")
+            PROFILER.report(os.path.join(PROJECT_ROOT, "data", "startup_profile.json"))
+        return main_window
 
-    # 8. Create main popup window
-    main_window = MainWindow(root, repo, config, image_storage, on_paste)
+    def on_repository_event(event):
+        # Runs on the thread that made the change, right after the commit
+        if event.kind == ChangeKind.INSERTED:
+            for e in event.entries:
+                if e._trace:
+                    e._trace.mark("insert")
+        window = main_window
+        if window is not None:
+            # Not built yet — it loads the current list when it is
+            root.after(0, window.on_repository_event, event)
 
-    # 9. Callback for new clipboard entries
+    repo.subscribe(on_repository_event)
+
+    # 9. Callback for new clipboard entries (runs on a capture worker thread)
     def on_new_entry(entry):
         # Deduplication
         if config.get("deduplicate_consecutive") and repo.is_duplicate(entry.content_hash):
             return
-        # Save image if needed
-        if entry.content_type == "image" and entry._pil_image is not None:
-            entry.image_path = image_storage.save(entry._pil_image)
-            entry._pil_image = None  # Free memory
-        # Insert into DB
+        if entry.content_type == "image" and entry._image_data is not None:
+            insert_pending_image(entry)
+            return
+        if entry._blob_text is not None:
+            blob_text, entry._blob_text = entry._blob_text, None
+            with files_lock:
+                # Reused blob file + its new reference, atomic with respect to cleanup
+                entry.content_blob = blob_storage.write_text(entry.content_hash, blob_text)
+                if entry._trace:
+                    entry._trace.mark("encode")
+                repo.insert(entry)
+            return
+        if entry._trace:
+            entry._trace.mark("encode")
+        # Insert into DB — subscribers (the UI) are notified via change events
         repo.insert(entry)
-        # Notify UI (thread-safe)
-        root.after(0, main_window.on_new_entry_added)
 
-    # 10. Start clipboard monitor
-    monitor = ClipboardMonitor(
-        on_new_entry=on_new_entry,
-        blacklist=config.get("blacklisted_apps", []),
-    )
+    def insert_pending_image(entry):
+        image_data, entry._image_data = entry._image_data, None
+        entry.image_path, full_path = image_storage.path_for(
+            entry.content_hash, image_encoder.extension
+        )
+        # No "encode" stage here: the file is encoded in the process pool after
+        # the row is in, usually after this trace has already finished
+        with files_lock:
+            # Cleanup re-checks the references under the same lock before it
+            # deletes a file, so a file seen here stays once the row is in
+            if image_storage.exists(entry.image_path):
+                # Identical image already stored — just add a reference
+                entry.image_state = ImageState.READY
+                repo.insert(entry)
+                return
+            # Insert the row right away; the file is encoded in the process pool
+            entry.image_state = ImageState.PENDING
+            repo.insert(entry)
+        image_path = entry.image_path
+        done_state = ImageState.UNOPTIMIZED if image_encoder.needs_optimize else ImageState.READY
 
-    def on_hotkey_triggered(_hotkey_id):
-        root.after(0, main_window.toggle)
+        def on_encoded(success):
+            repo.set_image_state(image_path, done_state if success else ImageState.FAILED)
 
-    monitor.set_hotkey_callback(on_hotkey_triggered)
-    monitor.start()
+        try:
+            image_encoder.submit(
+                image_data, full_path,
+                thumb_path=image_storage.get_thumbnail_path(image_path),
+                thumb_size=THUMBNAIL_SIZE,
+                on_done=on_encoded,
+            )
+        except Exception:
+            # Broken or shut-down pool — the row must not stay "processing" forever
+            repo.set_image_state(image_path, ImageState.FAILED)
 
-    # Register global hotkey
-    mods, vk = config.hotkey_to_win32()
-    monitor.register_hotkey(mods, vk)
+    # 10. Start clipboard monitor + capture pipeline
+    with PROFILER.phase("start capture"):
+        pipeline = CapturePipeline(
+            Win32ClipboardBackend(
+                raw_formats=config.get("capture.raw_formats", True),
+                max_format_bytes=config.get("capture.max_format_kb", 4096) * 1024,
+            ),
+            on_new_entry=on_new_entry,
+            blacklist=config.get("blacklisted_apps", []),
+            queue_size=config.get("capture.queue_size", 32),
+            workers=config.get("capture.workers", 1),
+            overflow=config.get("capture.overflow", "drop_oldest"),
+            coalesce_ms=config.get("capture.coalesce_ms", 50),
+            coalesce_max_ms=config.get("capture.coalesce_max_ms", 500),
+            tracer=tracer,
+            ingest_policy=IngestPolicy(
+                inline_max_bytes=config.get("ingest.inline_max_kb", 1024) * 1024,
+                max_bytes=config.get("ingest.max_mb", 64) * 1024 * 1024,
+                large_action=config.get("ingest.large_action", "external"),
+                head_chars=config.get("ingest.head_chars", 65536),
+            ),
+        )
+        monitor = ClipboardMonitor(pipeline)
+
+        def on_hotkey_triggered(_hotkey_id):
+            # Message-pump thread, straight from WM_HOTKEY
+            trace = tracer.begin(PATH_HOTKEY)
+            root.after(0, lambda: get_main_window().toggle(trace))
+
+        monitor.set_hotkey_callback(on_hotkey_triggered)
+        monitor.start()
+
+        # Register global hotkey
+        mods, vk = config.hotkey_to_win32()
+        monitor.register_hotkey(mods, vk)
+    PROFILER.milestone("capturing")
 
     # 11. Start system tray
+    with PROFILER.phase("import tray"):
+        # pystray (and Pillow, which it needs for the icon) load only here
+        from app.ui.tray_icon import SystemTrayIcon
+
     icon_path = os.path.join(PROJECT_ROOT, "assets", "icon.ico")
 
     def toggle_pause():
@@ -114,27 +279,70 @@ def main():
             monitor.pause()
             tray.update_pause_state(True)
 
+    def show_latency():
+        from app.ui.trace_window import TraceWindow
+        TraceWindow(
+            root, tracer, os.path.join(PROJECT_ROOT, "data", "latency.json"),
+            source_stats=get_default_detector().stats,
+        )
+
+    # Heavy schema steps (index builds, backfills) — resumable, off the startup path
+    migrations_stop = threading.Event()
+    threading.Thread(
+        target=db.run_background_migrations, args=(migrations_stop,),
+        daemon=True, name="Migrations",
+    ).start()
+
+    # Optional local query server for other tools (named pipe / Unix socket)
+    ipc_server = None
+    if config.get("ipc.enabled", False):
+        with PROFILER.phase("start ipc"):
+            from app.core.ipc_server import IpcServer, default_transport
+            ipc_server = IpcServer(
+                default_transport(config.get("ipc.name", "ClipboardAriGo"),
+                                  os.path.join(PROJECT_ROOT, "data")),
+                repo,
+                paste=lambda entry: root.after(0, on_paste, entry),
+                blob_storage=blob_storage,
+                workers=config.get("ipc.workers", 2),
+                cache_size=config.get("ipc.cache_size", 128),
+            )
+            try:
+                ipc_server.start()
+            except OSError:
+                ipc_server = None  # pipe/socket name taken — run without IPC
+
     def shutdown():
+        migrations_stop.set()
+        if ipc_server:
+            ipc_server.stop()
         if monitor:
             monitor.stop()
         if tray:
             tray.stop()
         if cleanup:
             cleanup.cancel()
+        image_encoder.shutdown()
         db.close()
         root.quit()
 
-    tray = SystemTrayIcon(
-        icon_path=icon_path,
-        on_show=lambda: root.after(0, main_window.toggle),
-        on_settings=lambda: root.after(0, main_window.show_settings),
-        on_pause_toggle=lambda: root.after(0, toggle_pause),
-        on_exit=lambda: root.after(0, shutdown),
-    )
-    tray.start()
+    with PROFILER.phase("start tray"):
+        tray = SystemTrayIcon(
+            icon_path=icon_path,
+            on_show=lambda: root.after(0, lambda: get_main_window().toggle()),
+            on_settings=lambda: root.after(0, lambda: get_main_window().show_settings()),
+            on_pause_toggle=lambda: root.after(0, toggle_pause),
+            on_exit=lambda: root.after(0, shutdown),
+            on_latency=(lambda: root.after(0, show_latency)) if tracer.enabled else None,
+        )
+        tray.start()
+    PROFILER.milestone("tray")
 
     # 12. Start cleanup scheduler
-    cleanup = CleanupManager(repo, config, image_storage)
+    cleanup = CleanupManager(
+        repo, config, image_storage, image_encoder, blob_storage,
+        pending_before=started_at, files_lock=files_lock,
+    )
     cleanup_interval = config.get("cleanup_interval_minutes", 30)
     cleanup.schedule(cleanup_interval)
 
@@ -145,9 +353,19 @@ def main():
     # 14. Window close handler
     root.protocol("WM_DELETE_WINDOW", shutdown)
 
+    def on_ready():
+        PROFILER.milestone("ready")
+        PROFILER.report(os.path.join(PROJECT_ROOT, "data", "startup_profile.json"))
+
+    root.after(0, on_ready)
+    if config.get("window.prewarm", True):
+        # Build the popup in the background so the first hotkey is instant
+        root.after(WINDOW_WARMUP_MS, get_main_window)
+
     # 15. Enter main loop
     root.mainloop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # image encoder process pool in the frozen .exe
     main()